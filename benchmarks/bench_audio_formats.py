@@ -0,0 +1,112 @@
+# benchmarks/bench_audio_formats.py
+"""Reports WAV encode/decode throughput and SNR for each sample format and channel layout.
+
+Every message fills 90% of the capacity at 1 bit per sample. SNR is given for sample-aware
+embedding (the low byte of every sample) and for the older layout that used every byte.
+Run from the repository root:
+    python benchmarks/bench_audio_formats.py [--seconds 30]
+"""
+import argparse
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+# --- FORCE PARENT DIRECTORY ONTO PATH ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# -----------------------------------------
+
+from steganography_tool import audio_steg, payload, utils
+
+FILL = 0.9
+
+# name -> (format tag, bytes per sample, channels)
+FORMATS = {
+    "8-bit mono": (audio_steg.WAVE_FORMAT_PCM, 1, 1),
+    "16-bit stereo": (audio_steg.WAVE_FORMAT_PCM, 2, 2),
+    "16-bit 5.1": (audio_steg.WAVE_FORMAT_PCM, 2, 6),
+    "24-bit stereo": (audio_steg.WAVE_FORMAT_PCM, 3, 2),
+    "32-bit stereo": (audio_steg.WAVE_FORMAT_PCM, 4, 2),
+    "float stereo": (audio_steg.WAVE_FORMAT_IEEE_FLOAT, 4, 2),
+}
+
+# --- Test covers ---
+
+def make_signal(seconds, channels, rate=44100):
+    """One sine tone per channel at 40% of full scale, as floats in [-1, 1]."""
+    t = np.arange(int(seconds * rate)) / rate
+    return np.stack([0.4 * np.sin(2 * np.pi * (220 + 110 * channel) * t) for channel in range(channels)], axis=-1)
+
+def to_bytes(signal, format_tag, width):
+    if format_tag == audio_steg.WAVE_FORMAT_IEEE_FLOAT:
+        return signal.astype('<f4').tobytes()
+    if width == 1:
+        return (signal * 127 + 128).astype(np.uint8).tobytes()
+    scaled = (signal * (2 ** (8 * width - 1) - 1)).astype('<i8')
+    # Little-endian integers of any width: keep the low `width` bytes of each int64
+    return scaled.view(np.uint8).reshape(-1, 8)[:, :width].tobytes()
+
+def from_bytes(data, format_tag, width):
+    """Decodes sample bytes to float64 sample values."""
+    if format_tag == audio_steg.WAVE_FORMAT_IEEE_FLOAT:
+        return np.frombuffer(data, dtype='<f4').astype(np.float64)
+    if width == 1:
+        return np.frombuffer(data, dtype=np.uint8).astype(np.float64) - 128
+    raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, width)
+    padded = np.zeros((raw.shape[0], 8), dtype=np.uint8)
+    padded[:, 8 - width:] = raw # Shift into the top bytes, so the sign extends
+    return (padded.view('<i8').reshape(-1) >> (8 * (8 - width))).astype(np.float64)
+
+def make_wav(signal, format_tag, width, rate=44100):
+    data = to_bytes(signal, format_tag, width)
+    channels = signal.shape[1]
+    fmt = struct.pack('<HHIIHH', format_tag, channels, rate, rate * width * channels, width * channels, width * 8)
+    body = b'WAVE' + b'fmt ' + struct.pack('<I', len(fmt)) + fmt + b'data' + struct.pack('<I', len(data)) + data
+    return b'RIFF' + struct.pack('<I', len(body)) + body
+
+# --- Quality metrics ---
+
+def snr(original, modified, format_tag, width):
+    info = audio_steg.read_wav_info(original)
+    span = slice(info.data_offset, info.data_offset + info.data_size)
+    signal = from_bytes(original[span], format_tag, width)
+    noise = from_bytes(modified[span], format_tag, width) - signal
+    power = np.mean(noise ** 2)
+    return float('inf') if power == 0 else 10 * np.log10(np.mean(signal ** 2) / power)
+
+def every_byte(wav, message):
+    """The layout used before sample-aware embedding: the message bits go into every byte."""
+    info = audio_steg.read_wav_info(wav)
+    values = payload.sample_values(payload.build_message(message))
+    frames = np.frombuffer(wav, dtype=np.uint8).copy()
+    utils.embed_lsb(frames[info.data_offset:info.data_offset + info.data_size], values)
+    return frames.tobytes()
+
+# --- Benchmark ---
+
+def run(seconds):
+    print(f"{seconds:g}s covers; messages fill {FILL:.0%} of the sample-aware capacity at 1 bit per sample")
+    print(f"{'format':>14} {'capacity':>10} {'encode MB/s':>12} {'decode MB/s':>12} {'SNR':>9} {'every byte':>11}")
+    for name, (format_tag, width, channels) in FORMATS.items():
+        wav = make_wav(make_signal(seconds, channels), format_tag, width)
+        capacity = audio_steg.capacity(wav)
+        message = os.urandom(int(capacity * FILL))
+        megabytes = len(wav) / (1 << 20)
+
+        start = time.perf_counter()
+        stego = audio_steg.encode_message_in_audio(wav, message)
+        encode = time.perf_counter() - start
+        start = time.perf_counter()
+        assert audio_steg.decode_message_from_audio(stego) == message
+        decode = time.perf_counter() - start
+
+        print(f"{name:>14} {capacity >> 10:>7} KB {megabytes / encode:>12.0f} {megabytes / decode:>12.0f} "
+              f"{snr(wav, stego, format_tag, width):6.1f} dB {snr(wav, every_byte(wav, message), format_tag, width):8.1f} dB")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=30)
+    args = parser.parse_args()
+    run(args.seconds)
@@ -0,0 +1,97 @@
+# benchmarks/bench_bits_per_sample.py
+"""Reports capacity, encode time and distortion (image PSNR, audio SNR) for 1-4 bits per sample.
+
+Every run fills the cover to 90% of its capacity at that setting. Run from the repository root:
+    python benchmarks/bench_bits_per_sample.py [--width 1920 --height 1080] [--seconds 30]
+"""
+import argparse
+import io
+import os
+import sys
+import time
+import wave
+
+import numpy as np
+
+# --- FORCE PARENT DIRECTORY ONTO PATH ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# -----------------------------------------
+
+from steganography_tool import audio_steg, image_steg, payload, utils
+
+FILL = 0.9
+
+# --- Test covers ---
+
+def make_image(width, height):
+    """A smooth gradient with mild noise, closer to a photo than pure noise."""
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.stack([x * 255 // width, y * 255 // height, (x + y) * 255 // (width + height)], axis=-1)
+    return np.clip(base + rng.normal(0, 4, base.shape), 0, 255).astype(np.uint8)
+
+def make_wav(seconds, rate=44100):
+    """A 16-bit stereo WAV holding two sine tones."""
+    t = np.arange(int(seconds * rate)) / rate
+    left = 0.4 * np.sin(2 * np.pi * 440 * t)
+    right = 0.4 * np.sin(2 * np.pi * 660 * t)
+    samples = (np.stack([left, right], axis=-1) * 32767).astype('<i2')
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as fd:
+        fd.setnchannels(2)
+        fd.setsampwidth(2)
+        fd.setframerate(rate)
+        fd.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+# --- Quality metrics ---
+
+def psnr(original, modified):
+    mse = np.mean((original.astype(np.float64) - modified.astype(np.float64)) ** 2)
+    return float('inf') if mse == 0 else 10 * np.log10(255 ** 2 / mse)
+
+def snr(original, modified):
+    """Signal-to-noise ratio of the 16-bit samples, in dB."""
+    info = audio_steg.read_wav_info(original)
+    signal = np.frombuffer(original, dtype='<i2', count=info.n_samples, offset=info.data_offset).astype(np.float64)
+    noise = np.frombuffer(modified, dtype='<i2', count=info.n_samples, offset=info.data_offset).astype(np.float64) - signal
+    power = np.mean(noise ** 2)
+    return float('inf') if power == 0 else 10 * np.log10(np.mean(signal ** 2) / power)
+
+# --- Benchmark ---
+
+def _message(capacity):
+    return "x" * int(capacity * FILL)
+
+def run(width, height, seconds):
+    image = make_image(width, height)
+    wav = make_wav(seconds)
+    print(f"image {width}x{height}, audio {seconds}s 16-bit stereo; messages fill {FILL:.0%} of capacity")
+    print(f"{'bits':>4} {'image cap':>12} {'encode':>9} {'PSNR':>9} {'audio cap':>12} {'encode':>9} {'SNR':>9}")
+    for bits_per_sample in range(1, utils.MAX_BITS_PER_SAMPLE + 1):
+        overhead = payload.overhead(bits_per_sample=bits_per_sample)
+
+        image_capacity = image_steg.capacity(image, bits_per_sample, overhead)
+        message = _message(image_capacity)
+        start = time.perf_counter()
+        stego_image = image_steg.encode_message_in_image(image, message, bits_per_sample=bits_per_sample)
+        image_time = time.perf_counter() - start
+        assert image_steg.decode_message_from_image(stego_image) == message
+
+        audio_capacity = audio_steg.capacity(wav, bits_per_sample, overhead)
+        message = _message(audio_capacity)
+        start = time.perf_counter()
+        stego_wav = audio_steg.encode_message_in_audio(wav, message, bits_per_sample=bits_per_sample)
+        audio_time = time.perf_counter() - start
+        assert audio_steg.decode_message_from_audio(stego_wav) == message
+
+        print(f"{bits_per_sample:>4} {image_capacity >> 10:>9} KB {image_time:8.3f}s {psnr(image, stego_image):6.2f} dB "
+              f"{audio_capacity >> 10:>9} KB {audio_time:8.3f}s {snr(wav, stego_wav):6.2f} dB")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--seconds", type=float, default=30)
+    args = parser.parse_args()
+    run(args.width, args.height, args.seconds)
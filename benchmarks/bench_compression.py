@@ -0,0 +1,80 @@
+# benchmarks/bench_compression.py
+"""Compares end-to-end image encode + decode latency and payload size with and without compression.
+
+Run from the repository root:
+    python benchmarks/bench_compression.py [--size 256KB] [--width 1920 --height 1080]
+"""
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+# --- FORCE PARENT DIRECTORY ONTO PATH ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# -----------------------------------------
+
+from steganography_tool import compress_utils, image_steg, payload
+
+# --- Test payloads ---
+
+def make_json(size):
+    rng = np.random.default_rng(0)
+    records = []
+    while sum(len(record) for record in records) < size:
+        records.append(json.dumps({"id": len(records), "user": f"user{rng.integers(1000)}", "active": bool(rng.integers(2)),
+                                   "score": round(float(rng.random()), 4), "tags": ["alpha", "beta"][:rng.integers(3)]}))
+    return ("[" + ",".join(records) + "]")[:size]
+
+def make_log(size):
+    rng = np.random.default_rng(1)
+    levels = ["INFO", "INFO", "INFO", "WARN", "ERROR"]
+    lines = []
+    while sum(len(line) + 1 for line in lines) < size:
+        lines.append(f"2024-05-{rng.integers(1, 29):02d}T12:{rng.integers(60):02d}:{rng.integers(60):02d}Z "
+                     f"{levels[rng.integers(len(levels))]} worker-{rng.integers(8)} handled /api/items/{rng.integers(10**6)} "
+                     f"in {rng.integers(1, 500)}ms")
+    return "\n".join(lines)[:size]
+
+def make_random(size):
+    # Base64 of random bytes: only the 6-bit alphabet is redundant
+    return base64.b64encode(os.urandom(size))[:size].decode('ascii')
+
+PAYLOADS = {"json": make_json, "log": make_log, "random": make_random}
+
+# --- Benchmark ---
+
+def _parse_size(text):
+    units = {"KB": 1 << 10, "MB": 1 << 20}
+    for suffix, factor in units.items():
+        if text.upper().endswith(suffix):
+            return int(float(text[:-len(suffix)]) * factor)
+    return int(text)
+
+def run(size, width, height):
+    image = np.random.default_rng(2).integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+    codecs = [None] + compress_utils.available_codecs()
+    print(f"{size >> 10} KB messages in a {width}x{height} image; latency is encode + decode")
+    print(f"{'payload':>8} " + " ".join(f"{codec or 'none':>20}" for codec in codecs))
+    for name, make in PAYLOADS.items():
+        message = make(size)
+        row = []
+        for codec in codecs:
+            embedded = len(payload.build_payload(message.encode('utf-8'), compression=codec))
+            start = time.perf_counter()
+            stego = image_steg.encode_message_in_image(image, message, compression=codec)
+            assert image_steg.decode_message_from_image(stego) == message
+            elapsed = time.perf_counter() - start
+            row.append(f"{elapsed * 1000:7.1f} ms {embedded >> 10:6} KB")
+        print(f"{name:>8} " + " ".join(f"{cell:>20}" for cell in row))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=_parse_size, default=256 << 10, help="Message size, e.g. 64KB.")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    args = parser.parse_args()
+    run(args.size, args.width, args.height)
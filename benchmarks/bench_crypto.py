@@ -0,0 +1,105 @@
+# benchmarks/bench_crypto.py
+"""Reports cipher throughput in MB/s: RC4 string/bytes APIs and every registered cipher.
+
+Run from the repository root:
+    python benchmarks/bench_crypto.py [--max-size 100MB] [--legacy-max-size 1MB]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# --- FORCE PARENT DIRECTORY ONTO PATH ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# -----------------------------------------
+
+from steganography_tool import crypto_utils
+
+SIZES = [1 << 10, 10 << 10, 100 << 10, 1 << 20, 10 << 20, 100 << 20]
+
+# --- Original implementation, kept here for comparison only ---
+
+def legacy_encryption(plaintext, key_str):
+    S = crypto_utils.KSA(crypto_utils._prepare_key_array(key_str))
+    keystream = np.array(crypto_utils.PRGA(S, len(plaintext)))
+    cipher = keystream ^ np.array([ord(i) for i in plaintext])
+    return ''.join([chr(c) for c in cipher])
+
+# --- Benchmark ---
+
+def _parse_size(text):
+    units = {"KB": 1 << 10, "MB": 1 << 20, "GB": 1 << 30}
+    for suffix, factor in units.items():
+        if text.upper().endswith(suffix):
+            return int(float(text[:-len(suffix)]) * factor)
+    return int(text)
+
+def _mb_per_s(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    return len(args[0]) / elapsed / (1 << 20)
+
+def _pure_python(func, *args):
+    """Runs func with the OpenSSL keystream disabled."""
+    backend, crypto_utils.ARC4 = crypto_utils.ARC4, None
+    try:
+        return func(*args)
+    finally:
+        crypto_utils.ARC4 = backend
+
+def run(max_size, legacy_max_size):
+    # 16 bytes, so the OpenSSL keystream can be used when it is available
+    key = "benchmark key 16"
+    has_openssl = crypto_utils._openssl_key(crypto_utils._prepare_key(key)) is not None
+    rng = np.random.default_rng(0)
+    print(f"{'payload':>10} {'legacy str':>12} {'str API':>12} {'bytes (py)':>12} {'bytes (ssl)':>12}")
+    for size in SIZES:
+        if size > max_size:
+            break
+        data = rng.integers(0, 256, size=size, dtype=np.uint8).tobytes()
+        text = data.decode('latin-1')
+
+        new_str = f"{_mb_per_s(crypto_utils.encryption, text, key):7.2f} MB/s"
+        pure = f"{_pure_python(_mb_per_s, crypto_utils.encrypt_bytes, data, key):7.2f} MB/s"
+        if has_openssl:
+            assert crypto_utils.encrypt_bytes(data, key) == _pure_python(crypto_utils.encrypt_bytes, data, key)
+            fast = f"{_mb_per_s(crypto_utils.encrypt_bytes, data, key):7.2f} MB/s"
+        else:
+            fast = f"{'n/a':>12}"
+        if size <= legacy_max_size:
+            assert legacy_encryption(text, key) == crypto_utils.encryption(text, key)
+            old_str = f"{_mb_per_s(legacy_encryption, text, key):7.2f} MB/s"
+        else:
+            old_str = f"{'skipped':>12}"
+        print(f"{size >> 10:>7} KB {old_str} {new_str} {pure} {fast}")
+
+def run_registry(max_size):
+    """Times encrypt + decrypt for every cipher in the registry."""
+    ciphers = crypto_utils.available_ciphers()
+    rng = np.random.default_rng(0)
+    print()
+    print(f"{'payload':>10} " + " ".join(f"{name:>18}" for name in ciphers))
+    for size in SIZES:
+        if size > max_size:
+            break
+        data = rng.integers(0, 256, size=size, dtype=np.uint8).tobytes()
+        row = []
+        key = crypto_utils.derive_key("benchmark key 16", b"salt", "sha256")
+        for name in ciphers:
+            start = time.perf_counter()
+            encrypted = crypto_utils.encrypt(data, key, name)
+            assert crypto_utils.decrypt(encrypted, key, name) == data
+            row.append(f"{2 * size / (time.perf_counter() - start) / (1 << 20):13.2f} MB/s")
+        print(f"{size >> 10:>7} KB " + " ".join(row))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-size", type=_parse_size, default=100 << 20)
+    parser.add_argument("--legacy-max-size", type=_parse_size, default=1 << 20,
+                        help="Largest payload for which the original implementation is still timed.")
+    args = parser.parse_args()
+    run(args.max_size, args.legacy_max_size)
+    run_registry(args.max_size)
@@ -0,0 +1,112 @@
+# benchmarks/bench_image_output.py
+"""Reports latency and peak memory per megapixel of the image output stage, per format and compression level.
+
+Each pipeline starts from a decoded RGB array, the way the app receives an upload, hides a message,
+and ends with the bytes of a lossless file. The original app pipeline (convert to BGR, embed, convert
+back, Pillow PNG at its default level) is included for comparison. Every case runs in a fresh child
+process, so the peak memory is that of the case alone. Run from the repository root:
+    python benchmarks/bench_image_output.py [--width 1920 --height 1080] [--levels 0 1 6]
+"""
+import argparse
+import io
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+import numpy as np
+
+# --- FORCE PARENT DIRECTORY ONTO PATH ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# -----------------------------------------
+
+import cv2
+from PIL import Image
+
+from steganography_tool import image_steg
+
+MESSAGE_BYTES = 16 << 10
+
+# --- Test cover ---
+
+def make_cover(width, height, block_rows=64):
+    """A smooth RGB gradient with a little noise, which compresses roughly like a photo.
+
+    It is built a few rows at a time, so its temporaries do not raise the peak memory of a case.
+    """
+    rng = np.random.default_rng(0)
+    cover = np.empty((height, width, 3), dtype=np.uint8)
+    x = np.arange(width)
+    for top in range(0, height, block_rows):
+        y = np.arange(top, min(top + block_rows, height))[:, None]
+        base = np.stack(np.broadcast_arrays(x * 255 // width, y * 255 // height, (x + y) * 255 // (width + height)), axis=-1)
+        cover[top:top + len(y)] = np.clip(base + rng.integers(-6, 7, size=base.shape), 0, 255)
+    return cover
+
+# --- Pipelines ---
+
+def original_pipeline(rgb, message):
+    """The app before the output stage: two color conversions, a PIL copy and a default PNG."""
+    bgr = cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+    stego = image_steg.encode_message_in_image(bgr, message)
+    output = io.BytesIO()
+    Image.fromarray(cv2.cvtColor(stego, cv2.COLOR_BGR2RGB)).save(output, format="PNG")
+    return output.getvalue()
+
+def rgb_pipeline(rgb, message, format, level):
+    """Embeds in RGB order and writes straight from the array."""
+    stego = image_steg.encode_message_in_image(rgb, message, channel_order='RGB')
+    return image_steg.encode_image(stego, format, level, channel_order='RGB')
+
+def bgr_pipeline(rgb, message, format, level):
+    """The same for an array OpenCV loaded; the BGR copy is made before the timer starts."""
+    stego = image_steg.encode_message_in_image(rgb, message)
+    return image_steg.encode_image(stego, format, level)
+
+# --- Benchmark ---
+
+def _peak_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 # KB on Linux
+
+def _case(connection, width, height, pipeline, args):
+    rgb = make_cover(width, height)
+    if pipeline is bgr_pipeline:
+        rgb = np.ascontiguousarray(rgb[..., ::-1])
+    message = os.urandom(MESSAGE_BYTES)
+    baseline = _peak_mb()
+    start = time.perf_counter()
+    data = pipeline(rgb, message, *args)
+    elapsed = time.perf_counter() - start
+    connection.send((elapsed, _peak_mb() - baseline, len(data)))
+
+def _run_case(width, height, pipeline, args=()):
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=_case, args=(child, width, height, pipeline, args))
+    process.start()
+    result = parent.recv()
+    process.join()
+    return result
+
+def run(width, height, levels):
+    megapixels = width * height / 1e6
+    print(f"{width}x{height} RGB cover ({megapixels:.1f} MP), {MESSAGE_BYTES >> 10} KB message; embed + write")
+    print(f"{'pipeline':>9} {'format':>6} {'level':>5} {'ms/MP':>8} {'peak MB/MP':>11} {'file size':>10}")
+
+    def report(name, format, level, result):
+        elapsed, peak, size = result
+        print(f"{name:>9} {format:>6} {level:>5} {elapsed * 1000 / megapixels:8.1f} {peak / megapixels:11.1f} {size >> 10:>7} KB")
+
+    report("original", "png", 6, _run_case(width, height, original_pipeline))
+    for format in image_steg.IMAGE_OUTPUT_FORMATS:
+        for level in levels:
+            for name, pipeline in (("RGB", rgb_pipeline), ("BGR", bgr_pipeline)):
+                report(name, format, level, _run_case(width, height, pipeline, (format, level)))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--levels", type=int, nargs="+", default=[0, 1, 6], help="Compression levels, 0-9 (WebP at 9 takes seconds per megapixel).")
+    args = parser.parse_args()
+    run(args.width, args.height, args.levels)
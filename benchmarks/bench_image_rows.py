@@ -0,0 +1,87 @@
+# benchmarks/bench_image_rows.py
+"""Compares decoding a whole stego image with the row-by-row decoder that stops once the payload is read.
+
+A short message is hidden in a large cover, which is saved as PNG and as TIFF. Every decode runs
+in a fresh child process, so the peak memory is that of the decode alone. Run from the repository root:
+    python benchmarks/bench_image_rows.py [--megapixels 100] [--size 1KB]
+"""
+import argparse
+import math
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+# --- FORCE PARENT DIRECTORY ONTO PATH ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# -----------------------------------------
+
+import cv2
+
+from bench_image_output import make_cover
+from steganography_tool import image_steg, payload
+
+# --- Decoders ---
+
+def full_decode(path):
+    """The image is decoded completely before the payload is read."""
+    return image_steg.decode_message_from_image(cv2.imread(path))
+
+def row_decode(path):
+    return image_steg.decode_image_file(path)
+
+# --- Benchmark ---
+
+def _peak_mb():
+    # VmHWM belongs to the address space, so unlike ru_maxrss it does not carry over from the parent through exec
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+
+def _case(connection, decode, path):
+    start = time.perf_counter()
+    message = decode(path)
+    elapsed = time.perf_counter() - start
+    connection.send((elapsed, _peak_mb(), message))
+
+def _run_case(decode, path):
+    # Spawned, not forked, so the child does not inherit the cover held by this process
+    context = multiprocessing.get_context("spawn")
+    parent, child = context.Pipe()
+    process = context.Process(target=_case, args=(child, decode, path))
+    process.start()
+    result = parent.recv()
+    process.join()
+    return result
+
+def _parse_size(text):
+    units = {"KB": 1 << 10, "MB": 1 << 20}
+    for suffix, factor in units.items():
+        if text.upper().endswith(suffix):
+            return int(float(text[:-len(suffix)]) * factor)
+    return int(text)
+
+def run(megapixels, size):
+    width = height = int(math.sqrt(megapixels * 1e6))
+    message = os.urandom(size)
+    stego = image_steg.encode_message_in_image(make_cover(width, height), message)
+    rows = math.ceil(payload.sample_values(payload.build_message(message)).size / (width * 3))
+    print(f"{width}x{height} cover ({width * height / 1e6:.0f} MP), {size} byte message in its first {rows} row(s)")
+    print(f"{'format':>6} {'decoder':>8} {'time':>9} {'peak RSS':>9} {'file size':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for format in ("png", "tiff"):
+            path = os.path.join(directory, "stego." + format)
+            image_steg.save_image(stego, path)
+            for name, decode in (("full", full_decode), ("rows", row_decode)):
+                elapsed, peak, decoded = _run_case(decode, path)
+                assert decoded == message
+                print(f"{format:>6} {name:>8} {elapsed * 1000:7.1f}ms {peak:6.0f} MB {os.path.getsize(path) >> 20:>7} MB")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--megapixels", type=float, default=100)
+    parser.add_argument("--size", type=_parse_size, default=1 << 10, help="Message size, e.g. 1KB.")
+    args = parser.parse_args()
+    run(args.megapixels, args.size)
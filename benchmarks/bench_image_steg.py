@@ -0,0 +1,98 @@
+# benchmarks/bench_image_steg.py
+"""Compares the original per-pixel LSB loop with the vectorized image engine.
+
+Run from the repository root:
+    python benchmarks/bench_image_steg.py [--sizes 256 512 1024] [--fill 0.5]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# --- FORCE PARENT DIRECTORY ONTO PATH ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# -----------------------------------------
+
+from steganography_tool import image_steg, payload
+
+# --- Original implementation, kept here for comparison only ---
+
+def legacy_encode(image_data, secret_message):
+    binary_data = image_steg.msgtobinary(secret_message + '*^*^*')
+    data_index = 0
+    img_data_copy = image_data.copy()
+    for row in img_data_copy:
+        for pixel in row:
+            r, g, b = image_steg.msgtobinary(pixel)
+            if data_index < len(binary_data):
+                pixel[0] = int(r[:-1] + binary_data[data_index], 2)
+                data_index += 1
+            if data_index < len(binary_data):
+                pixel[1] = int(g[:-1] + binary_data[data_index], 2)
+                data_index += 1
+            if data_index < len(binary_data):
+                pixel[2] = int(b[:-1] + binary_data[data_index], 2)
+                data_index += 1
+            if data_index >= len(binary_data):
+                break
+        if data_index >= len(binary_data):
+            break
+    return img_data_copy
+
+def legacy_decode(image_data):
+    data_binary = ""
+    decoded_data = ""
+    for row in image_data:
+        for pixel in row:
+            r, g, b = image_steg.msgtobinary(pixel)
+            for bit in [r[-1], g[-1], b[-1]]:
+                data_binary += bit
+                if len(data_binary) == 8:
+                    decoded_data += chr(int(data_binary, 2))
+                    data_binary = ""
+                    if decoded_data.endswith("*^*^*"):
+                        return decoded_data[:-5]
+    return None
+
+# --- Benchmark ---
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def run(sizes, fill, skip_legacy_above):
+    rng = np.random.default_rng(0)
+    print(f"{'size':>11} {'payload':>9} {'legacy enc':>11} {'legacy dec':>11} {'new enc':>9} {'new dec':>9} {'speedup':>8}")
+    for side in sizes:
+        image = rng.integers(0, 256, size=(side, side, 3), dtype=np.uint8)
+        n_chars = int((image.size // 8 - payload.HEADER_SIZE) * fill)
+        message = ''.join(rng.choice(list("abcdefghijklmnopqrstuvwxyz0123456789 "), size=n_chars))
+
+        stego, new_enc = _timed(image_steg.encode_message_in_image, image, message)
+        decoded, new_dec = _timed(image_steg.decode_message_from_image, stego)
+        assert decoded == message
+
+        if side <= skip_legacy_above:
+            legacy_stego, old_enc = _timed(legacy_encode, image, message)
+            assert image_steg.decode_message_from_image(legacy_stego) == message, "legacy images no longer decode"
+            legacy_decoded, old_dec = _timed(legacy_decode, legacy_stego)
+            assert legacy_decoded == message
+            speedup = f"{(old_enc + old_dec) / (new_enc + new_dec):7.0f}x"
+            old_enc, old_dec = f"{old_enc:10.3f}s", f"{old_dec:10.3f}s"
+        else:
+            old_enc = old_dec = f"{'skipped':>11}"
+            speedup = f"{'-':>8}"
+
+        print(f"{side:>5}x{side:<5} {n_chars:>9} {old_enc} {old_dec} {new_enc:8.3f}s {new_dec:8.3f}s {speedup}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[128, 256, 512, 1024, 4000])
+    parser.add_argument("--fill", type=float, default=0.5, help="Fraction of the image capacity to use.")
+    parser.add_argument("--skip-legacy-above", type=int, default=1024,
+                        help="Largest image side for which the slow original loop is still timed.")
+    args = parser.parse_args()
+    run(args.sizes, args.fill, args.skip_legacy_above)
@@ -0,0 +1,52 @@
+# benchmarks/bench_scatter.py
+"""Compares the keyed index permutation of scatter mode with shuffling every pixel index of a large image.
+
+A decoder that knows the key only needs the positions of the values it reads: the header and a
+short message are found without mapping the rest of the image. Run from the repository root:
+    python benchmarks/bench_scatter.py [--megapixels 100] [--size 1KB]
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+# --- FORCE PARENT DIRECTORY ONTO PATH ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# -----------------------------------------
+
+from bench_image_rows import _parse_size
+from steganography_tool import payload, scatter_utils
+
+def _timed(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+def run(megapixels, size):
+    pixels = int(megapixels * 1e6)
+    values = payload.sample_values(payload.build_message(os.urandom(size), key="bench")).size
+    print(f"{megapixels:.0f} MP RGB image, {size} byte encrypted message = {values} values in {math.ceil(values / 3)} pixels")
+    print(f"{'method':>22} {'time':>10} {'index memory':>13}")
+
+    elapsed, order = _timed(lambda: np.random.default_rng(0).permutation(pixels))
+    print(f"{'full shuffle':>22} {elapsed * 1000:8.1f}ms {order.nbytes >> 20:>10} MB")
+    del order
+
+    scatter = scatter_utils.Scatter(pixels * 3, "bench", channels=3)
+    elapsed, positions = _timed(lambda: scatter.positions(0, values))
+    print(f"{'scatter, message only':>22} {elapsed * 1000:8.1f}ms {positions.nbytes >> 10:>10} KB")
+
+    count = min(pixels * 3, scatter_utils.BLOCK_VALUES * 8)
+    elapsed, _ = _timed(lambda: [scatter.positions(start, scatter_utils.BLOCK_VALUES)
+                                 for start in range(0, count, scatter_utils.BLOCK_VALUES)])
+    print(f"scatter mapping rate: {count / elapsed / 1e6:.1f} M values/s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--megapixels", type=float, default=100)
+    parser.add_argument("--size", type=_parse_size, default=1 << 10, help="Message size, e.g. 1KB.")
+    args = parser.parse_args()
+    run(args.megapixels, args.size)
@@ -0,0 +1,152 @@
+# benchmarks/bench_text_steg.py
+"""Compares the original string-concatenating text encoder/decoder with the translate-table engine,
+then the density and speed of the two zero-width schemes.
+
+Covers are generated word salads of the given sizes; in the first table every message fills half
+of what the original format could hold. Run from the repository root:
+    python benchmarks/bench_text_steg.py [--sizes 1 4 16] [--skip-legacy-above 4]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+import numpy as np
+
+# --- FORCE PARENT DIRECTORY ONTO PATH ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# -----------------------------------------
+
+from steganography_tool import text_steg
+
+FILL = 0.5
+
+# --- Original implementation, kept here for comparison only ---
+
+def secret_to_binary(text):
+    """Converts the secret message into a custom binary string."""
+    add = []
+    for char in text:
+        t = ord(char)
+        if 32 <= t <= 64:
+            t1 = t + 48
+            t2 = t1 ^ 170  # 170: 10101010
+            res = bin(t2)[2:].zfill(8)
+            add.append("0011" + res)
+        else:
+            t1 = t - 48
+            t2 = t1 ^ 170
+            res = bin(t2)[2:].zfill(8)
+            add.append("0110" + res)
+    
+    # Add delimiter
+    res1 = ''.join(add) + "111111111111"
+    print(f"Binary after conversion: {res1}")
+    return res1
+
+def legacy_encode(cover_text, secret_message):
+    binary_secret = secret_to_binary(secret_message)
+    words = cover_text.split()
+    stego_words = []
+    i = 0
+    while i < len(binary_secret):
+        s = words[int(i/12)]
+        j = 0
+        zwc_chars = ""
+        while j < 12:
+            x = binary_secret[j+i] + binary_secret[i+j+1]
+            zwc_chars += text_steg.ZWC[x]
+            j += 2
+        stego_words.append(s + zwc_chars)
+        i += 12
+    stego_words.extend(words[int(len(binary_secret)/12):])
+    return " ".join(stego_words)
+
+def legacy_decode(stego_text):
+    temp = ''
+    for line in stego_text.splitlines():
+        for word in line.split():
+            binary_extract = ""
+            for letter in word:
+                if letter in text_steg.ZWC_REVERSE:
+                    binary_extract += text_steg.ZWC_REVERSE[letter]
+            if binary_extract == "111111111111":
+                final = ''
+                i = 0
+                while i + 12 <= len(temp):
+                    t3, t4 = temp[i:i+4], int(temp[i+4:i+12], 2)
+                    final += chr((t4 ^ 170) + 48) if t3 == '0110' else chr((t4 ^ 170) - 48)
+                    i += 12
+                return final
+            temp += binary_extract
+    return None
+
+# --- Test covers ---
+
+def make_cover(size):
+    """Lines of 12 random lower-case words, `size` characters in total."""
+    rng = np.random.default_rng(0)
+    vocabulary = [''.join(rng.choice(list("abcdefghijklmnopqrstuvwxyz"), size=rng.integers(2, 10))) for _ in range(5000)]
+    words = rng.choice(vocabulary, size=size // 5)
+    lines = [' '.join(words[i:i + 12]) for i in range(0, len(words), 12)]
+    return '\n'.join(lines)[:size]
+
+# --- Benchmark ---
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    # The original encoder prints the whole binary string
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func(*args)
+    return result, time.perf_counter() - start
+
+def run(sizes, skip_legacy_above):
+    rng = np.random.default_rng(1)
+    print(f"{'cover':>7} {'message':>9} {'legacy enc':>11} {'legacy dec':>11} {'new enc':>9} {'new dec':>9} {'MB/s dec':>9} {'speedup':>8}")
+    for megabytes in sizes:
+        cover = make_cover(int(megabytes * (1 << 20)))
+        n_chars = int(len(cover.split()) * FILL)
+        message = ''.join(rng.choice(list("abcdefghijklmnopqrstuvwxyz0123456789 "), size=n_chars))
+
+        stego, new_enc = _timed(text_steg.encode_message_in_text, cover, message)
+        decoded, new_dec = _timed(text_steg.decode_message_from_text, stego)
+        assert decoded == message
+
+        if megabytes <= skip_legacy_above:
+            legacy_stego, old_enc = _timed(legacy_encode, cover, message)
+            assert text_steg.decode_message_from_text(legacy_stego) == message, "legacy texts no longer decode"
+            _, old_dec = _timed(legacy_decode, legacy_stego)
+            legacy = f"{old_enc:10.2f}s {old_dec:10.2f}s"
+            speedup = f"{(old_enc + old_dec) / (new_enc + new_dec):7.0f}x"
+        else:
+            legacy = f"{'-':>11} {'-':>11}"
+            speedup = f"{'-':>8}"
+        print(f"{megabytes:>5g}MB {n_chars >> 10:>6} KB {legacy} {new_enc:8.2f}s {new_dec:8.2f}s "
+              f"{len(stego.encode('utf-8')) / new_dec / (1 << 20):9.1f} {speedup}")
+
+def run_schemes(sizes):
+    """Capacity, stego size growth and speed of both schemes, each carrying the same message."""
+    rng = np.random.default_rng(2)
+    print(f"\n{'cover':>7} {'scheme':>7} {'capacity':>10} {'chars/byte':>11} {'UTF-8 growth':>13} {'enc':>7} {'dec':>7}")
+    for megabytes in sizes:
+        cover = make_cover(int(megabytes * (1 << 20)))
+        # 90% of what the denser-per-word scheme 1 can hold, so both schemes carry the same message
+        message = rng.bytes(int(text_steg.capacity(cover, scheme=text_steg.SCHEME_ZWC4) * 0.9))
+        for scheme in (text_steg.SCHEME_ZWC4, text_steg.SCHEME_ZWC16):
+            stego, enc = _timed(text_steg.encode_message_in_text, cover, message, None, None, scheme)
+            decoded, dec = _timed(text_steg.decode_message_from_text, stego)
+            assert decoded == message
+            hidden_chars = len(stego) - len(cover)
+            growth = (len(stego.encode('utf-8')) - len(cover.encode('utf-8'))) / len(message)
+            print(f"{megabytes:>5g}MB {scheme:>7} {text_steg.capacity(cover, scheme=scheme) >> 10:>7} KB "
+                  f"{hidden_chars / len(message):>11.2f} {growth:>10.2f} B/B {enc:6.2f}s {dec:6.2f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 4, 16], help="Cover sizes in MB.")
+    parser.add_argument("--skip-legacy-above", type=float, default=4, help="Skip the original implementation above this size.")
+    args = parser.parse_args()
+    run(args.sizes, args.skip_legacy_above)
+    run_schemes(args.sizes)
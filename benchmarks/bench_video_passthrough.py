@@ -0,0 +1,72 @@
+# benchmarks/bench_video_passthrough.py
+"""Compares wall time and output size of the FFV1 re-encode and the H.264 passthrough video modes.
+
+Needs PyAV with libx264 to build the synthetic cover video. Run from the repository root:
+    python benchmarks/bench_video_passthrough.py [--frames 300] [--size 640x360] [--gop 30]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import av
+
+# --- FORCE PARENT DIRECTORY ONTO PATH ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# -----------------------------------------
+
+from steganography_tool import video_steg
+
+# --- Test video ---
+
+def make_cover_video(path, frames, width, height, gop):
+    """Writes a moving-gradient H.264 clip that compresses like real footage."""
+    y, x = np.mgrid[0:height, 0:width]
+    with av.open(path, 'w') as container:
+        stream = container.add_stream('libx264', rate=30)
+        stream.width = width
+        stream.height = height
+        stream.pix_fmt = 'yuv420p'
+        stream.options = {'g': str(gop), 'crf': '23'}
+        for n in range(frames):
+            image = np.stack([(x + 3 * n) % 256, (y + 2 * n) % 256, (x + y + n) % 256], axis=-1).astype(np.uint8)
+            for packet in stream.encode(av.VideoFrame.from_ndarray(image, format='rgb24')):
+                container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+
+# --- Benchmark ---
+
+def _time(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def run(frames, width, height, gop, spec):
+    with tempfile.TemporaryDirectory() as directory:
+        cover_path = os.path.join(directory, 'cover.mp4')
+        make_cover_video(cover_path, frames, width, height, gop)
+        with open(cover_path, 'rb') as f:
+            cover = f.read()
+
+    message = "benchmark message " * 1000
+    print(f"cover: {frames} frames {width}x{height}, GOP {gop}, {len(cover) / (1 << 20):.2f} MB, frames '{spec}'")
+    print(f"{'mode':>12} {'encode':>10} {'decode':>10} {'output':>12}")
+    for name, passthrough in (("ffv1", False), ("passthrough", True)):
+        stego, encode_time = _time(video_steg.encode_message_in_video, cover, message, spec,
+                                   key="benchmark", passthrough=passthrough)
+        decoded, decode_time = _time(video_steg.decode_message_from_video, stego, spec, key="benchmark")
+        assert decoded == message
+        print(f"{name:>12} {encode_time:9.2f}s {decode_time:9.2f}s {len(stego) / (1 << 20):9.2f} MB")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--size", default="640x360", help="Frame size as WIDTHxHEIGHT.")
+    parser.add_argument("--gop", type=int, default=30, help="Keyframe interval of the cover video.")
+    parser.add_argument("--spec", default="100", help="Frame spec to embed the message in.")
+    args = parser.parse_args()
+    width, height = (int(value) for value in args.size.lower().split("x"))
+    run(args.frames, width, height, args.gop, args.spec)
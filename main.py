@@ -1,5 +1,6 @@
 # main.py
-from steganography_tool import image_steg, text_steg, audio_steg, video_steg
+import sys
+from steganography_tool import image_steg, text_steg, audio_steg, video_steg, cli
 
 def main():
     print("\t\t STEGANOGRAPHY")
@@ -26,4 +27,7 @@ def main():
             print("Incorrect Choice")
 
 if __name__ == "__main__":
+    # With arguments, run the non-interactive batch commands (see steganography_tool/cli.py)
+    if len(sys.argv) > 1:
+        sys.exit(cli.main(sys.argv[1:]))
     main()
\ No newline at end of file
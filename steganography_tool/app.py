@@ -3,8 +3,7 @@ import os
 import streamlit as st
 from PIL import Image
 import numpy as np
-import cv2
-import io
+import tempfile
 
 # --- FORCE PARENT DIRECTORY ONTO PATH ---
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -12,7 +11,7 @@ parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
 # -----------------------------------------
 
-from steganography_tool import image_steg, text_steg, audio_steg, video_steg
+from steganography_tool import image_steg, text_steg, audio_steg, video_steg, video_remux
 
 # --- PAGE CONFIG ---
 st.set_page_config(
@@ -22,6 +21,24 @@ st.set_page_config(
 )
 
 
+# --- HELPERS ---
+def secret_input(prefix):
+    """Message text area plus an optional file to hide instead; the file is passed on as a zero-copy buffer."""
+    message = st.text_area("Enter the secret message:", key=f"{prefix}_enc_msg")
+    secret_file = st.file_uploader("...or choose a file to hide (optional):", key=f"{prefix}_enc_payload")
+    return secret_file.getbuffer() if secret_file is not None else message
+
+def show_decoded(decoded_message, key):
+    """Shows a decoded text message, or offers a hidden file for download."""
+    with st.expander("✅ Success! Click to see results", expanded=True):
+        if isinstance(decoded_message, bytes):
+            st.write(f"The hidden data is a binary file of {len(decoded_message):,} bytes.")
+            st.download_button(label="Download Hidden File", data=decoded_message, file_name="hidden.bin",
+                               mime="application/octet-stream", key=key)
+        else:
+            st.text_area("Decoded Message", value=decoded_message, height=200, key=key)
+
+
 # --- SIDEBAR ---
 st.title("# DataVeil 🔏")
 with st.sidebar:
@@ -41,49 +58,52 @@ if tool == "Image Steganography":
 
     with col1:
         st.subheader("Encode a Message")
-        uploaded_file = st.file_uploader("Choose a cover image...", type=["png", "jpg", "jpeg"], key="img_enc_file")
-        secret_message = st.text_area("Enter the secret message:", key="img_enc_msg")
+        uploaded_file = st.file_uploader("Choose a cover image...", type=["png", "jpg", "jpeg", "webp", "tif", "tiff"], key="img_enc_file")
+        secret_message = secret_input("img")
+        img_key = st.text_input("Encryption Key (optional):", type="password", key="img_enc_key", help="If set, the message is encrypted and the same key is needed to decode it.")
+        img_format = st.selectbox("Output format:", list(image_steg.IMAGE_OUTPUT_FORMATS), key="img_enc_format",
+                                  help="All three are lossless; WebP files are usually the smallest.")
 
         if st.button("Encode Message", key="img_enc_btn") and uploaded_file is not None and secret_message:
             with st.spinner('Encoding your message... Please wait.'):
-                pil_image = Image.open(uploaded_file).convert('RGB')
-                cover_image = np.array(pil_image)
-                cover_image_bgr = cv2.cvtColor(cover_image, cv2.COLOR_RGB2BGR)
+                pil_image = Image.open(uploaded_file)
+                if pil_image.mode != 'RGB':
+                    pil_image = pil_image.convert('RGB')
+                # Pillow decodes to RGB, so the array is embedded in that order instead of being converted to BGR
+                cover_image = np.asarray(pil_image)
                 try:
-                    stego_image_data = image_steg.encode_message_in_image(cover_image_bgr, secret_message)
-                    stego_image_rgb = cv2.cvtColor(stego_image_data, cv2.COLOR_BGR2RGB)
-                    pil_stego_image = Image.fromarray(stego_image_rgb)
-                    buf = io.BytesIO()
-                    pil_stego_image.save(buf, format="PNG")
-                    byte_im = buf.getvalue()
-                    
+                    stego_image_data = image_steg.encode_message_in_image(cover_image, secret_message, key=img_key or None,
+                                                                          channel_order='RGB')
+                    byte_im = image_steg.encode_image(stego_image_data, img_format, channel_order='RGB')
+
                     with st.expander("✅ Success! Click to see results", expanded=True):
-                        st.image(pil_stego_image, caption="Stego Image Preview")
+                        st.image(stego_image_data, caption="Stego Image Preview")
                         st.download_button(
                             label="Download Stego Image",
                             data=byte_im,
-                            file_name="stego_image.png",
-                            mime="image/png"
+                            file_name=f"stego_image.{img_format}",
+                            mime=f"image/{img_format}"
                         )
                 except ValueError as e:
                     st.error(e)
 
     with col2:
         st.subheader("Decode a Message")
-        uploaded_file_dec = st.file_uploader("Choose a stego image to decode...", type=["png", "jpg", "jpeg"], key="img_dec_file")
+        uploaded_file_dec = st.file_uploader("Choose a stego image to decode...", type=["png", "jpg", "jpeg", "webp", "tif", "tiff"], key="img_dec_file")
+        img_key_dec = st.text_input("Encryption Key (if one was used):", type="password", key="img_dec_key")
 
         if st.button("Decode Message", key="img_dec_btn") and uploaded_file_dec is not None:
             with st.spinner('Decoding your message...'):
-                pil_image = Image.open(uploaded_file_dec).convert('RGB')
-                stego_image = np.array(pil_image)
-                stego_image_bgr = cv2.cvtColor(stego_image, cv2.COLOR_RGB2BGR)
-                decoded_message = image_steg.decode_message_from_image(stego_image_bgr)
-                
-                if decoded_message:
-                    with st.expander("✅ Success! Click to see results", expanded=True):
-                        st.text_area("Decoded Message", value=decoded_message, height=200, key="img_dec_msg")
-                else:
-                    st.warning("No hidden message was found in the image.")
+                try:
+                    # Only the rows that hold the message are decoded
+                    decoded_message = image_steg.decode_image_file(uploaded_file_dec, key=img_key_dec or None)
+
+                    if decoded_message:
+                        show_decoded(decoded_message, "img_dec_msg")
+                    else:
+                        st.warning("No hidden message was found in the image.")
+                except ValueError as e:
+                    st.error(e)
 
 # --- TEXT STEGANOGRAPHY ---
 elif tool == "Text Steganography":
@@ -95,13 +115,14 @@ elif tool == "Text Steganography":
     with col1:
         st.subheader("Encode a Message")
         uploaded_file = st.file_uploader("Choose a cover text file (.txt)...", type=["txt"], key="txt_enc_file")
-        secret_message = st.text_area("Enter the secret message:", key="txt_enc_msg")
+        secret_message = secret_input("txt")
+        txt_key = st.text_input("Encryption Key (optional):", type="password", key="txt_enc_key", help="If set, the message is encrypted and the same key is needed to decode it.")
 
         if st.button("Encode Message", key="txt_enc_btn") and uploaded_file is not None and secret_message:
             with st.spinner('Encoding your message...'):
                 try:
                     cover_text = uploaded_file.getvalue().decode("utf-8")
-                    stego_text = text_steg.encode_message_in_text(cover_text, secret_message)
+                    stego_text = text_steg.encode_message_in_text(cover_text, secret_message, key=txt_key or None)
                     
                     with st.expander("✅ Success! Click to see results", expanded=True):
                         st.text_area("Stego Text (copy this or download)", value=stego_text, height=300, key="txt_stego_text")
@@ -119,18 +140,20 @@ elif tool == "Text Steganography":
     with col2:
         st.subheader("Decode a Message")
         uploaded_file_dec = st.file_uploader("Choose a stego text file to decode...", type=["txt"], key="txt_dec_file")
+        txt_key_dec = st.text_input("Encryption Key (if one was used):", type="password", key="txt_dec_key")
 
         if st.button("Decode Message", key="txt_dec_btn") and uploaded_file_dec is not None:
             with st.spinner('Decoding your message...'):
                 try:
                     stego_text = uploaded_file_dec.getvalue().decode("utf-8")
-                    decoded_message = text_steg.decode_message_from_text(stego_text)
+                    decoded_message = text_steg.decode_message_from_text(stego_text, key=txt_key_dec or None)
                     
                     if decoded_message:
-                        with st.expander("✅ Success! Click to see results", expanded=True):
-                            st.text_area("Decoded Message", value=decoded_message, height=200, key="txt_dec_msg")
+                        show_decoded(decoded_message, "txt_dec_msg")
                     else:
                         st.warning("No hidden message was found in the text.")
+                except ValueError as e:
+                    st.error(e)
                 except Exception as e:
                     st.error(f"An unexpected error occurred: {e}")
 
@@ -144,13 +167,14 @@ elif tool == "Audio Steganography":
     with col1:
         st.subheader("Encode a Message")
         uploaded_file = st.file_uploader("Choose a cover audio file (.wav)...", type=["wav"], key="aud_enc_file")
-        secret_message = st.text_area("Enter the secret message:", key="aud_enc_msg")
+        secret_message = secret_input("aud")
+        aud_key = st.text_input("Encryption Key (optional):", type="password", key="aud_enc_key", help="If set, the message is encrypted and the same key is needed to decode it.")
 
         if st.button("Encode Message", key="aud_enc_btn") and uploaded_file is not None and secret_message:
             with st.spinner('Encoding your message... This may take a moment.'):
                 try:
                     audio_bytes = uploaded_file.getvalue()
-                    stego_audio_bytes = audio_steg.encode_message_in_audio(audio_bytes, secret_message)
+                    stego_audio_bytes = audio_steg.encode_message_in_audio(audio_bytes, secret_message, key=aud_key or None)
                     
                     with st.expander("✅ Success! Click to see results", expanded=True):
                         st.write("Listen to the stego audio (it should sound identical):")
@@ -169,16 +193,16 @@ elif tool == "Audio Steganography":
     with col2:
         st.subheader("Decode a Message")
         uploaded_file_dec = st.file_uploader("Choose a stego audio file to decode...", type=["wav"], key="aud_dec_file")
+        aud_key_dec = st.text_input("Encryption Key (if one was used):", type="password", key="aud_dec_key")
 
         if st.button("Decode Message", key="aud_dec_btn") and uploaded_file_dec is not None:
             with st.spinner('Decoding your message...'):
                 try:
                     audio_bytes = uploaded_file_dec.getvalue()
-                    decoded_message = audio_steg.decode_message_from_audio(audio_bytes)
+                    decoded_message = audio_steg.decode_message_from_audio(audio_bytes, key=aud_key_dec or None)
                     
                     if decoded_message:
-                        with st.expander("✅ Success! Click to see results", expanded=True):
-                            st.text_area("Decoded Message", value=decoded_message, height=200, key="aud_dec_msg")
+                        show_decoded(decoded_message, "aud_dec_msg")
                     else:
                         st.warning("No hidden message was found in the audio.")
                 except ValueError as e:
@@ -197,24 +221,32 @@ elif tool == "Video Steganography":
     with col1:
         st.subheader("Encode a Message")
         uploaded_file = st.file_uploader("Choose a cover video file (.mp4, .avi)...", type=["mp4", "avi"], key="vid_enc_file")
-        secret_message = st.text_area("Enter the secret message:", key="vid_enc_msg")
+        secret_message = secret_input("vid")
         frame_number = st.number_input("Enter Frame Number to hide data in:", min_value=0, step=1, key="vid_frame", help="The message will be hidden in this *single* frame. You must use the same number to decode.")
+        frame_spec = st.text_input("Frames to spread the message over (optional):", key="vid_frame_spec", help="e.g. 10-50, 0:300:10 or random:20. Overrides the frame number; use the same spec to decode.")
         encryption_key = st.text_input("Enter Encryption Key:", type="password", key="vid_enc_key", help="Your password. You *must* use the same key to decode.")
+        passthrough = st.checkbox("Keep the original video stream (H.264 only, much smaller output)", key="vid_passthrough",
+                                  disabled=not video_remux.is_available(),
+                                  help="Copies untouched frames as they are and re-encodes only the keyframe groups that hold the message. Needs PyAV.")
 
         if st.button("Encode Message", key="vid_enc_btn") and all([uploaded_file, secret_message, encryption_key]):
             with st.spinner('Encoding your message... This will take a long time.'):
                 try:
-                    video_bytes = uploaded_file.getvalue()
-                    stego_video_bytes = video_steg.encode_message_in_video(video_bytes, secret_message, frame_number, encryption_key)
+                    extension, mime = ("mkv", "video/x-matroska") if passthrough else ("avi", "video/x-msvideo")
+                    # Encode straight from the upload into a file, without extra in-memory copies
+                    with tempfile.TemporaryDirectory() as out_dir:
+                        out_path = os.path.join(out_dir, f"stego_video.{extension}")
+                        video_steg.encode_video_file(uploaded_file, out_path, secret_message, frame_spec or frame_number, encryption_key, passthrough=passthrough)
                     
-                    with st.expander("✅ Success! Click to see results", expanded=True):
-                        st.write("The new video file is ready for download:")
-                        st.download_button(
-                            label="Download Stego Video (.avi)",
-                            data=stego_video_bytes,
-                            file_name="stego_video.avi",
-                            mime="video/x-msvideo"
-                        )
+                        with st.expander("✅ Success! Click to see results", expanded=True):
+                            st.write("The new video file is ready for download:")
+                            with open(out_path, 'rb') as stego_file:
+                                st.download_button(
+                                    label=f"Download Stego Video (.{extension})",
+                                    data=stego_file,
+                                    file_name=f"stego_video.{extension}",
+                                    mime=mime
+                                )
                 except ValueError as e:
                     st.error(e)
                 except Exception as e:
@@ -222,19 +254,18 @@ elif tool == "Video Steganography":
 
     with col2:
         st.subheader("Decode a Message")
-        uploaded_file_dec = st.file_uploader("Choose a stego video file to decode...", type=["mp4", "avi"], key="vid_dec_file")
+        uploaded_file_dec = st.file_uploader("Choose a stego video file to decode...", type=["mp4", "avi", "mkv"], key="vid_dec_file")
         frame_number_dec = st.number_input("Enter Frame Number to extract data from:", min_value=0, step=1, key="vid_dec_frame", help="The exact frame number where the data was hidden.")
+        frame_spec_dec = st.text_input("Frames the message was spread over (optional):", key="vid_dec_frame_spec", help="The same frame spec used when encoding. Overrides the frame number.")
         encryption_key_dec = st.text_input("Enter Encryption Key:", type="password", key="vid_dec_key", help="The password used during encoding.")
 
         if st.button("Decode Message", key="vid_dec_btn") and all([uploaded_file_dec, encryption_key_dec]):
             with st.spinner('Decoding your message...'):
                 try:
-                    video_bytes = uploaded_file_dec.getvalue()
-                    decoded_message = video_steg.decode_message_from_video(video_bytes, frame_number_dec, encryption_key_dec)
+                    decoded_message = video_steg.decode_video_file(uploaded_file_dec, frame_spec_dec or frame_number_dec, encryption_key_dec)
                     
                     if decoded_message:
-                        with st.expander("✅ Success! Click to see results", expanded=True):
-                            st.text_area("Decoded Message", value=decoded_message, height=200, key="vid_dec_msg")
+                        show_decoded(decoded_message, "vid_dec_msg")
                     else:
                         st.warning("No hidden message was found in that frame. (Check your frame number and key).")
                 except ValueError as e:
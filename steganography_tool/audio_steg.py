@@ -1,83 +1,416 @@
 # steganography_tool/audio_steg.py
-import wave
 import io
+import os
+import shutil
+import struct
+from dataclasses import dataclass
+import numpy as np
+from . import payload, scatter_utils, utils
+
+try:
+    # soundfile (libsndfile) is optional; it adds FLAC covers
+    import soundfile
+except ImportError:
+    soundfile = None
+
+# WAV encodings whose samples can carry data: integer PCM and IEEE float, plain or in an extensible fmt chunk
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+# format tag, channels, sample rate, byte rate, block align, bits per sample
+_FMT_FORMAT = '<HHIIHH'
+_SAMPLE_WIDTHS = {WAVE_FORMAT_PCM: (1, 2, 3, 4), WAVE_FORMAT_IEEE_FLOAT: (4, 8)}
+
+@dataclass
+class WavInfo:
+    """What the carrier needs from the fmt and data chunks of a WAV."""
+    format_tag: int # WAVE_FORMAT_PCM or WAVE_FORMAT_IEEE_FLOAT
+    channels: int
+    sample_rate: int
+    sample_width: int # Bytes per sample of one channel
+    data_offset: int
+    data_size: int # Bytes of whole frames in the data chunk
+
+    @property
+    def n_samples(self):
+        """Samples over all channels; every sample carries data in its least-significant byte."""
+        return self.data_size // self.sample_width
+
+def _parse_fmt(raw):
+    """Returns (format tag, channels, sample rate, sample width) from a fmt chunk."""
+    if len(raw) < struct.calcsize(_FMT_FORMAT):
+        raise ValueError("Error processing audio file. The .wav format chunk is truncated.")
+    format_tag, channels, sample_rate, _, block_align, _ = struct.unpack_from(_FMT_FORMAT, raw)
+    if format_tag == WAVE_FORMAT_EXTENSIBLE and len(raw) >= 26:
+        # The actual encoding is in the first two bytes of the sub-format GUID
+        format_tag = struct.unpack_from('<H', raw, 24)[0]
+    sample_width = block_align // channels if channels else 0
+    if sample_width not in _SAMPLE_WIDTHS.get(format_tag, ()) or block_align != sample_width * channels:
+        raise ValueError(f"Error processing audio file. Unsupported .wav encoding "
+                         f"(format {format_tag:#06x}, {sample_width * 8}-bit samples).")
+    return format_tag, channels, sample_rate, sample_width
+
+def read_wav_info(source):
+    """Reads the format and the sample data position of a WAV (path, seekable binary file or bytes).
+
+    Only the chunk headers and the fmt chunk are read, so this is cheap for files of any size.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        # Read in place; a file object over the buffer would copy all of it
+        view = memoryview(source).cast('B')
+        return _read_wav_info(lambda position, size: bytes(view[position:position + size]), len(view))
+    with utils.open_binary(source) as f:
+        def read_at(position, size):
+            f.seek(position)
+            return f.read(size)
+        return _read_wav_info(read_at, f.seek(0, io.SEEK_END))
+
+def _read_wav_info(read_at, total):
+    riff = read_at(0, 12)
+    if len(riff) < 12 or riff[0:4] != b'RIFF' or riff[8:12] != b'WAVE':
+        raise ValueError("Error processing audio file. Is it a valid .wav file?")
+    fmt = None
+    position = 12
+    while position + 8 <= total:
+        chunk_header = read_at(position, 8)
+        chunk_id = chunk_header[:4]
+        chunk_size = int.from_bytes(chunk_header[4:], 'little')
+        if chunk_id == b'fmt ':
+            fmt = _parse_fmt(read_at(position + 8, chunk_size))
+        elif chunk_id == b'data':
+            if fmt is None:
+                raise ValueError("Error processing audio file. The .wav file has no format chunk before its data.")
+            size = min(chunk_size, total - position - 8)
+            return WavInfo(*fmt, position + 8, size - size % (fmt[1] * fmt[3]))
+        position += 8 + chunk_size + (chunk_size & 1)  # Chunks are padded to an even size
+    raise ValueError("Error processing audio file. No data chunk found in the .wav file.")
+
+def _sample_lsbs(frame_bytes, sample_width):
+    """Returns a strided view of the least-significant byte of every sample (WAV samples are little-endian)."""
+    return frame_bytes[::sample_width]
+
+def _carrier_strides(info):
+    """Carrier layouts to look for a payload in: the low byte of every sample, then every byte,
+    which is how versions before sample-aware embedding wrote WAVs."""
+    return (info.sample_width, 1) if info.sample_width > 1 else (1,)
+
+def _scattered_reader(info, frame_bytes, key):
+    """Returns a reader over the low byte of every sample in the key's scattered order."""
+    samples = _sample_lsbs(frame_bytes, info.sample_width)
+    return utils.lsb_reader(scatter_utils.ScatteredValues(samples, scatter_utils.Scatter(samples.size, key)))
+
+def _read_audio_payload(info, make_reader, key=None, get_frame_bytes=None):
+    """Reads (header, data) through make_reader(stride), trying each carrier layout in turn.
+
+    With a key, scatter mode over get_frame_bytes() is tried before the legacy layout.
+    """
+    *current, legacy = _carrier_strides(info)
+    for stride in current:
+        result = payload.read_payload(make_reader(stride))
+        if result is not None:
+            return result
+    if key is not None and get_frame_bytes is not None:
+        result = payload.read_payload(_scattered_reader(info, get_frame_bytes(), key))
+        if result is not None:
+            return result
+    return payload.read_any_payload(make_reader(legacy))
 
 # --- Core Logic for GUI ---
 
-def encode_message_in_audio(audio_bytes, secret_message):
-    """Hides a secret message in the LSB of audio bytes and returns new bytes."""
-    data = secret_message + '*^*^*'  # Delimiter
-    
-    try:
-        # Read the audio bytes from memory
-        with wave.open(io.BytesIO(audio_bytes), mode='rb') as song:
-            params = song.getparams()
-            frames = song.readframes(song.getnframes())
-            frame_list = list(frames)
-            frame_bytes = bytearray(frame_list)
-
-            # Convert secret data to bit array
-            result = []
-            for char in data:
-                bits = bin(ord(char))[2:].zfill(8)
-                result.extend([int(b) for b in bits])
-            
-            # Check if message will fit
-            if len(result) > len(frame_bytes):
-                raise ValueError("Error: Message is too large for this audio file.")
-
-            # Embed bits into LSB of each frame byte
-            j = 0
-            for i in range(len(result)):
-                frame_bytes[j] = (frame_bytes[j] & 254) | result[i]
-                j += 1
-            
-            frame_modified = bytes(frame_bytes)
-            
-            # Write the modified frames to an in-memory buffer
-            with io.BytesIO() as out_buffer:
-                with wave.open(out_buffer, 'wb') as fd:
-                    fd.setparams(params)
-                    fd.writeframes(frame_modified)
-                
-                return out_buffer.getvalue()
-
-    except wave.Error as e:
-        raise ValueError(f"Error processing audio file. Is it a valid .wav file? Error: {e}")
-    except Exception as e:
-        raise e
+def capacity(source, bits_per_sample=1, overhead=None):
+    """Returns how many message bytes a WAV can hold, reading only its chunk headers.
+
+    source is a path, a file object or the file bytes. overhead defaults to the unencrypted
+    payload header (see payload.overhead).
+    """
+    info = read_wav_info(source)
+    if overhead is None:
+        overhead = payload.overhead(bits_per_sample=bits_per_sample)
+    return utils.capacity_bytes(info.n_samples, bits_per_sample, overhead)
+
+def encode_message_in_audio(audio_bytes, secret_message, key=None, bits_per_sample=1, compression=None,
+                            scatter=False):
+    """Hides a secret message (encrypted if a key is given) in the least-significant byte of every audio sample.
+
+    Works for 8/16/24/32-bit PCM and 32/64-bit float WAVs with any number of channels and returns
+    new bytes. bits_per_sample (1-4) sets how many low bits of each sample carry the message;
+    compression names a codec from compress_utils to shrink the message first. With
+    scatter=True (needs a key) the message goes into key-seeded random samples instead of the first ones.
+    """
+    data = payload.build_message(secret_message, key=key, bits_per_sample=bits_per_sample,
+                                 compression=compression)
+    values = payload.sample_values(data, bits_per_sample)
+
+    info = read_wav_info(audio_bytes)
+
+    # Check if message will fit
+    if values.size > info.n_samples:
+        raise ValueError("Error: Message is too large for this audio file.")
+
+    # Only the samples that carry payload bits are copied and modified; scattered ones can be anywhere
+    end = info.data_offset + (info.data_size if scatter else values.size * info.sample_width)
+    modified = np.frombuffer(audio_bytes, dtype=np.uint8, count=end - info.data_offset, offset=info.data_offset).copy()
+    samples = _sample_lsbs(modified, info.sample_width)
+    if scatter:
+        scatter_utils.embed(samples, values, scatter_utils.Scatter(samples.size, key), bits_per_sample=bits_per_sample)
+    else:
+        utils.embed_lsb(samples, values, bits_per_sample=bits_per_sample)
+
+    # Everything else is copied through once, straight into the output
+    source = memoryview(audio_bytes)
+    return b''.join((source[:info.data_offset], modified, source[end:]))
+
+def decode_message_from_audio(audio_bytes, key=None):
+    """Extracts a secret message from the low bits of audio samples; with a key, scattered messages are found too."""
+    info = read_wav_info(audio_bytes)
+    frame_bytes = np.frombuffer(audio_bytes, dtype=np.uint8, count=info.data_size, offset=info.data_offset)
+
+    # Only the bits of the header and payload are unpacked
+    header, data = _read_audio_payload(info, lambda stride: utils.lsb_reader(frame_bytes[::stride]), key,
+                                       lambda: frame_bytes)
+    if data is None:
+        return None # No message found
+    return payload.decode_message(header, data, key)
+
+
+# --- Streaming API for files of any length ---
+
+# Frames read per step; memory use is bounded by this, not by the file length
+STREAM_CHUNK_FRAMES = 1 << 16
+
+def _iter_frame_chunks(f, info, chunk_frames, stride=1):
+    """Yields every stride-th byte of the sample data of an open WAV as flat uint8 arrays, one chunk at a time."""
+    f.seek(info.data_offset)
+    remaining = info.data_size
+    # Whole frames per chunk, so every chunk starts at a sample boundary
+    chunk_bytes = chunk_frames * info.channels * info.sample_width
+    while remaining > 0:
+        block = f.read(min(chunk_bytes, remaining))
+        if not block:
+            return
+        remaining -= len(block)
+        yield np.frombuffer(block, dtype=np.uint8)[::stride]
+
+def _embed_streaming(source, destination, value_count, get_values, chunk_frames, bits_per_sample=1):
+    """Copies a WAV from source to destination, embedding get_values(start, count) chunk by chunk.
+
+    Every chunk before and after the sample data is copied unchanged.
+    """
+    with utils.open_binary(source) as src:
+        info = read_wav_info(src)
+        if value_count > info.n_samples:
+            raise ValueError("Error: Message is too large for this audio file.")
 
-def decode_message_from_audio(audio_bytes):
-    """Extracts a secret message from the LSB of audio bytes."""
-    delimiter = "*^*^*"
+        with utils.open_binary(destination, 'wb') as dst:
+            src.seek(0)
+            dst.write(src.read(info.data_offset))
+            embedded = 0
+            for chunk in _iter_frame_chunks(src, info, chunk_frames):
+                # Chunks past the payload are copied through unchanged
+                if embedded < value_count:
+                    chunk = chunk.copy()
+                    samples = _sample_lsbs(chunk, info.sample_width)
+                    values = get_values(embedded, min(samples.size, value_count - embedded))
+                    utils.embed_lsb(samples, values, bits_per_sample=bits_per_sample)
+                    embedded += values.size
+                dst.write(chunk)
+            src.seek(info.data_offset + info.data_size)
+            shutil.copyfileobj(src, dst)
+
+def encode_audio_file(source, destination, secret_message, chunk_frames=STREAM_CHUNK_FRAMES, key=None, bits_per_sample=1,
+                      compression=None):
+    """Hides a secret message while streaming a WAV from source to destination (paths or file objects)."""
+    data = payload.build_message(secret_message, key=key, bits_per_sample=bits_per_sample,
+                                 compression=compression)
+    values = payload.sample_values(data, bits_per_sample)
+    _embed_streaming(source, destination, values.size, lambda start, count: values[start:start + count],
+                     chunk_frames, bits_per_sample)
+
+def _sample_data(f, info):
+    """Maps the sample data of an open WAV for random access, or reads it if the file cannot be mapped."""
     try:
-        with wave.open(io.BytesIO(audio_bytes), mode='rb') as song:
-            frames = song.readframes(song.getnframes())
-            frame_bytes = bytearray(list(frames))
+        return np.memmap(f, dtype=np.uint8, mode='r', offset=info.data_offset, shape=(info.data_size,))
+    except (AttributeError, OSError, ValueError):
+        f.seek(info.data_offset)
+        return np.frombuffer(f.read(info.data_size), dtype=np.uint8)
 
-            extracted_bits = ""
-            for i in range(len(frame_bytes)):
-                extracted_bits += str(frame_bytes[i] & 1)
+def _chunk_reader(f, info, chunk_frames):
+    """Returns make_reader(stride) for _read_audio_payload over an open WAV."""
+    return lambda stride: utils.chunked_lsb_reader(_iter_frame_chunks(f, info, chunk_frames, stride))
 
-            all_bytes = [extracted_bits[i: i+8] for i in range(0, len(extracted_bits), 8)]
-            
-            decoded_data = ""
-            for byte in all_bytes:
-                if len(byte) == 8:
-                    try:
-                        decoded_data += chr(int(byte, 2))
-                    except ValueError:
-                        pass # Ignore non-ASCII bytes
-                    
-                    if decoded_data.endswith(delimiter):
-                        return decoded_data[:-len(delimiter)]
-        
-        return None # No delimiter found
+def decode_audio_file(source, chunk_frames=STREAM_CHUNK_FRAMES, key=None):
+    """Extracts a secret message from a WAV (path or file object), reading only as many chunks as needed."""
+    with utils.open_binary(source) as f:
+        info = read_wav_info(f)
+        # Scattered payloads are read through a memory map; they can be anywhere in the file
+        header, data = _read_audio_payload(info, _chunk_reader(f, info, chunk_frames), key,
+                                           lambda: _sample_data(f, info))
 
-    except wave.Error as e:
-        raise ValueError(f"Error processing audio file. Is it a valid .wav file? Error: {e}")
-    except Exception as e:
-        raise e
+    if data is None:
+        return None # No message found
+    return payload.decode_message(header, data, key)
+
+def embed_file(cover_path, secret_path, out_path, key=None, bits_per_sample=1, compression=None,
+               chunk_frames=STREAM_CHUNK_FRAMES):
+    """Hides a whole file in a WAV without loading either into memory.
+
+    The secret is compressed and encrypted block by block into a temporary file, which is then
+    embedded while the cover streams to out_path. Encryption uses aes-256-gcm.
+    """
+    if compression is None and os.path.getsize(secret_path) > capacity(cover_path, bits_per_sample, payload.overhead(
+            key is not None, bits_per_sample=bits_per_sample)):
+        raise ValueError("Error: Message is too large for this audio file.")
+    with payload.stage_payload(secret_path, key=key, bits_per_sample=bits_per_sample, compression=compression) as staged:
+        _embed_streaming(cover_path, out_path, staged.value_count, staged.values, chunk_frames, bits_per_sample)
+
+def extract_file(source, out_path, key=None, chunk_frames=STREAM_CHUNK_FRAMES):
+    """Writes the payload hidden in a WAV to out_path incrementally. Returns its size, or None if there is none."""
+    with utils.open_binary(source) as f:
+        info = read_wav_info(f)
+        make_reader = _chunk_reader(f, info, chunk_frames)
+        for stride in _carrier_strides(info):
+            size = payload.extract_to_file(make_reader(stride), out_path, key)
+            if size is not None:
+                return size
+        if key is not None:
+            return payload.extract_to_file(_scattered_reader(info, _sample_data(f, info), key), out_path, key)
+    return None
+
+
+# --- Memory-mapped API for WAV files on disk ---
+
+# Values embedded per step when a staged payload is written through a memory map
+MAPPED_CHUNK_VALUES = 1 << 22
+
+def map_frames(path, writable=False):
+    """Maps the sample data of a WAV file on disk as a flat uint8 array without reading it; returns (info, frames).
+
+    Only the pages that are actually indexed are read (or, with writable, written back).
+    """
+    info = read_wav_info(path)
+    if info.data_size == 0:
+        return info, np.empty(0, dtype=np.uint8) # mmap cannot map zero bytes
+    return info, np.memmap(path, dtype=np.uint8, mode='r+' if writable else 'r', offset=info.data_offset,
+                           shape=(info.data_size,))
+
+def _copy_file(source, destination):
+    """Copies a file inside the kernel; on filesystems with reflinks (Btrfs, XFS) the data blocks are shared, not copied."""
+    if not hasattr(os, 'copy_file_range'):
+        shutil.copyfile(source, destination)
+        return
+    with open(source, 'rb') as src, open(destination, 'wb') as dst:
+        remaining = os.fstat(src.fileno()).st_size
+        try:
+            while remaining > 0:
+                copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+        except OSError:
+            remaining = -1 # Not supported between these files
+    if remaining:
+        shutil.copyfile(source, destination)
+
+def _embed_mapped(source, destination, value_count, get_values, bits_per_sample=1, chunk_values=MAPPED_CHUNK_VALUES,
+                  scatter=False, key=None):
+    """Embeds get_values(start, count) into a WAV through a writable memory map.
+
+    With a destination the source is copied first and left untouched; otherwise it is changed in place.
+    With scatter, the values go to the key-seeded positions of scatter mode.
+    """
+    info, frames = map_frames(source)
+    if value_count > info.n_samples:
+        raise ValueError("Error: Message is too large for this audio file.")
+    scattering = scatter_utils.Scatter(_sample_lsbs(frames, info.sample_width).size, key) if scatter else None
+    if destination is not None and os.path.abspath(destination) != os.path.abspath(source):
+        _copy_file(source, destination)
+        source = destination
+    info, frames = map_frames(source, writable=True)
+    samples = _sample_lsbs(frames, info.sample_width)
+    for start in range(0, value_count, chunk_values):
+        values = get_values(start, min(chunk_values, value_count - start))
+        if scattering is not None:
+            scatter_utils.embed(samples, values, scattering, start, bits_per_sample)
+        else:
+            utils.embed_lsb(samples, values, start, bits_per_sample)
+    frames.flush()
+
+def encode_audio_mapped(source, destination, secret_message, key=None, bits_per_sample=1, compression=None,
+                        scatter=False):
+    """Hides a secret message in a WAV file on disk, writing only the pages that hold payload bits.
+
+    destination None (or the source path) changes the source in place; any other path gets a copy.
+    scatter=True (needs a key) spreads the message over key-seeded random samples.
+    """
+    data = payload.build_message(secret_message, key=key, bits_per_sample=bits_per_sample,
+                                 compression=compression)
+    values = payload.sample_values(data, bits_per_sample)
+    _embed_mapped(source, destination, values.size, lambda start, count: values[start:start + count], bits_per_sample,
+                  scatter=scatter, key=key)
+
+def decode_audio_mapped(source, key=None):
+    """Extracts a secret message from a WAV file on disk, reading only the pages that hold the payload."""
+    info, frames = map_frames(source)
+    header, data = _read_audio_payload(info, lambda stride: utils.lsb_reader(frames[::stride]), key, lambda: frames)
+    if data is None:
+        return None # No message found
+    return payload.decode_message(header, data, key)
+
+def embed_file_mapped(cover_path, secret_path, out_path=None, key=None, bits_per_sample=1, compression=None,
+                      scatter=False):
+    """Hides a whole file in a WAV on disk through a memory map; like embed_file, but in place when out_path is None.
+
+    scatter=True (needs a key) spreads the file over key-seeded random samples.
+    """
+    if compression is None and os.path.getsize(secret_path) > capacity(cover_path, bits_per_sample, payload.overhead(
+            key is not None, bits_per_sample=bits_per_sample)):
+        raise ValueError("Error: Message is too large for this audio file.")
+    with payload.stage_payload(secret_path, key=key, bits_per_sample=bits_per_sample, compression=compression) as staged:
+        _embed_mapped(cover_path, out_path, staged.value_count, staged.values, bits_per_sample, scatter=scatter, key=key)
+
+
+# --- FLAC covers (needs the optional soundfile package) ---
+
+# libsndfile subtypes FLAC can hold, and their bits per sample
+_FLAC_BITS = {'PCM_S8': 8, 'PCM_16': 16, 'PCM_24': 24}
+
+def _read_flac(path):
+    """Decodes a FLAC file to integer samples at their stored width; returns (samples, rate, subtype, bits)."""
+    if soundfile is None:
+        raise ValueError("Error: FLAC files need the soundfile package (pip install soundfile).")
+    subtype = soundfile.info(path).subtype
+    if subtype not in _FLAC_BITS:
+        raise ValueError(f"Error processing audio file. Unsupported FLAC sample format {subtype}.")
+    # libsndfile scales every integer format to the full int32 range
+    samples, rate = soundfile.read(path, dtype='int32', always_2d=True)
+    return samples >> (32 - _FLAC_BITS[subtype]), rate, subtype, _FLAC_BITS[subtype]
+
+def encode_flac_file(source, destination, secret_message, key=None, bits_per_sample=1, compression=None):
+    """Hides a secret message in the least-significant byte of every sample of a FLAC file.
+
+    FLAC is lossless, so the samples written to destination decode back exactly.
+    """
+    data = payload.build_message(secret_message, key=key, bits_per_sample=bits_per_sample,
+                                 compression=compression)
+    values = payload.sample_values(data, bits_per_sample)
+    samples, rate, subtype, bits = _read_flac(source)
+    # Frames are flattened channel-interleaved, the same order as WAV data
+    flat = samples.reshape(-1)
+    if values.size > flat.size:
+        raise ValueError("Error: Message is too large for this audio file.")
+    low = (flat[:values.size] & 0xFF).astype(np.uint8)
+    utils.embed_lsb(low, values, bits_per_sample=bits_per_sample)
+    flat[:values.size] = (flat[:values.size] & ~0xFF) | low
+    soundfile.write(destination, samples << (32 - bits), rate, subtype=subtype, format='FLAC')
+
+def decode_flac_file(source, key=None):
+    """Extracts a secret message from the low bits of the samples of a FLAC file."""
+    samples = _read_flac(source)[0]
+    low = (samples.reshape(-1) & 0xFF).astype(np.uint8)
+    header, data = payload.read_any_payload(utils.lsb_reader(low))
+    if data is None:
+        return None # No message found
+    return payload.decode_message(header, data, key)
 
 
 # --- Functions for Command-Line Interface ---
@@ -86,16 +419,10 @@ def _encode_aud_data_cli():
     """Handles encoding via CLI."""
     try:
         nameoffile = input("Enter name of the audio file (with .wav extension): ")
-        with open(nameoffile, 'rb') as f:
-            audio_bytes = f.read()
-            
         data = input("\nEnter the secret message: ")
         stegofile = input("\nEnter name of the new stego audio file (with .wav extension): ")
 
-        modified_bytes = encode_message_in_audio(audio_bytes, data)
-        
-        with open(stegofile, 'wb') as fd:
-            fd.write(modified_bytes)
+        encode_audio_file(nameoffile, stegofile, data)
             
         print("\nData encoded successfully.")
 
@@ -108,10 +435,7 @@ def _decode_aud_data_cli():
     """Handles decoding via CLI."""
     try:
         nameoffile = input("Enter name of the audio file to be decoded: ")
-        with open(nameoffile, 'rb') as f:
-            audio_bytes = f.read()
-
-        decoded_message = decode_message_from_audio(audio_bytes)
+        decoded_message = decode_audio_file(nameoffile)
         
         if decoded_message:
             print("The hidden data was: ", decoded_message)
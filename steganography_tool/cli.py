@@ -0,0 +1,392 @@
+# steganography_tool/cli.py
+"""Non-interactive batch command line: `python -m steganography_tool encode|decode|capacity ...`.
+
+Inputs are paths, glob patterns or @manifest files (one path or pattern per line). The carrier
+module is picked from each file's extension and files are processed across a process pool.
+Every result is appended to an optional JSONL log; with --resume, files already logged as
+successful for the same command are skipped.
+"""
+import argparse
+import base64
+import contextlib
+import glob
+import io
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from . import audio_steg, compress_utils, image_steg, payload, text_steg, video_steg
+
+IMAGE_EXTENSIONS = ('.png', '.bmp', '.tif', '.tiff', '.jpg', '.jpeg', '.webp')
+AUDIO_EXTENSIONS = ('.wav',)
+TEXT_EXTENSIONS = ('.txt',)
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov')
+
+def carrier_type(path):
+    """Returns 'image', 'audio', 'text' or 'video' for a file, based on its extension."""
+    extension = os.path.splitext(path)[1].lower()
+    for kind, extensions in (("image", IMAGE_EXTENSIONS), ("audio", AUDIO_EXTENSIONS),
+                             ("text", TEXT_EXTENSIONS), ("video", VIDEO_EXTENSIONS)):
+        if extension in extensions:
+            return kind
+    raise ValueError(f"Error: Unsupported file type '{extension}'.")
+
+def expand_inputs(inputs):
+    """Expands paths, glob patterns and @manifest files into a sorted list of unique files."""
+    patterns = []
+    for item in inputs:
+        if item.startswith('@'):
+            with open(item[1:], 'r', encoding='utf-8') as manifest:
+                patterns.extend(line.strip() for line in manifest if line.strip() and not line.startswith('#'))
+        else:
+            patterns.append(item)
+
+    files = set()
+    for pattern in patterns:
+        matches = glob.glob(pattern, recursive=True) if glob.has_magic(pattern) else [pattern]
+        files.update(os.path.normpath(match) for match in matches if os.path.isfile(match))
+    return sorted(files)
+
+def input_root(files):
+    """Returns the deepest directory that holds every input; outputs mirror the paths below it."""
+    return os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in files])
+
+def _relative_path(path, root):
+    return os.path.relpath(os.path.abspath(path), root) if root else os.path.basename(path)
+
+def output_path(path, output_dir, passthrough=False, root=None):
+    """Returns where the stego file for `path` is written; lossy formats are replaced by lossless ones.
+
+    The path of the input below root (see input_root) is kept under output_dir, so inputs with
+    the same name in different directories do not overwrite each other; without a root only
+    the file name is kept.
+    """
+    stem, extension = os.path.splitext(_relative_path(path, root))
+    kind = carrier_type(path)
+    if kind == "image":
+        # WebP and TIFF covers keep their format; it is written losslessly either way
+        if extension.lower() not in ('.webp', '.tif', '.tiff'):
+            extension = ".png"
+    elif kind == "video":
+        extension = ".mkv" if passthrough else ".avi"
+    return os.path.join(output_dir, stem + extension)
+
+def payload_path(path, output_dir, root=None):
+    """Returns where decode writes the payload of `path` when given an output directory."""
+    return os.path.join(output_dir, _relative_path(path, root) + ".payload")
+
+def _destination(command, path, options):
+    """Returns the file a command writes for `path`, or None if it writes none."""
+    if command == "encode":
+        return output_path(path, options['output_dir'], options['passthrough'], options.get('input_root'))
+    if command == "decode" and options['output_dir']:
+        return payload_path(path, options['output_dir'], options.get('input_root'))
+    return None
+
+def _prepare_destination(path, destination):
+    """Creates the directory of an output file, refusing an output that is the input itself."""
+    if os.path.abspath(destination) == os.path.abspath(path) or (
+            os.path.exists(destination) and os.path.samefile(path, destination)):
+        raise ValueError(f"Error: The output file {destination} is the input file.")
+    os.makedirs(os.path.dirname(destination) or '.', exist_ok=True)
+
+# --- Per-file operations (run in worker processes) ---
+
+def _encode_file(path, options):
+    kind = carrier_type(path)
+    destination = _destination("encode", path, options)
+    _prepare_destination(path, destination)
+    message, key = options['message'], options['key']
+    if options['payload_file']:
+        if kind == "audio":
+            # Staged on disk and written through a memory map, so the payload file never has to fit in memory
+            audio_steg.embed_file_mapped(path, options['payload_file'], destination, key, options['bits_per_sample'],
+                                         options['compression'], options['scatter'])
+            return {"output": destination}
+        if kind == "video":
+            video_steg.embed_file(path, options['payload_file'], destination, options['frames'], key, workers=1,
+                                  passthrough=options['passthrough'], bits_per_sample=options['bits_per_sample'],
+                                  compression=options['compression'], scatter=options['scatter'])
+            return {"output": destination}
+        with open(options['payload_file'], 'rb') as f:
+            message = f.read()
+    if kind == "image":
+        image = image_steg.load_image(path) # Alpha and gray covers keep their channels
+        image_steg.save_image(image_steg.encode_message_in_image(image, message, key, options['bits_per_sample'],
+                                                                 options['compression'], scatter=options['scatter']),
+                              destination)
+    elif kind == "audio":
+        # The cover is copied by the kernel and only the pages holding payload bits are rewritten
+        audio_steg.encode_audio_mapped(path, destination, message, key=key, bits_per_sample=options['bits_per_sample'],
+                                       compression=options['compression'], scatter=options['scatter'])
+    elif kind == "text":
+        text_steg.encode_text_file(path, destination, message, key, options['compression'])
+    else:
+        # Files are already spread across the pool, so frames are embedded in-process
+        video_steg.encode_video_file(path, destination, message, options['frames'], key,
+                                     workers=1, passthrough=options['passthrough'],
+                                     bits_per_sample=options['bits_per_sample'], compression=options['compression'],
+                                     scatter=options['scatter'])
+    return {"output": destination}
+
+def _decode_message(path, options):
+    kind = carrier_type(path)
+    key = options['key']
+    if kind == "image":
+        # PNG and TIFF stop decoding once the payload is complete
+        return image_steg.decode_image_file(path, key)
+    if kind == "audio":
+        return audio_steg.decode_audio_mapped(path, key=key)
+    if kind == "text":
+        return text_steg.decode_text_file(path, key)
+    return video_steg.decode_video_file(path, options['frames'], key)
+
+def _decode_file(path, options):
+    if options['output_dir']:
+        return _extract_file(path, options)
+    message = _decode_message(path, options)
+    if message is None:
+        return {"status": "empty"}
+    if isinstance(message, bytes):
+        # Binary payloads are not valid JSON strings
+        return {"message_base64": base64.b64encode(message).decode('ascii')}
+    return {"message": message}
+
+def _extract_file(path, options):
+    """Writes the hidden payload of one file to the output directory; audio and video are streamed."""
+    kind = carrier_type(path)
+    destination = _destination("decode", path, options)
+    _prepare_destination(path, destination)
+    if kind == "audio":
+        size = audio_steg.extract_file(path, destination, options['key'])
+    elif kind == "video":
+        size = video_steg.extract_file(path, destination, options['frames'], options['key'])
+    else:
+        message = _decode_message(path, options)
+        if message is None:
+            size = None
+        else:
+            if isinstance(message, str):
+                message = message.encode('utf-8')
+            size = payload.write_blocks([message], destination)
+    if size is None:
+        return {"status": "empty"}
+    return {"output": destination, "bytes": size}
+
+def _capacity_file(path, options):
+    # Only headers are read; nothing is decoded
+    kind = carrier_type(path)
+    overhead, bits_per_sample = options['overhead'], options['bits_per_sample']
+    if kind == "image":
+        capacity = image_steg.capacity(path, bits_per_sample, overhead)
+    elif kind == "audio":
+        capacity = audio_steg.capacity(path, bits_per_sample, overhead)
+    elif kind == "text":
+        with open(path, 'r', encoding='utf-8') as f:
+            capacity = text_steg.capacity(f, overhead=overhead)
+    else:
+        capacity = video_steg.capacity(path, options['frames'], bits_per_sample, overhead)
+    return {"capacity": capacity}
+
+_OPERATIONS = {"encode": _encode_file, "decode": _decode_file, "capacity": _capacity_file}
+
+def _run_one(command, path, options):
+    """Runs one operation and returns its result record; errors are reported, not raised."""
+    start = time.perf_counter()
+    record = {"command": command, "path": path, "status": "ok"}
+    try:
+        # The carrier modules print progress messages; keep them out of the batch output
+        with contextlib.redirect_stdout(io.StringIO()):
+            record.update(_OPERATIONS[command](path, options))
+    except Exception as e:
+        record.update(status="error", error=str(e))
+    record["seconds"] = round(time.perf_counter() - start, 3)
+    return record
+
+# --- Batch driver ---
+
+def _conflicting_outputs(command, files, options):
+    """Returns {path: error record} for the inputs whose output file another input also writes."""
+    writers = {}
+    for path in files:
+        try:
+            destination = _destination(command, path, options)
+        except ValueError:
+            continue # Unsupported files are reported when they run
+        if destination is not None:
+            writers.setdefault(os.path.normcase(os.path.abspath(destination)), []).append(path)
+    conflicts = {}
+    for destination, paths in writers.items():
+        if len(paths) > 1:
+            for path in paths:
+                others = ", ".join(other for other in paths if other != path)
+                conflicts[path] = {"command": command, "path": path, "status": "error", "seconds": 0,
+                                   "error": f"Error: {others} would be written to the same output file {destination}."}
+    return conflicts
+
+def _completed_paths(log_path, command):
+    """Returns the paths a previous run already processed successfully with this command."""
+    done = set()
+    if not log_path or not os.path.exists(log_path):
+        return done
+    with open(log_path, 'r', encoding='utf-8') as log:
+        for line in log:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue # A run killed mid-write can leave a partial last line
+            if record.get("command") == command and record.get("status") in ("ok", "empty"):
+                done.add(record.get("path"))
+    return done
+
+def _open_log(log_path):
+    """Opens the JSONL log for appending; a partial last line left by a killed run is ended first."""
+    partial = False
+    if os.path.exists(log_path) and os.path.getsize(log_path):
+        with open(log_path, 'rb') as log:
+            log.seek(-1, os.SEEK_END)
+            partial = log.read(1) != b"\n"
+    log = open(log_path, 'a', encoding='utf-8')
+    if partial:
+        log.write("\n")
+    return log
+
+def run_batch(command, files, options, jobs=None, log_path=None, resume=False, progress=True):
+    """Processes files with a pool of `jobs` processes. Returns the list of result records."""
+    if resume:
+        done = _completed_paths(log_path, command)
+        skipped = len(files)
+        files = [path for path in files if path not in done]
+        skipped -= len(files)
+        if progress and skipped:
+            print(f"Skipping {skipped} file(s) already processed.", file=sys.stderr)
+
+    # Inputs that would overwrite each other's output fail before anything is written
+    conflicts = _conflicting_outputs(command, files, options)
+    runnable = [path for path in files if path not in conflicts]
+
+    results = []
+    log = _open_log(log_path) if log_path else None
+    try:
+        if jobs == 1 or len(runnable) <= 1:
+            # No pool for a single worker; this also keeps tracebacks readable while debugging
+            completed = (_run_one(command, path, options) for path in runnable)
+            executor = None
+        else:
+            executor = ProcessPoolExecutor(max_workers=jobs)
+            futures = [executor.submit(_run_one, command, path, options) for path in runnable]
+            completed = (future.result() for future in as_completed(futures))
+        completed = itertools.chain(conflicts.values(), completed)
+
+        try:
+            for number, record in enumerate(completed, 1):
+                results.append(record)
+                if log:
+                    log.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    log.flush()
+                if progress:
+                    detail = record.get("error") or record.get("output") or record.get("capacity", "")
+                    print(f"[{number}/{len(files)}] {record['status']:5} {record['path']} {detail}", file=sys.stderr)
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+    finally:
+        if log:
+            log.close()
+    return results
+
+# --- Argument parsing ---
+
+def _build_parser():
+    parser = argparse.ArgumentParser(prog="dataveil", description="Batch steganography for images, audio, text and video.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("inputs", nargs="+", help="Files, glob patterns (quote them, ** is recursive) or @manifest files.")
+    common.add_argument("-j", "--jobs", type=int, default=None, help="Number of worker processes (default: CPU count).")
+    common.add_argument("--log", help="Append one JSON result per file to this JSONL file.")
+    common.add_argument("--resume", action="store_true", help="Skip files the --log file records as done.")
+    common.add_argument("-q", "--quiet", action="store_true", help="Do not print progress.")
+
+    bits = argparse.ArgumentParser(add_help=False)
+    bits.add_argument("-b", "--bits-per-sample", type=int, default=1, choices=range(1, 5),
+                      help="Low bits per image/audio/video value that carry the message (default: 1). Text ignores it.")
+
+    keyed = argparse.ArgumentParser(add_help=False)
+    keyed.add_argument("--key", help="Encryption key.")
+    keyed.add_argument("--key-env", help="Read the encryption key from this environment variable.")
+    keyed.add_argument("--frames", default="0", help="Video frame number or frame spec (default: 0).")
+
+    encode = subparsers.add_parser("encode", parents=[common, keyed, bits], help="Hide a message in every input file.")
+    message = encode.add_mutually_exclusive_group(required=True)
+    message.add_argument("-m", "--message", help="The message to hide.")
+    message.add_argument("--message-file", help="Read the message to hide from this UTF-8 file.")
+    message.add_argument("--payload-file", help="Hide the raw bytes of this file; audio and video stream it from disk.")
+    encode.add_argument("-o", "--output-dir", required=True, help="Directory for the stego files.")
+    encode.add_argument("-z", "--compress", nargs="?", const=compress_utils.DEFAULT_CODEC, default=None,
+                        choices=compress_utils.available_codecs(),
+                        help=f"Compress the message first (default codec: {compress_utils.DEFAULT_CODEC}). Skipped when it does not help.")
+    encode.add_argument("--passthrough", action="store_true", help="Copy H.264 video streams instead of re-encoding them (needs PyAV).")
+    encode.add_argument("--scatter", action="store_true",
+                        help="Spread the message over the carrier in a key-seeded order (needs a key; decode detects it). Text ignores it.")
+
+    decode = subparsers.add_parser("decode", parents=[common, keyed], help="Extract the hidden message from every input file.")
+    decode.add_argument("-o", "--output-dir", help="Write each payload to <name>.payload in this directory instead of printing it.")
+    capacity = subparsers.add_parser("capacity", parents=[common, bits], help="Report how many message bytes every input file can hold.")
+    capacity.add_argument("--encrypted", action="store_true", help="Account for the encryption fields and tag in the header.")
+    capacity.add_argument("--frames", default=None, help="Count only the video frames this frame spec selects.")
+    return parser
+
+def main(argv=None):
+    """Entry point of the batch command line. Returns the process exit code."""
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+
+    options = {"key": None, "frames": args.frames, "message": None, "payload_file": None,
+               "output_dir": getattr(args, "output_dir", None), "passthrough": False, "scatter": False,
+               "bits_per_sample": getattr(args, "bits_per_sample", 1), "compression": getattr(args, "compress", None)}
+    if args.command == "capacity":
+        options["overhead"] = payload.overhead(args.encrypted, bits_per_sample=args.bits_per_sample)
+    else:
+        options["key"] = os.environ.get(args.key_env) if args.key_env else args.key
+    if args.command == "encode":
+        if args.message_file:
+            with open(args.message_file, 'r', encoding='utf-8') as f:
+                options["message"] = f.read()
+        elif args.payload_file:
+            # Workers read the file themselves instead of receiving a copy of it
+            options["payload_file"] = os.path.abspath(args.payload_file)
+        else:
+            options["message"] = args.message
+        options["passthrough"] = args.passthrough
+        if args.scatter and options["key"] is None:
+            parser.error("--scatter needs a key (--key or --key-env).")
+        options["scatter"] = args.scatter
+    if options["output_dir"]:
+        os.makedirs(options["output_dir"], exist_ok=True)
+
+    files = expand_inputs(args.inputs)
+    if not files:
+        print("No input files found.", file=sys.stderr)
+        return 1
+    options["input_root"] = input_root(files)
+
+    results = run_batch(args.command, files, options, args.jobs, args.log, args.resume, not args.quiet)
+    if args.command == "decode":
+        # Messages go to stdout as JSON lines, separate from the progress output on stderr
+        for record in results:
+            for field in ("message", "message_base64"):
+                if field in record:
+                    print(json.dumps({"path": record["path"], field: record[field]}, ensure_ascii=False))
+    elif args.command == "capacity":
+        for record in results:
+            if "capacity" in record:
+                print(f"{record['capacity']:>12} {record['path']}")
+
+    errors = sum(record["status"] == "error" for record in results)
+    if not args.quiet:
+        print(f"{len(results) - errors} succeeded, {errors} failed.", file=sys.stderr)
+    return 1 if errors else 0
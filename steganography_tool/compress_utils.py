@@ -0,0 +1,143 @@
+# steganography_tool/compress_utils.py
+import lzma
+import zlib
+
+try:
+    # Zstandard is optional; it compresses about as well as zlib at several times the speed
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Codec identifiers stored in the payload header
+CODEC_ZLIB = 1
+CODEC_LZMA = 2
+CODEC_ZSTD = 3
+
+# Largest accepted expansion of a compressed payload, in decompressed bytes per compressed byte.
+# The codecs here stay well below it even on runs of one byte (zstd peaks near 1:32768), so only
+# crafted data reaches it; decoders pass this multiple of the stored length as max_size.
+MAX_EXPANSION = 1 << 16
+# Compressed input is fed to a bounded decompressor in slices of this size, so a single call
+# can only expand so far before its output is counted against max_size
+DECOMPRESS_SLICE_BYTES = 1 << 10
+
+# codec id -> (name, compress(data), decompress(data))
+_CODECS = {}
+# codec id -> (compressor(), decompressor()) factories for incremental use
+_STREAMS = {}
+
+def register_codec(codec_id, name, compress, decompress, compressor=None, decompressor=None):
+    """Adds a compression codec to the registry. compress and decompress take a bytes-like object and return bytes.
+
+    compressor() and decompressor() return incremental objects for compress_stream/decompress_stream:
+    a compressor has compress(block) and flush(), a decompressor has decompress(block) and eof.
+    """
+    _CODECS[codec_id] = (name, compress, decompress)
+    if compressor is not None and decompressor is not None:
+        _STREAMS[codec_id] = (compressor, decompressor)
+
+def available_codecs():
+    """Returns the names of the codecs that can be used in this environment."""
+    return [name for name, _, _ in _CODECS.values()]
+
+def codec_id(codec):
+    """Looks up a codec id from its name or id."""
+    for known_id, (name, _, _) in _CODECS.items():
+        if codec in (known_id, name):
+            return known_id
+    raise ValueError(f"Error: Compression '{codec}' is not available. Choose one of: {', '.join(available_codecs())}.")
+
+def compress(data, codec):
+    """Compresses bytes with a registered codec."""
+    return _CODECS[codec_id(codec)][1](data)
+
+def decompress(data, codec, max_size=None):
+    """Decompresses bytes with a registered codec; raises ValueError if the output would exceed max_size bytes."""
+    if max_size is not None and codec_id(codec) in _STREAMS:
+        return b''.join(decompress_stream([data], codec, max_size))
+    try:
+        decompressed = _CODECS[codec_id(codec)][2](data)
+    except (zlib.error, lzma.LZMAError) as e:
+        raise ValueError(f"Error: The hidden payload could not be decompressed. {e}")
+    if max_size is not None and len(decompressed) > max_size:
+        raise _too_large(max_size)
+    return decompressed
+
+def _too_large(max_size):
+    return ValueError(f"Error: The hidden payload decompresses to more than {max_size} bytes.")
+
+def _stream_codec(codec):
+    codec = codec_id(codec)
+    if codec not in _STREAMS:
+        raise ValueError(f"Error: Compression '{_CODECS[codec][0]}' cannot be used on streamed files.")
+    return _STREAMS[codec]
+
+def compress_stream(blocks, codec):
+    """Compresses an iterable of byte blocks incrementally and yields the compressed blocks."""
+    compressor = _stream_codec(codec)[0]()
+    for block in blocks:
+        compressed = compressor.compress(block)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+def decompress_stream(blocks, codec, max_size=None):
+    """Decompresses an iterable of byte blocks incrementally and yields the decompressed blocks.
+
+    With max_size, ValueError is raised as soon as the output grows past that many bytes.
+    """
+    decompressor = _stream_codec(codec)[1]()
+    total = 0
+    try:
+        for block in blocks:
+            block = memoryview(block)
+            step = DECOMPRESS_SLICE_BYTES if max_size is not None else max(len(block), 1)
+            # zstd refuses any input once its frame has ended, so empty blocks and data after the end are skipped
+            for start in range(0, len(block), step):
+                if decompressor.eof:
+                    break
+                decompressed = decompressor.decompress(block[start:start + step])
+                if decompressed:
+                    total += len(decompressed)
+                    if max_size is not None and total > max_size:
+                        raise _too_large(max_size)
+                    yield decompressed
+    except (zlib.error, lzma.LZMAError) as e:
+        raise ValueError(f"Error: The hidden payload could not be decompressed. {e}")
+    if not decompressor.eof:
+        raise ValueError("Error: The hidden payload could not be decompressed. The compressed data is truncated.")
+
+register_codec(CODEC_ZLIB, "zlib", lambda data: zlib.compress(data, 9), zlib.decompress,
+               lambda: zlib.compressobj(9), zlib.decompressobj)
+# FORMAT_RAW would save a few header bytes, but the xz container checks its own integrity
+register_codec(CODEC_LZMA, "lzma", lambda data: lzma.compress(data, preset=6), lzma.decompress,
+               lambda: lzma.LZMACompressor(preset=6), lzma.LZMADecompressor)
+if zstandard is not None:
+    class _ZstdDecompressor:
+        """Incremental zstd decompressor that reports errors like the other codecs."""
+        def __init__(self):
+            self._decompressor = zstandard.ZstdDecompressor().decompressobj()
+
+        @property
+        def eof(self):
+            return self._decompressor.eof
+
+        def decompress(self, block):
+            try:
+                return self._decompressor.decompress(block)
+            except zstandard.ZstdError as e:
+                raise ValueError(f"Error: The hidden payload could not be decompressed. {e}")
+
+    def _zstd_decompress(data):
+        # Streamed frames do not record their content size, which the one-shot API needs
+        decompressor = _ZstdDecompressor()
+        decompressed = decompressor.decompress(data)
+        if not decompressor.eof:
+            raise ValueError("Error: The hidden payload could not be decompressed. The compressed data is truncated.")
+        return decompressed
+
+    register_codec(CODEC_ZSTD, "zstd", lambda data: zstandard.ZstdCompressor(level=9).compress(data), _zstd_decompress,
+                   lambda: zstandard.ZstdCompressor(level=9).compressobj(), _ZstdDecompressor)
+
+# zstd when it is installed, zlib otherwise
+DEFAULT_CODEC = "zstd" if zstandard is not None else "zlib"
@@ -1,6 +1,30 @@
 # steganography_tool/crypto_utils.py
+import functools
+import hashlib
+import os
 import numpy as np
 
+try:
+    # OpenSSL's RC4 is used for the keystream when the cryptography package is installed
+    from cryptography.hazmat.decrepit.ciphers.algorithms import ARC4
+    from cryptography.hazmat.primitives.ciphers import Cipher
+except ImportError:
+    ARC4 = None
+
+try:
+    # Authenticated ciphers; OpenSSL uses AES-NI and similar instructions where the CPU has them
+    from cryptography.exceptions import InvalidTag
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+except ImportError:
+    AESGCM = ChaCha20Poly1305 = None
+
+# Key lengths in bytes accepted by the OpenSSL RC4 implementation
+_OPENSSL_KEY_SIZES = (5, 7, 8, 10, 16, 20, 24, 32)
+
+# Number of distinct keys whose KSA state is kept between calls
+KSA_CACHE_SIZE = 64
+
 def KSA(key):
     """Key Scheduling Algorithm (KSA) for RC4."""
     key_length = len(key)
@@ -29,28 +53,284 @@ def _prepare_key_array(s):
     """Helper to convert string key to array of ASCII values."""
     return [ord(c) for c in s]
 
+def _prepare_key(key):
+    """Converts a str or bytes-like key to the bytes RC4 schedules with."""
+    if isinstance(key, str):
+        # The KSA only uses each key value modulo 256
+        return bytes(value & 0xFF for value in _prepare_key_array(key))
+    return bytes(key)
+
+def _openssl_key(key):
+    """Returns an equivalent key of a length OpenSSL's RC4 accepts, or None if there is none."""
+    if ARC4 is None or not key:
+        return None
+    # The KSA repeats the key, so any whole repetition of it schedules the same state
+    for size in _OPENSSL_KEY_SIZES:
+        if size % len(key) == 0:
+            return key * (size // len(key))
+    return None
+
+@functools.lru_cache(maxsize=KSA_CACHE_SIZE)
+def _ksa_state(key):
+    """Returns the KSA state for a key as immutable bytes, cached for repeated keys."""
+    return bytes(KSA(key))
+
+def rc4_keystream(key, n):
+    """Generates n bytes of RC4 keystream into a preallocated bytearray."""
+    key = _prepare_key(key)
+    openssl_key = _openssl_key(key)
+    if openssl_key is not None:
+        stream = bytearray(n)
+        Cipher(ARC4(openssl_key), mode=None).encryptor().update_into(bytes(n), stream)
+        return stream
+
+    S = bytearray(_ksa_state(key))
+    stream = bytearray(n)
+    i = 0
+    j = 0
+    for k in range(n):
+        i = (i + 1) & 0xFF
+        si = S[i]
+        j = (j + si) & 0xFF
+        sj = S[j]
+        S[i] = sj
+        S[j] = si
+        stream[k] = S[(si + sj) & 0xFF]
+    return stream
+
+def encrypt_bytes(data, key):
+    """Encrypts a bytes-like object with RC4 and returns bytes."""
+    data = np.frombuffer(data, dtype=np.uint8)
+    keystream = np.frombuffer(rc4_keystream(key, data.size), dtype=np.uint8)
+    return np.bitwise_xor(data, keystream).tobytes()
+
+def decrypt_bytes(data, key):
+    """Decrypts a bytes-like object with RC4 and returns bytes."""
+    # RC4 is a stream cipher, so decryption is the same XOR as encryption
+    return encrypt_bytes(data, key)
+
+def _xor_characters(text, key_str):
+    """XORs every character code with the keystream, as the original string API did."""
+    codes = np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype='<u4')
+    keystream = np.frombuffer(rc4_keystream(key_str, codes.size), dtype=np.uint8)
+    return (codes ^ keystream).astype('<u4').tobytes().decode('utf-32-le', 'surrogatepass')
+
 def encryption(plaintext, key_str):
     """Encrypts plaintext using RC4 with a provided key string."""
-    key = _prepare_key_array(key_str)
-    
-    S = KSA(key)
-    keystream = np.array(PRGA(S, len(plaintext)))
-    
-    plaintext = np.array([ord(i) for i in plaintext])
-    cipher = keystream ^ plaintext
-    
-    ctext = ''.join([chr(c) for c in cipher])
-    return ctext
+    return _xor_characters(plaintext, key_str)
 
 def decryption(ciphertext, key_str):
     """Decrypts ciphertext using RC4 with a provided key string."""
-    key = _prepare_key_array(key_str)
-    
-    S = KSA(key)
-    keystream = np.array(PRGA(S, len(ciphertext)))
-    
-    ciphertext = np.array([ord(i) for i in ciphertext])
-    decoded = keystream ^ ciphertext
-    
-    dtext = ''.join([chr(c) for c in decoded])
-    return dtext
\ No newline at end of file
+    return _xor_characters(ciphertext, key_str)
+
+
+# --- Cipher registry ---
+
+# Cipher identifiers stored in the payload header
+CIPHER_RC4 = 1
+CIPHER_AES_256_GCM = 2
+CIPHER_CHACHA20_POLY1305 = 3
+
+_AEAD_NONCE_SIZE = 12
+_AEAD_TAG_SIZE = 16
+
+# cipher id -> (name, encrypt(data, key), decrypt(data, key))
+_CIPHERS = {}
+# cipher id -> number of bytes the ciphertext is longer than the plaintext
+_CIPHER_OVERHEAD = {}
+# cipher id -> (encrypt_stream(blocks, key), decrypt_stream(blocks, key)) for ciphers that work incrementally
+_CIPHER_STREAMS = {}
+
+def register_cipher(cipher_id, name, encrypt, decrypt, overhead=0, encrypt_stream=None, decrypt_stream=None):
+    """Adds a cipher to the registry. encrypt and decrypt take (data, key) and return bytes.
+
+    overhead is the number of bytes encryption adds to the data (nonce, tag). The optional
+    stream functions take an iterable of byte blocks and a key, yield the output in blocks and
+    must produce exactly what encrypt and decrypt would.
+    """
+    _CIPHERS[cipher_id] = (name, encrypt, decrypt)
+    _CIPHER_OVERHEAD[cipher_id] = overhead
+    if encrypt_stream is not None and decrypt_stream is not None:
+        _CIPHER_STREAMS[cipher_id] = (encrypt_stream, decrypt_stream)
+
+def available_ciphers():
+    """Returns the names of the ciphers that can be used in this environment."""
+    return [name for name, _, _ in _CIPHERS.values()]
+
+def cipher_id(cipher):
+    """Looks up a cipher id from its name or id."""
+    for known_id, (name, _, _) in _CIPHERS.items():
+        if cipher in (known_id, name):
+            return known_id
+    raise ValueError(f"Error: Cipher '{cipher}' is not available. Choose one of: {', '.join(available_ciphers())}.")
+
+def cipher_overhead(cipher):
+    """Returns the number of bytes a registered cipher adds to the data it encrypts."""
+    return _CIPHER_OVERHEAD[cipher_id(cipher)]
+
+def encrypt(data, key, cipher):
+    """Encrypts bytes with a registered cipher."""
+    return _CIPHERS[cipher_id(cipher)][1](data, key)
+
+def decrypt(data, key, cipher):
+    """Decrypts bytes with a registered cipher."""
+    return _CIPHERS[cipher_id(cipher)][2](data, key)
+
+def _stream_cipher(cipher):
+    cipher = cipher_id(cipher)
+    if cipher not in _CIPHER_STREAMS:
+        raise ValueError(f"Error: Cipher '{_CIPHERS[cipher][0]}' cannot be used on streamed files. Use aes-256-gcm.")
+    return _CIPHER_STREAMS[cipher]
+
+def encrypt_stream(blocks, key, cipher):
+    """Encrypts an iterable of byte blocks with a registered cipher and yields the ciphertext in blocks."""
+    return _stream_cipher(cipher)[0](blocks, key)
+
+def decrypt_stream(blocks, key, cipher):
+    """Decrypts an iterable of byte blocks with a registered cipher and yields the plaintext in blocks.
+
+    With an authenticated cipher the blocks are only verified once the generator is exhausted,
+    so callers must not trust the output before then.
+    """
+    return _stream_cipher(cipher)[1](blocks, key)
+
+def _gcm_encrypt_stream(blocks, key):
+    """Incremental AES-256-GCM with the same nonce || ciphertext || tag layout as the one-shot AEAD."""
+    nonce = os.urandom(_AEAD_NONCE_SIZE)
+    encryptor = Cipher(algorithms.AES(key), modes.GCM(nonce)).encryptor()
+    yield nonce
+    for block in blocks:
+        yield encryptor.update(block)
+    encryptor.finalize()
+    yield encryptor.tag
+
+def _gcm_decrypt_stream(blocks, key):
+    """Reverses _gcm_encrypt_stream, holding back the last bytes until the tag is known."""
+    pending = bytearray()
+    decryptor = None
+    for block in blocks:
+        pending += block
+        if decryptor is None:
+            if len(pending) < _AEAD_NONCE_SIZE:
+                continue
+            decryptor = Cipher(algorithms.AES(key), modes.GCM(bytes(pending[:_AEAD_NONCE_SIZE]))).decryptor()
+            del pending[:_AEAD_NONCE_SIZE]
+        if len(pending) > _AEAD_TAG_SIZE:
+            yield decryptor.update(pending[:-_AEAD_TAG_SIZE])
+            del pending[:-_AEAD_TAG_SIZE]
+    if decryptor is None or len(pending) < _AEAD_TAG_SIZE:
+        raise ValueError("Error: Decryption failed. The hidden data is truncated.")
+    try:
+        yield decryptor.finalize_with_tag(bytes(pending))
+    except InvalidTag:
+        raise ValueError("Error: Decryption failed. The key is wrong or the hidden data was modified.")
+
+def _aead_backend(aead_class):
+    """Builds encrypt/decrypt functions that store a random nonce in front of the ciphertext and tag.
+
+    The key must be 32 bytes, as returned by derive_key().
+    """
+    def aead_encrypt(data, key):
+        nonce = os.urandom(_AEAD_NONCE_SIZE)
+        return nonce + aead_class(key).encrypt(nonce, data, None)
+
+    def aead_decrypt(data, key):
+        data = bytes(data)
+        try:
+            return aead_class(key).decrypt(data[:_AEAD_NONCE_SIZE], data[_AEAD_NONCE_SIZE:], None)
+        except InvalidTag:
+            raise ValueError("Error: Decryption failed. The key is wrong or the hidden data was modified.")
+
+    return aead_encrypt, aead_decrypt
+
+register_cipher(CIPHER_RC4, "rc4", encrypt_bytes, decrypt_bytes)
+if AESGCM is not None:
+    register_cipher(CIPHER_AES_256_GCM, "aes-256-gcm", *_aead_backend(AESGCM),
+                    overhead=_AEAD_NONCE_SIZE + _AEAD_TAG_SIZE,
+                    encrypt_stream=_gcm_encrypt_stream, decrypt_stream=_gcm_decrypt_stream)
+    register_cipher(CIPHER_CHACHA20_POLY1305, "chacha20-poly1305", *_aead_backend(ChaCha20Poly1305),
+                    overhead=_AEAD_NONCE_SIZE + _AEAD_TAG_SIZE)
+
+# RC4 is only the default when the cryptography package is missing
+DEFAULT_CIPHER = "aes-256-gcm" if AESGCM is not None else "rc4"
+
+
+# --- Key derivation ---
+
+# KDF identifiers stored in the payload header
+KDF_NONE = 0            # The password is the key; used by RC4 payloads written without a KDF field
+KDF_SHA256 = 1          # Unsalted SHA-256; used by AEAD payloads written without a KDF field
+KDF_PBKDF2_SHA256 = 2
+KDF_SCRYPT = 3
+
+KDF_NAMES = {KDF_NONE: "none", KDF_SHA256: "sha256", KDF_PBKDF2_SHA256: "pbkdf2-sha256", KDF_SCRYPT: "scrypt"}
+
+# Cost parameters used for new payloads; each KDF takes (cost, r, p) and ignores what it does not use.
+# scrypt: cost is N (a power of two), r is the block size, p the parallelism. PBKDF2: cost is the iteration count.
+KDF_PARAMS = {
+    KDF_PBKDF2_SHA256: (600_000, 0, 0),
+    KDF_SCRYPT: (1 << 14, 8, 1),
+}
+
+# Largest costs accepted, for new payloads and from payload headers alike, so a crafted file
+# cannot make deriving its key hang or take gigabytes of memory before its tag is checked
+MAX_PBKDF2_ITERATIONS = 10_000_000
+MAX_SCRYPT_COST, MAX_SCRYPT_R, MAX_SCRYPT_P = 1 << 20, 32, 16
+MAX_SCRYPT_MEMORY = 1 << 30 # scrypt needs about 128 * r * N bytes
+
+DEFAULT_KDF = "scrypt" if hasattr(hashlib, 'scrypt') else "pbkdf2-sha256"
+SALT_SIZE = 16
+DERIVED_KEY_SIZE = 32
+
+# Number of (password, salt, params) combinations whose derived key is kept between calls
+KDF_CACHE_SIZE = 256
+
+def kdf_id(kdf):
+    """Looks up a KDF id from its name or id."""
+    for known_id, name in KDF_NAMES.items():
+        if kdf in (known_id, name):
+            return known_id
+    raise ValueError(f"Error: Key derivation function '{kdf}' is not supported.")
+
+def kdf_params_allowed(kdf, params):
+    """Checks that (cost, r, p) are within the bounds accepted for a KDF id."""
+    cost, r, p = params
+    if kdf == KDF_PBKDF2_SHA256:
+        return 1 <= cost <= MAX_PBKDF2_ITERATIONS
+    if kdf == KDF_SCRYPT:
+        return (1 < cost <= MAX_SCRYPT_COST and 1 <= r <= MAX_SCRYPT_R and 1 <= p <= MAX_SCRYPT_P
+                and 128 * r * cost <= MAX_SCRYPT_MEMORY)
+    return True
+
+@functools.lru_cache(maxsize=KDF_CACHE_SIZE)
+def _derive(password, salt, kdf, params):
+    """Runs the KDF; cached so repeated (password, salt, params) lookups are free."""
+    cost, r, p = params
+    if kdf == KDF_SHA256:
+        return hashlib.sha256(password).digest()
+    if kdf == KDF_PBKDF2_SHA256:
+        return hashlib.pbkdf2_hmac('sha256', password, salt, cost, DERIVED_KEY_SIZE)
+    if kdf == KDF_SCRYPT:
+        return hashlib.scrypt(password, salt=salt, n=cost, r=r, p=p,
+                              maxmem=256 * r * cost * p, dklen=DERIVED_KEY_SIZE)
+    raise ValueError(f"Error: Key derivation function '{kdf}' is not supported.")
+
+def derive_key(password, salt=b'', kdf=DEFAULT_KDF, params=None):
+    """Derives the cipher key for a password and salt. With KDF_NONE the password is returned unchanged."""
+    kdf = kdf_id(kdf)
+    if kdf == KDF_NONE:
+        return password
+    if isinstance(password, str):
+        password = password.encode('utf-8')
+    params = tuple(params) if params is not None else KDF_PARAMS.get(kdf, (0, 0, 0))
+    if not kdf_params_allowed(kdf, params):
+        raise ValueError(f"Error: The {KDF_NAMES[kdf]} parameters {params} are outside the supported range.")
+    return _derive(bytes(password), bytes(salt), kdf, params)
+
+def kdf_cache_info():
+    """Returns the hit/miss counters and size of the derived-key cache."""
+    return _derive.cache_info()
+
+def kdf_cache_clear():
+    """Empties the derived-key cache and resets its counters."""
+    _derive.cache_clear()
@@ -0,0 +1,239 @@
+# steganography_tool/image_rows.py
+"""Row-by-row decoding of PNG and TIFF files, for readers that only need the top of an image.
+
+Rows are produced lazily: only the compressed bytes of the rows asked for are read and
+inflated, so the payload in the first rows of a large stego image is found without decoding
+the rest. Layouts this module does not handle (interlaced or 16-bit PNGs, tiled, LZW or
+planar TIFFs, files with an orientation tag) are reported as None, and callers fall back to a
+full decoder.
+"""
+import struct
+import zlib
+from dataclasses import dataclass
+import numpy as np
+
+# Compressed bytes read from the file at a time
+READ_BLOCK_BYTES = 1 << 16
+
+@dataclass
+class RowImage:
+    """An image whose rows are decoded on demand.
+
+    rows yields one (width, channels) uint8 array per row, top to bottom, with the channels
+    in file order: gray, gray + alpha, RGB or RGBA. Palette images are expanded to RGB.
+    """
+    width: int
+    height: int
+    channels: int
+    rows: object
+
+def open_rows(f):
+    """Reads the header of a PNG or TIFF from a seekable binary file; returns a RowImage, or None.
+
+    The file must stay open while the rows are read.
+    """
+    signature = f.read(8)
+    if signature == _PNG_SIGNATURE:
+        return _open_png(f)
+    if signature[:4] in (b'II*\x00', b'MM\x00*'):
+        return _open_tiff(f, '<' if signature[:2] == b'II' else '>', signature)
+    return None
+
+def _truncated():
+    return ValueError("Error: The image data is truncated.")
+
+def _read_blocks(f, offset, size):
+    """Yields the `size` bytes at `offset` in blocks of at most READ_BLOCK_BYTES."""
+    while size > 0:
+        f.seek(offset)
+        block = f.read(min(size, READ_BLOCK_BYTES))
+        if not block:
+            raise _truncated()
+        offset += len(block)
+        size -= len(block)
+        yield block
+
+def _inflate_lines(blocks, line_size, n_lines):
+    """Inflates a zlib stream from an iterator of compressed blocks and yields it in lines of line_size bytes.
+
+    Only as much is decompressed as the lines taken so far need.
+    """
+    inflater = zlib.decompressobj()
+    pending = b''
+    try:
+        for _ in range(n_lines):
+            while len(pending) < line_size:
+                if inflater.unconsumed_tail:
+                    compressed = inflater.unconsumed_tail
+                else:
+                    compressed = next(blocks, None)
+                    if compressed is None or inflater.eof:
+                        raise _truncated()
+                pending += inflater.decompress(compressed, line_size - len(pending))
+            yield pending[:line_size]
+            pending = pending[line_size:]
+    except zlib.error as e:
+        raise ValueError(f"Error: Could not read the image. {e}")
+
+def _undo_horizontal(line, bpp):
+    """Reverses left-neighbour differencing (PNG Sub filter, TIFF predictor 2): a running sum per channel."""
+    return np.cumsum(line.reshape(-1, bpp), axis=0, dtype=np.uint8).reshape(-1)
+
+
+# --- PNG ---
+
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# Color type -> samples per pixel
+_PNG_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+def _open_png(f):
+    length, kind = struct.unpack('>I4s', f.read(8))
+    if kind != b'IHDR' or length != 13:
+        return None
+    width, height, depth, color_type, _, _, interlace = struct.unpack('>IIBBBBB', f.read(13))
+    f.seek(4, 1) # CRC
+    if depth != 8 or interlace or color_type not in _PNG_CHANNELS:
+        return None
+    palette = None
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            return None
+        length, kind = struct.unpack('>I4s', header)
+        if kind == b'IDAT':
+            break
+        if kind in (b'IEND', b'eXIf'): # EXIF may rotate the image when it is decoded
+            return None
+        if kind == b'tRNS' and color_type in (2, 3): # OpenCV turns it into an alpha channel
+            return None
+        if kind == b'PLTE':
+            # Indices past the end of a short palette decode as black
+            palette = np.zeros((256, 3), dtype=np.uint8)
+            entries = np.frombuffer(f.read(length), dtype=np.uint8).reshape(-1, 3)
+            palette[:len(entries)] = entries
+            f.seek(4, 1)
+        else:
+            f.seek(length + 4, 1)
+    channels = _PNG_CHANNELS[color_type]
+    lines = _inflate_lines(_idat_blocks(f, f.tell(), length), width * channels + 1, height)
+    rows = _unfilter_png(lines, width, channels)
+    if color_type == 3:
+        if palette is None:
+            return None
+        return RowImage(width, height, 3, (palette[row[:, 0]] for row in rows))
+    return RowImage(width, height, channels, rows)
+
+def _idat_blocks(f, position, length):
+    """Yields the compressed image data of the IDAT chunk whose data starts at `position` and of any IDAT chunks after it."""
+    while True:
+        yield from _read_blocks(f, position, length)
+        f.seek(position + length + 4) # CRC
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        length, kind = struct.unpack('>I4s', header)
+        if kind != b'IDAT':
+            return
+        position = f.tell()
+
+def _unfilter_png(lines, width, bpp):
+    """Undoes the per-row PNG filters and yields (width, bpp) rows."""
+    prior = np.zeros(width * bpp, dtype=np.uint8)
+    for data in lines:
+        filter_type, line = data[0], np.frombuffer(data, dtype=np.uint8, offset=1)
+        if filter_type == 0:
+            row = line
+        elif filter_type == 1:
+            row = _undo_horizontal(line, bpp)
+        elif filter_type == 2:
+            row = line + prior
+        elif filter_type == 3:
+            row = _undo_average(data[1:], prior.tobytes(), bpp)
+        elif filter_type == 4:
+            row = _undo_paeth(data[1:], prior.tobytes(), bpp)
+        else:
+            raise ValueError(f"Error: Could not read the image. Unknown PNG filter {filter_type}.")
+        prior = row
+        yield row.reshape(width, bpp)
+
+def _undo_average(line, prior, bpp):
+    # Each byte depends on the one just decoded to its left, so this runs byte by byte
+    out = bytearray(line)
+    for i in range(bpp):
+        out[i] = (out[i] + (prior[i] >> 1)) & 0xFF
+    for i in range(bpp, len(out)):
+        out[i] = (out[i] + ((out[i - bpp] + prior[i]) >> 1)) & 0xFF
+    return np.frombuffer(out, dtype=np.uint8)
+
+def _undo_paeth(line, prior, bpp):
+    out = bytearray(line)
+    for i in range(bpp):
+        out[i] = (out[i] + prior[i]) & 0xFF # The left and upper-left neighbours are 0
+    for i in range(bpp, len(out)):
+        a, b, c = out[i - bpp], prior[i], prior[i - bpp]
+        pa, pb, pc = abs(b - c), abs(a - c), abs(a + b - 2 * c)
+        out[i] = (out[i] + (a if pa <= pb and pa <= pc else b if pb <= pc else c)) & 0xFF
+    return np.frombuffer(out, dtype=np.uint8)
+
+
+# --- TIFF ---
+
+_TIFF_WIDTH, _TIFF_HEIGHT, _TIFF_BITS, _TIFF_COMPRESSION, _TIFF_PHOTOMETRIC = 256, 257, 258, 259, 262
+_TIFF_STRIP_OFFSETS, _TIFF_ORIENTATION, _TIFF_SAMPLES, _TIFF_ROWS_PER_STRIP = 273, 274, 277, 278
+_TIFF_STRIP_COUNTS, _TIFF_PLANAR, _TIFF_PREDICTOR, _TIFF_TILE_WIDTH, _TIFF_EXTRA_SAMPLES = 279, 284, 317, 322, 338
+# Field type -> struct format of one value (BYTE, SHORT, LONG)
+_TIFF_TYPES = {1: 'B', 3: 'H', 4: 'I'}
+_TIFF_DEFLATE = (8, 32946) # Adobe and the older PKZIP code
+
+def _tiff_tags(f, order, offset):
+    """Reads the integer fields of an IFD into a dict of tag -> tuple of values."""
+    f.seek(offset)
+    (count,) = struct.unpack(order + 'H', f.read(2))
+    entries = f.read(12 * count)
+    tags = {}
+    for i in range(count):
+        tag, field_type, n, value = struct.unpack_from(order + 'HHI4s', entries, 12 * i)
+        if field_type not in _TIFF_TYPES:
+            continue
+        fmt = f"{order}{n}{_TIFF_TYPES[field_type]}"
+        size = struct.calcsize(fmt)
+        if size > 4:
+            f.seek(struct.unpack(order + 'I', value)[0])
+            value = f.read(size)
+        tags[tag] = struct.unpack(fmt, value[:size])
+    return tags
+
+def _open_tiff(f, order, signature):
+    tags = _tiff_tags(f, order, struct.unpack(order + 'I', signature[4:8])[0])
+
+    def first(tag, default=None):
+        return tags.get(tag, (default,))[0]
+
+    channels = first(_TIFF_SAMPLES, 1)
+    compression, predictor = first(_TIFF_COMPRESSION, 1), first(_TIFF_PREDICTOR, 1)
+    if (channels not in (1, 3) or first(_TIFF_PHOTOMETRIC) != (1 if channels == 1 else 2)
+            or tags.get(_TIFF_BITS, (1,)) != (8,) * channels or first(_TIFF_PLANAR, 1) != 1
+            or compression not in (1,) + _TIFF_DEFLATE or predictor not in (1, 2)
+            or first(_TIFF_ORIENTATION, 1) != 1 or _TIFF_TILE_WIDTH in tags or _TIFF_EXTRA_SAMPLES in tags
+            or _TIFF_STRIP_OFFSETS not in tags or _TIFF_STRIP_COUNTS not in tags):
+        return None
+    width, height = first(_TIFF_WIDTH), first(_TIFF_HEIGHT)
+    rows = _tiff_rows(f, tags[_TIFF_STRIP_OFFSETS], tags[_TIFF_STRIP_COUNTS], first(_TIFF_ROWS_PER_STRIP, height),
+                      width, height, channels, compression, predictor)
+    return RowImage(width, height, channels, rows)
+
+def _tiff_rows(f, offsets, counts, rows_per_strip, width, height, channels, compression, predictor):
+    stride = width * channels
+    for strip, (offset, count) in enumerate(zip(offsets, counts)):
+        n_rows = min(rows_per_strip, height - strip * rows_per_strip)
+        if n_rows <= 0:
+            return
+        if compression == 1:
+            lines = (b''.join(_read_blocks(f, offset + i * stride, stride)) for i in range(n_rows))
+        else:
+            lines = _inflate_lines(_read_blocks(f, offset, count), stride, n_rows)
+        for data in lines:
+            line = np.frombuffer(data, dtype=np.uint8)
+            if predictor == 2:
+                line = _undo_horizontal(line, channels)
+            yield line.reshape(width, channels)
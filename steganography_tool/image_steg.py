@@ -1,5 +1,19 @@
+import io
+import os
 import cv2
 import numpy as np
+from PIL import Image, UnidentifiedImageError
+from . import image_rows, payload, scatter_utils, utils
+
+# Payload values fill the channels of each pixel in BGR order, the way OpenCV loads images.
+# For other layouts, CHANNEL_ORDERS gives the array channel that holds each of those positions,
+# so an image decodes the same whichever library loaded it.
+CHANNEL_ORDERS = {'BGR': (0, 1, 2), 'RGB': (2, 1, 0), 'BGRA': (0, 1, 2, 3), 'RGBA': (2, 1, 0, 3)}
+
+# Lossless formats the output stage writes, and their default compression level (0-9, higher is
+# smaller and slower). LSB data is noise to a compressor, so the fastest PNG level costs only a
+# few percent in size.
+IMAGE_OUTPUT_FORMATS = {'png': 1, 'webp': 0, 'tiff': 6}
 
 def msgtobinary(msg):
     """Converts a message to its binary representation."""
@@ -12,73 +26,258 @@ def msgtobinary(msg):
     else:
         raise TypeError("Input type is not supported in this function")
 
+def _channel_positions(image, channel_order):
+    """Returns the array channel for each payload position in a pixel, or None if the flat order already matches."""
+    if channel_order not in CHANNEL_ORDERS:
+        raise ValueError(f"Error: Unknown channel order '{channel_order}'. Choose one of: {', '.join(CHANNEL_ORDERS)}.")
+    positions = CHANNEL_ORDERS[channel_order]
+    if image.ndim != 3 or positions == tuple(range(len(positions))):
+        return None
+    if image.shape[2] != len(positions):
+        raise ValueError(f"Error: A {channel_order} image needs {len(positions)} channels, not {image.shape[2]}.")
+    return positions
+
+class _ReorderedValues:
+    """Flat, read-only view of an image's values in payload order; each slice copies only the pixels it covers."""
+    def __init__(self, image, positions):
+        self._pixels = image.reshape(-1, len(positions))
+        self._positions = list(positions)
+        self.size = image.size
+
+    def __getitem__(self, index):
+        start, stop, _ = index.indices(self.size)
+        channels = len(self._positions)
+        first = start // channels
+        block = self._pixels[first:-(-stop // channels)][:, self._positions].reshape(-1)
+        return block[start - first * channels:stop - first * channels]
+
 # --- Core Logic for GUI ---
 
-def encode_message_in_image(image_data, secret_message):
-    """Encodes a message into an image and returns the modified image data."""
-    max_bytes = (image_data.shape[0] * image_data.shape[1] * 3) // 8
-    print(f"Maximum bytes to encode: {max_bytes}")
-    
-    # Check if the message + delimiter will fit
-    if len(secret_message) + 5 > max_bytes:
+def capacity(source, bits_per_sample=1, overhead=None):
+    """Returns how many message bytes an image can hold, reading only the image header.
+
+    source is a path, a file object or an already loaded image array; files count the channels
+    load_image gives them. overhead defaults to the unencrypted payload header (see payload.overhead).
+    """
+    if isinstance(source, np.ndarray):
+        n_values = source.size
+    else:
+        try:
+            # Pillow opens images lazily, so only the header is parsed here
+            with Image.open(source) as image:
+                n_values = image.width * image.height * _file_channels(image)
+        except UnidentifiedImageError as e:
+            raise ValueError(f"Error: Could not read the image. {e}")
+    if overhead is None:
+        overhead = payload.overhead(bits_per_sample=bits_per_sample)
+    return utils.capacity_bytes(n_values, bits_per_sample, overhead)
+
+def _file_channels(image):
+    """The number of channels load_image decodes a file to, from the header Pillow read."""
+    if image.mode in ('1', 'L'):
+        return 1
+    if image.mode in ('LA', 'PA', 'RGBA') or 'transparency' in image.info:
+        return 4 # OpenCV gives gray with alpha, palettes and tRNS transparency as BGRA
+    return 3
+
+def _image_scatter(image, positions, key):
+    """Scatter mode over the pixels of an image; each pixel's channels keep their payload order."""
+    if positions is None:
+        return scatter_utils.Scatter(image.size, key, image.shape[2] if image.ndim == 3 else 1)
+    return scatter_utils.Scatter(image.size, key, len(positions), positions)
+
+def encode_message_in_image(image_data, secret_message, key=None, bits_per_sample=1, compression=None,
+                            channel_order='BGR', scatter=False):
+    """Encodes a message (encrypted if a key is given) into an image and returns the modified image data.
+
+    secret_message is a str or any bytes-like object (bytes, memoryview, NumPy array); binary data
+    is embedded without an intermediate copy and decodes back to bytes.
+    bits_per_sample (1-4) sets how many low bits of each channel value carry the message;
+    compression names a codec from compress_utils to shrink the message first.
+    channel_order names the layout of image_data (see CHANNEL_ORDERS), so RGB arrays from Pillow
+    need no conversion. With scatter=True (needs a key) the message goes into key-seeded random
+    pixels instead of the first ones.
+    """
+    print(f"Maximum bytes to encode: {capacity(image_data, bits_per_sample, 0)}")
+
+    data = payload.build_message(secret_message, key=key, bits_per_sample=bits_per_sample,
+                                 compression=compression)
+    values = payload.sample_values(data, bits_per_sample)
+
+    # Check if the header + message will fit
+    if values.size > image_data.size:
         raise ValueError("Error: Message is too long to be encoded in this image.")
 
-    data_with_delimiter = secret_message + '*^*^*'
-    binary_data = msgtobinary(data_with_delimiter)
-    
-    data_index = 0
     img_data_copy = image_data.copy()
-
-    for row in img_data_copy:
-        for pixel in row:
-            r, g, b = msgtobinary(pixel)
-            if data_index < len(binary_data):
-                pixel[0] = int(r[:-1] + binary_data[data_index], 2)
-                data_index += 1
-            if data_index < len(binary_data):
-                pixel[1] = int(g[:-1] + binary_data[data_index], 2)
-                data_index += 1
-            if data_index < len(binary_data):
-                pixel[2] = int(b[:-1] + binary_data[data_index], 2)
-                data_index += 1
-            if data_index >= len(binary_data):
-                break
-        if data_index >= len(binary_data):
-            break
-            
+    positions = _channel_positions(img_data_copy, channel_order)
+    if scatter:
+        scatter_utils.embed(img_data_copy.reshape(-1), values, _image_scatter(img_data_copy, positions, key),
+                            bits_per_sample=bits_per_sample)
+    elif positions is None:
+        # Channels are visited pixel by pixel, row by row, which is the flattened order
+        utils.embed_lsb(img_data_copy.reshape(-1), values, bits_per_sample=bits_per_sample)
+    else:
+        # Every channel takes each n-th value through a strided view, so the image is never reordered
+        pixels = img_data_copy.reshape(-1, len(positions))
+        for position, channel in enumerate(positions):
+            utils.embed_lsb(pixels[:, channel], values[position::len(positions)], bits_per_sample=bits_per_sample)
     return img_data_copy
 
-def decode_message_from_image(image_data):
-    """Decodes a message from an image efficiently and returns the string."""
-    data_binary = ""
-    decoded_data = ""
-    delimiter = "*^*^*"
-    
-    for row in image_data:
-        for pixel in row:
-            r, g, b = msgtobinary(pixel)
-            
-            # Process LSBs one bit at a time
-            for bit in [r[-1], g[-1], b[-1]]:
-                data_binary += bit
-                
-                if len(data_binary) == 8:
-                    # We have a full byte
-                    try:
-                        decoded_char = chr(int(data_binary, 2))
-                        decoded_data += decoded_char
-                    except ValueError:
-                        # This can happen if the data is not valid ASCII
-                        pass # Ignore invalid byte
-                    data_binary = "" # Reset for the next byte
-
-                    # Check if the end of our string is the delimiter
-                    if decoded_data.endswith(delimiter):
-                        # Found it! Stop and return the message.
-                        return decoded_data[:-len(delimiter)]
-    
-    # If we get through the whole image and never find the delimiter
-    return None
+def decode_message_from_image(image_data, key=None, channel_order='BGR'):
+    """Decodes a message from an image efficiently and returns the string, or bytes for binary data.
+
+    With a key, a message that is not at the start of the image is looked for in scatter mode.
+    """
+    positions = _channel_positions(image_data, channel_order)
+    image_data = np.ascontiguousarray(image_data)
+    if positions is None:
+        flat = image_data.reshape(-1)
+    else:
+        flat = _ReorderedValues(image_data, positions)
+    header, data = payload.read_any_payload(utils.lsb_reader(flat))
+    if data is None and key is not None:
+        scattered = scatter_utils.ScatteredValues(image_data.reshape(-1), _image_scatter(image_data, positions, key))
+        header, data = payload.read_payload(utils.lsb_reader(scattered)) or (None, None)
+    if data is None:
+        return None # No message found
+    return payload.decode_message(header, data, key)
+
+def _file_values(rows):
+    """Yields the values of each row in the order _decode_file gives them: gray as is, BGR or BGRA,
+    and gray with alpha as BGRA."""
+    for row in rows:
+        if row.shape[1] == 1:
+            yield row[:, 0]
+        elif row.shape[1] == 2:
+            yield row[:, [0, 0, 0, 1]].reshape(-1)
+        else:
+            yield row[:, [2, 1, 0, 3][:row.shape[1]]].reshape(-1)
+
+# Reads that reach past this share of an image's values decode the whole image instead: OpenCV
+# unfilters a PNG far faster than the row decoder, which pays off once many rows are needed
+ROW_DECODE_MAX_FRACTION = 1 / 64
+
+def _decode_file(f, flags=cv2.IMREAD_UNCHANGED):
+    """Decodes an image file with the channels it was saved with, so alpha and gray values decode as they were encoded."""
+    f.seek(0)
+    buffer = np.frombuffer(f.read(), dtype=np.uint8)
+    pixels = cv2.imdecode(buffer, flags)
+    if pixels is not None and pixels.dtype != np.uint8:
+        pixels = cv2.imdecode(buffer, cv2.IMREAD_COLOR) # Stego images are 8-bit; scale others as before
+    if pixels is None:
+        raise ValueError("Error: Could not read the image.")
+    if pixels.ndim == 3 and pixels.shape[2] == 4 and buffer[:4].tobytes() in (b'II*\x00', b'MM\x00*'):
+        # OpenCV premultiplies the alpha of a TIFF, which changes the other values; Pillow does not
+        with Image.open(io.BytesIO(buffer)) as image:
+            pixels = np.asarray(image.convert('RGBA'))[..., [2, 1, 0, 3]]
+    return pixels
+
+def load_image(source):
+    """Loads an image (a path, bytes or a binary file object) with the channels it was saved with:
+    gray as a 2-D array, color as BGR and color with alpha as BGRA."""
+    with utils.open_binary(source) as f:
+        if f.read(2) == b'\xff\xd8':
+            return _decode_file(f, cv2.IMREAD_ANYCOLOR) # JPEGs have no alpha; this flag applies their EXIF rotation
+        return _decode_file(f)
+
+def _file_reader(f, image):
+    """Returns a read(n, bits_per_sample=1) function over the values of an image file, row by row at first."""
+    state = {'read': utils.chunked_lsb_reader(_file_values(image.rows)), 'position': 0, 'rows': True}
+    limit = image.width * image.height * image.channels * ROW_DECODE_MAX_FRACTION
+
+    def read(n_bytes, bits_per_sample=1):
+        needed = -(-n_bytes * 8 // bits_per_sample)
+        if state['rows'] and state['position'] + needed > limit:
+            # Both paths give the same values, so the full decode continues where the rows stopped
+            state['read'] = utils.lsb_reader(_decode_file(f).reshape(-1), state['position'])
+            state['rows'] = False
+        state['position'] += needed
+        return state['read'](n_bytes, bits_per_sample)
+
+    return read
+
+def decode_image_file(source, key=None):
+    """Decodes a message from an image file (a path, bytes or a binary file object).
+
+    PNG and TIFF files are decoded row by row and only until the payload is complete, so a
+    short message at the top of a large image costs a few rows; other files, messages that
+    fill more than ROW_DECODE_MAX_FRACTION of the image and scattered messages are decoded in full.
+    """
+    with utils.open_binary(source) as f:
+        image = image_rows.open_rows(f)
+        if image is None:
+            return decode_message_from_image(_decode_file(f), key)
+        header, data = payload.read_any_payload(_file_reader(f, image))
+        if data is None and key is not None:
+            # A scattered message can be anywhere in the image
+            return decode_message_from_image(_decode_file(f), key)
+    if data is None:
+        return None # No message found
+    return payload.decode_message(header, data, key)
+
+# --- Output stage: lossless files straight from the array ---
+
+def _output_format(format):
+    format = format.lower().lstrip('.')
+    format = 'tiff' if format == 'tif' else format
+    if format not in IMAGE_OUTPUT_FORMATS:
+        raise ValueError(f"Error: Stego images must be saved losslessly as one of: {', '.join(IMAGE_OUTPUT_FORMATS)}.")
+    return format
+
+def _cv2_params(format, level):
+    if format == 'png':
+        return [cv2.IMWRITE_PNG_COMPRESSION, level]
+    # Deflate with horizontal differencing; level 0 stores the pixels uncompressed. OpenCV does
+    # not expose the deflate level, so every other level writes the same file
+    if level == 0:
+        return [cv2.IMWRITE_TIFF_COMPRESSION, cv2.IMWRITE_TIFF_COMPRESSION_NONE]
+    return [cv2.IMWRITE_TIFF_COMPRESSION, cv2.IMWRITE_TIFF_COMPRESSION_ADOBE_DEFLATE,
+            cv2.IMWRITE_TIFF_PREDICTOR, cv2.IMWRITE_TIFF_PREDICTOR_HORIZONTAL]
+
+def _webp_params(level):
+    # In lossless mode quality and method only trade encoding effort for size; exact keeps
+    # the color of fully transparent pixels, which the encoder would otherwise clear
+    return {'lossless': True, 'exact': True, 'quality': level * 100 // 9, 'method': level * 6 // 9}
+
+def _to_pil(image, channel_order):
+    """Wraps an array as a Pillow image; Pillow reorders BGR data itself while loading it, in the one copy it makes."""
+    if image.ndim == 2:
+        return Image.fromarray(image)
+    mode = 'RGBA' if image.shape[2] == 4 else 'RGB'
+    return Image.frombuffer(mode, (image.shape[1], image.shape[0]), np.ascontiguousarray(image), 'raw', channel_order, 0, 1)
+
+def encode_image(image, format='png', level=None, channel_order='BGR'):
+    """Compresses a stego image to a lossless PNG, WebP or TIFF file in memory and returns its bytes.
+
+    level (0-9) trades speed for size and defaults to IMAGE_OUTPUT_FORMATS[format]. PNG and TIFF
+    are written by OpenCV, which is faster than Pillow; arrays in another channel order are
+    reordered in the one copy the bindings make anyway. WebP uses Pillow, which can lower the
+    lossless encoding effort and reads any channel order directly. Gray images cannot be saved
+    as WebP.
+    """
+    format = _output_format(format)
+    level = IMAGE_OUTPUT_FORMATS[format] if level is None else level
+    positions = _channel_positions(image, channel_order)
+    channels = image.shape[2] if image.ndim == 3 else 1
+    if channels not in (1, 3, 4) or (format, channels) == ('webp', 1):
+        # WebP has no gray mode; the repeated values would not decode as they were embedded
+        raise ValueError(f"Error: A {channels}-channel image cannot be saved as {format}.")
+    if format == 'webp':
+        output = io.BytesIO()
+        _to_pil(image, channel_order).save(output, format=format, **_webp_params(level))
+        return output.getvalue()
+    if positions is not None:
+        image = image[..., list(positions)] # OpenCV expects BGR(A)
+    success, buffer = cv2.imencode('.' + format, image, _cv2_params(format, level))
+    if not success:
+        raise ValueError(f"Error: Could not encode the image as {format}.")
+    return buffer.tobytes()
+
+def save_image(image, path, format=None, level=None, channel_order='BGR'):
+    """Writes a stego image to path; format defaults to the file extension (see encode_image)."""
+    data = encode_image(image, format or os.path.splitext(path)[1], level, channel_order)
+    with open(path, 'wb') as f:
+        f.write(data)
 
 # --- Functions for Command-Line Interface ---
 
@@ -99,7 +298,7 @@ def _encode_img_data_cli():
     
     try:
         stego_image = encode_message_in_image(image, data)
-        cv2.imwrite(stego_image_name, stego_image)
+        save_image(stego_image, stego_image_name)
         print(f"\nData encoded successfully. Stego image saved as {stego_image_name}")
     except ValueError as e:
         print(e)
@@ -107,12 +306,15 @@ def _encode_img_data_cli():
 def _decode_img_data_cli():
     """Handles decoding via CLI."""
     img_path = input("Enter the stego image file path to decode: ")
-    image = cv2.imread(img_path)
-    if image is None:
+    if not os.path.isfile(img_path):
         print("Image not found. Please check the path.")
         return
 
-    message = decode_message_from_image(image)
+    try:
+        message = decode_image_file(img_path)
+    except ValueError as e:
+        print(e)
+        return
     if message:
         print("\n\nThe hidden data was: ", message)
     else:
@@ -0,0 +1,473 @@
+# steganography_tool/payload.py
+import contextlib
+import math
+import os
+import struct
+import tempfile
+import zlib
+from dataclasses import dataclass, field
+import numpy as np
+from . import compress_utils, crypto_utils, utils
+
+# Every payload starts with this fixed-size header so decoders can reject
+# covers without a message after a few bytes and then read exactly `length` bytes.
+MAGIC = b'DVEL'
+VERSION = 1
+# magic, version, flags, extension length, payload length, CRC-32 of the payload
+HEADER_FORMAT = '>4sBBHQI'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+# Header flags
+FLAG_ENCRYPTED = 0x01
+FLAG_COMPRESSED = 0x02
+FLAG_BINARY = 0x04 # The message is raw bytes, not UTF-8 text
+
+# Optional header fields, stored after the fixed header as (tag, length, value) records
+EXT_CIPHER = 0x01
+EXT_KDF = 0x02
+EXT_BITS_PER_SAMPLE = 0x03 # Low bits per carrier value used after the header; 1 if absent
+EXT_COMPRESSION = 0x04
+_EXTENSION_FORMAT = '>BH'
+# KDF field: kdf id, cost, r, p, followed by the salt
+_KDF_FORMAT = '>BIBB'
+
+# Bytes that may appear in a message written in the legacy delimiter format
+_LEGACY_TEXT_BYTES = frozenset(b'\t\n\r' + bytes(range(0x20, 0x7F)) + bytes(range(0xA0, 0x100)))
+LEGACY_PROBE_BYTES = 64
+
+@dataclass
+class PayloadHeader:
+    """The decoded fixed-size header that precedes every payload."""
+    length: int
+    checksum: int
+    flags: int = 0
+    version: int = VERSION
+    extension_length: int = 0
+    extensions: dict = field(default_factory=dict)
+
+def _pack_extensions(extensions):
+    """Serializes the optional header fields."""
+    return b''.join(struct.pack(_EXTENSION_FORMAT, tag, len(value)) + value
+                    for tag, value in sorted(extensions.items()))
+
+def _parse_extensions(raw):
+    """Parses the optional header fields into a {tag: value} dict."""
+    extensions = {}
+    position = 0
+    record_size = struct.calcsize(_EXTENSION_FORMAT)
+    while position + record_size <= len(raw):
+        tag, length = struct.unpack_from(_EXTENSION_FORMAT, raw, position)
+        position += record_size
+        extensions[tag] = bytes(raw[position:position + length])
+        position += length
+    return extensions
+
+def pack_header(data, flags=0, extensions=None):
+    """Builds the header for a payload, followed by its optional fields."""
+    packed_extensions = _pack_extensions(extensions or {})
+    return struct.pack(HEADER_FORMAT, MAGIC, VERSION, flags, len(packed_extensions),
+                       len(data), zlib.crc32(data)) + packed_extensions
+
+def parse_header(raw):
+    """Parses a header; returns None if the bytes do not start with the magic."""
+    if raw is None or len(raw) < HEADER_SIZE:
+        return None
+    magic, version, flags, extension_length, length, checksum = struct.unpack(HEADER_FORMAT, raw[:HEADER_SIZE])
+    if magic != MAGIC:
+        return None
+    if version > VERSION:
+        raise ValueError(f"Error: Payload format version {version} is newer than this tool supports.")
+    return PayloadHeader(length, checksum, flags, version, extension_length)
+
+def _pack_kdf(kdf_id, params, salt):
+    """Serializes the KDF field."""
+    return struct.pack(_KDF_FORMAT, kdf_id, *params) + salt
+
+def _unpack_kdf(raw):
+    """Parses the KDF field into (kdf id, params, salt)."""
+    kdf_id, cost, r, p = struct.unpack_from(_KDF_FORMAT, raw)
+    return kdf_id, (cost, r, p), bytes(raw[struct.calcsize(_KDF_FORMAT):])
+
+def _kdf_field_allowed(raw):
+    """Checks that a KDF field read from a header is complete and its costs are within bounds."""
+    if len(raw) < struct.calcsize(_KDF_FORMAT):
+        return False
+    kdf_id, params, _ = _unpack_kdf(raw)
+    return crypto_utils.kdf_params_allowed(kdf_id, params)
+
+def _new_key(key, cipher=None, kdf=None, kdf_params=None):
+    """Derives a cipher key from a password with a fresh salt; returns (cipher id, key, header fields)."""
+    cipher_id = crypto_utils.cipher_id(cipher or crypto_utils.DEFAULT_CIPHER)
+    kdf_id = crypto_utils.kdf_id(kdf or crypto_utils.DEFAULT_KDF)
+    params = tuple(kdf_params or crypto_utils.KDF_PARAMS.get(kdf_id, (0, 0, 0)))
+    salt = os.urandom(crypto_utils.SALT_SIZE)
+    derived_key = crypto_utils.derive_key(key, salt, kdf_id, params)
+    return cipher_id, derived_key, {EXT_CIPHER: bytes([cipher_id]), EXT_KDF: _pack_kdf(kdf_id, params, salt)}
+
+def _payload_key(header, key):
+    """Derives the cipher key recorded in a header's fields; returns (cipher id, key)."""
+    if key is None:
+        raise ValueError("Error: The hidden message is encrypted. Please provide the key.")
+    # Encrypted payloads without a cipher field were written with RC4
+    cipher_id = header.extensions.get(EXT_CIPHER, bytes([crypto_utils.CIPHER_RC4]))[0]
+    if EXT_KDF in header.extensions:
+        kdf_id, params, salt = _unpack_kdf(header.extensions[EXT_KDF])
+    else:
+        # Payloads from before key derivation used the password directly (RC4) or its SHA-256
+        kdf_id = crypto_utils.KDF_NONE if cipher_id == crypto_utils.CIPHER_RC4 else crypto_utils.KDF_SHA256
+        params, salt = None, b''
+    return cipher_id, crypto_utils.derive_key(key, salt, kdf_id, params)
+
+def build_payload(data, flags=0, key=None, cipher=None, kdf=None, kdf_params=None, bits_per_sample=1,
+                  compression=None):
+    """Compresses the payload bytes if a codec is given, encrypts them if a key is given and prepends the header.
+
+    Compression is skipped when it would not make the payload smaller. The cipher key is derived
+    from the password with a fresh salt, which is stored in the header. bits_per_sample is recorded
+    for carriers that store more than one bit per value (see sample_values).
+    """
+    extensions = {}
+    if not 1 <= bits_per_sample <= utils.MAX_BITS_PER_SAMPLE:
+        raise ValueError(f"Error: Bits per sample must be between 1 and {utils.MAX_BITS_PER_SAMPLE}.")
+    if bits_per_sample != 1:
+        extensions[EXT_BITS_PER_SAMPLE] = bytes([bits_per_sample])
+    if compression is not None:
+        codec_id = compress_utils.codec_id(compression)
+        compressed = compress_utils.compress(data, codec_id)
+        # The codec field costs a few bytes of its own
+        if len(compressed) + struct.calcsize(_EXTENSION_FORMAT) + 1 < len(data):
+            data = compressed
+            flags |= FLAG_COMPRESSED
+            extensions[EXT_COMPRESSION] = bytes([codec_id])
+    if key is not None:
+        cipher_id, derived_key, cipher_extensions = _new_key(key, cipher, kdf, kdf_params)
+        data = crypto_utils.encrypt(data, derived_key, cipher_id)
+        flags |= FLAG_ENCRYPTED
+        extensions.update(cipher_extensions)
+    return pack_header(data, flags, extensions) + data
+
+def sample_values(payload, bits_per_sample=1):
+    """Splits a built payload into per-sample carrier values.
+
+    The header and its fields always use one bit per value, so decoders can read them before
+    they know bits_per_sample; the rest uses bits_per_sample bits per value.
+    """
+    if bits_per_sample == 1:
+        return utils.bytes_to_bits(payload)
+    header_end = HEADER_SIZE + struct.unpack_from(HEADER_FORMAT, payload)[3]
+    return np.concatenate([utils.bytes_to_bits(payload[:header_end]),
+                           utils.bytes_to_values(payload[header_end:], bits_per_sample)])
+
+def overhead(encrypted=False, cipher=None, bits_per_sample=1):
+    """Number of bytes build_payload adds to a message: the header, its fields and the cipher's nonce and tag.
+
+    Compression is only applied when it saves more than its own field, so it never adds to this.
+    """
+    size = HEADER_SIZE
+    record_size = struct.calcsize(_EXTENSION_FORMAT)
+    if bits_per_sample != 1:
+        size += record_size + 1 # Bits-per-sample field
+    if encrypted:
+        size += record_size + 1 # Cipher field
+        size += record_size + struct.calcsize(_KDF_FORMAT) + crypto_utils.SALT_SIZE # KDF field
+        size += crypto_utils.cipher_overhead(cipher or crypto_utils.DEFAULT_CIPHER)
+    return size
+
+def message_bytes(message):
+    """Returns (buffer, flags) for a message: str is UTF-8 encoded, bytes-like objects are used without copying."""
+    if isinstance(message, str):
+        return message.encode('utf-8'), 0
+    # cast('B') gives byte-sized items for any contiguous buffer (array, NumPy array, ...)
+    return memoryview(message).cast('B'), FLAG_BINARY
+
+def build_message(message, **options):
+    """Builds the payload for a str or bytes-like message; see build_payload for the options."""
+    data, flags = message_bytes(message)
+    return build_payload(data, flags, **options)
+
+def open_payload(header, data, key=None):
+    """Reverses the stages recorded in the header and returns the original payload bytes."""
+    if header.flags & FLAG_ENCRYPTED:
+        cipher_id, derived_key = _payload_key(header, key)
+        data = crypto_utils.decrypt(data, derived_key, cipher_id)
+    if header.flags & FLAG_COMPRESSED:
+        data = compress_utils.decompress(data, header.extensions[EXT_COMPRESSION][0],
+                                         compress_utils.MAX_EXPANSION * header.length)
+    return data
+
+def decode_text(header, data, key=None):
+    """Turns a payload read from a carrier into the message string."""
+    if header is None:
+        # Legacy payloads hold one character per byte
+        return data.decode('latin-1')
+    try:
+        return open_payload(header, data, key).decode('utf-8')
+    except UnicodeDecodeError:
+        raise ValueError("Error: The hidden message is not valid text. Check your key.")
+
+def decode_message(header, data, key=None):
+    """Turns a payload read from a carrier into the message: bytes for binary payloads, str for text."""
+    if header is not None and header.flags & FLAG_BINARY:
+        return open_payload(header, data, key)
+    return decode_text(header, data, key)
+
+def _read_extensions(header, read):
+    """Reads the optional fields that follow a parsed header; returns the body's bits per sample.
+
+    Returns None if the fields cannot belong to a real payload: a KDF field with costs beyond the
+    bounds of crypto_utils would make deriving the key hang, so such a header counts as no payload.
+    """
+    if header.extension_length:
+        header.extensions = _parse_extensions(read(header.extension_length))
+    if EXT_KDF in header.extensions and not _kdf_field_allowed(header.extensions[EXT_KDF]):
+        return None
+    return header.extensions.get(EXT_BITS_PER_SAMPLE, b'\x01')[0]
+
+def _read_body(header, read):
+    """Reads and verifies the payload that follows a parsed header; returns None if the header is unusable."""
+    bits_per_sample = _read_extensions(header, read)
+    if bits_per_sample is None:
+        return None
+    data = read(header.length) if bits_per_sample == 1 else read(header.length, bits_per_sample)
+    if data is None or len(data) < header.length:
+        raise ValueError("Error: The hidden payload is truncated.")
+    if zlib.crc32(data) != header.checksum:
+        raise ValueError("Error: The hidden payload failed its checksum; the file was modified or damaged.")
+    return data
+
+def read_payload(read):
+    """Reads a header and its payload through read(n); returns (header, data) or None if there is no header."""
+    header = parse_header(read(HEADER_SIZE))
+    if header is None:
+        return None
+    data = _read_body(header, read)
+    return None if data is None else (header, data)
+
+def looks_like_legacy(prefix):
+    """Checks whether the first bytes of a carrier could be a message in the legacy delimiter format."""
+    if not prefix:
+        return False
+    end = prefix.find(utils.DELIMITER)
+    if end != -1:
+        prefix = prefix[:end]
+    return all(byte in _LEGACY_TEXT_BYTES for byte in prefix)
+
+def read_any_payload(read, check_legacy=True):
+    """Reads a payload through read(n), falling back to the legacy delimiter format.
+
+    Returns (header, data). The header is None for legacy payloads, and data is None if nothing was found.
+    """
+    prefix = read(HEADER_SIZE)
+    header = parse_header(prefix)
+    if header is not None:
+        data = _read_body(header, read)
+        return (None, None) if data is None else (header, data)
+
+    # Carriers written before the payload header end the message with a delimiter instead
+    if check_legacy:
+        prefix += read(LEGACY_PROBE_BYTES - HEADER_SIZE)
+        if not looks_like_legacy(prefix):
+            return None, None
+    return None, utils.find_delimited(read, prefix)
+
+
+# --- Streamed payloads for files larger than memory ---
+
+# Block size used to read, transform and write streamed payloads. A multiple of 3, so every
+# block splits into whole carrier values for any bits_per_sample from 1 to 4.
+STREAM_BLOCK_BYTES = 3 << 18
+
+def iter_file_blocks(f, block_size=STREAM_BLOCK_BYTES):
+    """Yields the rest of a binary file object in blocks of block_size bytes."""
+    while True:
+        block = f.read(block_size)
+        if not block:
+            return
+        yield block
+
+@dataclass
+class StagedPayload:
+    """A built payload whose body is kept in a temporary file instead of memory.
+
+    values() returns any range of the payload's carrier values, exactly as sample_values()
+    would for the whole payload, so carriers can embed it one chunk at a time.
+    """
+    header: bytes # Header and its optional fields
+    body: object # Seekable binary file holding the compressed and encrypted body
+    length: int
+    bits_per_sample: int = 1
+
+    @property
+    def value_count(self):
+        """Number of carrier values the whole payload needs."""
+        return len(self.header) * 8 + -(-self.length * 8 // self.bits_per_sample)
+
+    def values(self, start, count):
+        """Returns up to `count` carrier values starting at value `start`."""
+        parts = []
+        header_values = len(self.header) * 8
+        if start < header_values:
+            end = min(start + count, header_values)
+            parts.append(utils.bytes_to_bits(self.header)[start:end])
+            count -= end - start
+            start = end
+        if count > 0:
+            first_bit = (start - header_values) * self.bits_per_sample
+            end_bit = min(first_bit + count * self.bits_per_sample, self.length * 8)
+            if end_bit > first_bit:
+                self.body.seek(first_bit // 8)
+                bits = utils.bytes_to_bits(self.body.read(-(-end_bit // 8) - first_bit // 8))
+                skip = first_bit % 8
+                parts.append(utils.bits_to_values(bits[skip:skip + end_bit - first_bit], self.bits_per_sample))
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.uint8)
+
+    def close(self):
+        self.body.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def _counted(blocks, counter):
+    """Passes blocks through, adding their total length to counter[0]."""
+    for block in blocks:
+        counter[0] += len(block)
+        yield block
+
+def _stage_body(f, codec, encryption, block_size):
+    """Runs a file through compression and encryption into a temporary file.
+
+    Returns (body file, body length, CRC-32, input length, compressed length).
+    """
+    read_bytes = [0]
+    compressed_bytes = [0]
+    blocks = _counted(iter_file_blocks(f, block_size), read_bytes)
+    if codec is not None:
+        blocks = _counted(compress_utils.compress_stream(blocks, codec), compressed_bytes)
+    if encryption is not None:
+        blocks = crypto_utils.encrypt_stream(blocks, encryption[1], encryption[0])
+
+    body = tempfile.TemporaryFile()
+    try:
+        length = 0
+        checksum = 0
+        for block in blocks:
+            body.write(block)
+            checksum = zlib.crc32(block, checksum)
+            length += len(block)
+    except BaseException:
+        body.close()
+        raise
+    return body, length, checksum, read_bytes[0], compressed_bytes[0]
+
+def stage_payload(source, flags=FLAG_BINARY, key=None, cipher=None, kdf=None, kdf_params=None, bits_per_sample=1,
+                  compression=None, block_size=STREAM_BLOCK_BYTES):
+    """Builds a payload from a file without loading it, returning a StagedPayload.
+
+    source is a path or a seekable binary file object. The options match build_payload; the
+    cipher must support streaming (aes-256-gcm). Compression is still skipped when it would not
+    make the payload smaller, at the cost of reading the file a second time.
+    """
+    if not 1 <= bits_per_sample <= utils.MAX_BITS_PER_SAMPLE:
+        raise ValueError(f"Error: Bits per sample must be between 1 and {utils.MAX_BITS_PER_SAMPLE}.")
+    extensions = {}
+    if bits_per_sample != 1:
+        extensions[EXT_BITS_PER_SAMPLE] = bytes([bits_per_sample])
+    codec = compress_utils.codec_id(compression) if compression is not None else None
+    encryption = None
+    if key is not None:
+        cipher_id, derived_key, cipher_extensions = _new_key(key, cipher, kdf, kdf_params)
+        encryption = (cipher_id, derived_key)
+        flags |= FLAG_ENCRYPTED
+        extensions.update(cipher_extensions)
+
+    with contextlib.ExitStack() as stack:
+        f = stack.enter_context(open(source, 'rb')) if isinstance(source, (str, os.PathLike)) else source
+        start = f.tell()
+        body, length, checksum, read_bytes, compressed_bytes = _stage_body(f, codec, encryption, block_size)
+        if codec is not None:
+            # Same rule as build_payload: the codec field costs a few bytes of its own
+            if compressed_bytes + struct.calcsize(_EXTENSION_FORMAT) + 1 < read_bytes:
+                flags |= FLAG_COMPRESSED
+                extensions[EXT_COMPRESSION] = bytes([codec])
+            else:
+                body.close()
+                f.seek(start)
+                body, length, checksum, _, _ = _stage_body(f, None, encryption, block_size)
+
+    packed_extensions = _pack_extensions(extensions)
+    header = struct.pack(HEADER_FORMAT, MAGIC, VERSION, flags, len(packed_extensions),
+                         length, checksum) + packed_extensions
+    return StagedPayload(header, body, length, bits_per_sample)
+
+def _iter_body(header, read, bits_per_sample, block_size):
+    """Yields the body that follows a header in blocks, verifying its checksum after the last one."""
+    remaining = header.length
+    checksum = 0
+    while remaining:
+        n_bytes = min(block_size, remaining)
+        block = read(n_bytes) if bits_per_sample == 1 else read(n_bytes, bits_per_sample)
+        if block is None or len(block) < n_bytes:
+            raise ValueError("Error: The hidden payload is truncated.")
+        checksum = zlib.crc32(block, checksum)
+        remaining -= n_bytes
+        yield block
+    if checksum != header.checksum:
+        raise ValueError("Error: The hidden payload failed its checksum; the file was modified or damaged.")
+
+def read_payload_blocks(read, block_size=STREAM_BLOCK_BYTES):
+    """Reads a header through read(n) and returns (header, blocks), or None if there is no header.
+
+    blocks yields the body in blocks of about block_size bytes; it raises ValueError at the
+    end if the body fails its checksum. Legacy delimiter payloads are not supported here.
+    """
+    header = parse_header(read(HEADER_SIZE))
+    if header is None:
+        return None
+    bits_per_sample = _read_extensions(header, read)
+    if bits_per_sample is None:
+        return None
+    # Every block but the last must end on a carrier value boundary
+    step = bits_per_sample // math.gcd(8, bits_per_sample)
+    return header, _iter_body(header, read, bits_per_sample, max(step, block_size - block_size % step))
+
+def open_payload_stream(header, blocks, key=None):
+    """Like open_payload, but decrypts and decompresses an iterable of body blocks incrementally."""
+    if header.flags & FLAG_ENCRYPTED:
+        cipher_id, derived_key = _payload_key(header, key)
+        blocks = crypto_utils.decrypt_stream(blocks, derived_key, cipher_id)
+    if header.flags & FLAG_COMPRESSED:
+        blocks = compress_utils.decompress_stream(blocks, header.extensions[EXT_COMPRESSION][0],
+                                                  compress_utils.MAX_EXPANSION * header.length)
+    return blocks
+
+def write_blocks(blocks, destination):
+    """Writes blocks to a file path, returning the number of bytes written.
+
+    The data goes to a temporary file next to destination, which replaces it only once every
+    block has been written, so a failed checksum or tag never leaves unverified data behind.
+    """
+    directory = os.path.dirname(os.path.abspath(destination))
+    with tempfile.NamedTemporaryFile(dir=directory, delete=False, suffix='.part') as temp:
+        temp_path = temp.name
+        try:
+            written = 0
+            for block in blocks:
+                temp.write(block)
+                written += len(block)
+        except BaseException:
+            temp.close()
+            os.unlink(temp_path)
+            raise
+    os.replace(temp_path, destination)
+    return written
+
+def extract_to_file(read, destination, key=None, block_size=STREAM_BLOCK_BYTES):
+    """Streams the payload read through read(n) into a file. Returns its size, or None if there is no payload."""
+    result = read_payload_blocks(read, block_size)
+    if result is None:
+        return None
+    header, blocks = result
+    return write_blocks(open_payload_stream(header, blocks, key), destination)
@@ -0,0 +1,122 @@
+# steganography_tool/scatter_utils.py
+"""Key-seeded scattering of payload values over a carrier.
+
+In scatter mode payload value i does not go to carrier value i, but into a unit (a pixel or a
+sample) picked by a keyed pseudo-random permutation of all units; the values of a unit, such as
+the channels of a pixel, stay together. The permutation is a Feistel network over the unit
+indices, with cycle-walking to stay inside the carrier, so every index is mapped on its own:
+nothing the size of the carrier is ever built, and a decoder computes the positions of only
+the values it reads.
+"""
+import hashlib
+import numpy as np
+from . import crypto_utils, utils
+
+# Feistel rounds; four give a pseudo-random permutation (Luby-Rackoff)
+FEISTEL_ROUNDS = 4
+# Payload values mapped at a time; bounds the memory used for positions
+BLOCK_VALUES = 1 << 20
+# First block yielded by iter_scattered, so a header read maps only a few positions
+FIRST_BLOCK_VALUES = 1 << 12
+
+def _mix(x):
+    """SplitMix64 finalizer over a uint64 array: every output bit depends on every input bit."""
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+class Scatter:
+    """Maps payload value indices to flat carrier positions for one carrier size and key.
+
+    The carrier holds `size` values grouped in units of `channels`. columns gives the offset
+    within a unit of each payload position (the order the payload visits a pixel's channels);
+    it defaults to the unit's own order.
+    """
+    def __init__(self, size, key, channels=1, columns=None):
+        if key is None:
+            raise ValueError("Error: A key is required to scatter the message.")
+        self.size = size
+        self.channels = channels
+        self.n_units = size // channels
+        self._columns = np.arange(channels, dtype=np.int64) if columns is None else np.array(columns, dtype=np.int64)
+        # Two equal halves of at least as many bits as the largest unit index
+        half = max(1, ((self.n_units - 1).bit_length() + 1) // 2)
+        self._half = np.uint64(half)
+        self._mask = np.uint64((1 << half) - 1)
+        # Bound to the carrier size, so carriers of different sizes get unrelated orders
+        seed = hashlib.sha256(b'scatter' + self.n_units.to_bytes(8, 'big') + crypto_utils._prepare_key(key)).digest()
+        self._round_keys = [np.uint64(round_key) for round_key in np.frombuffer(seed, dtype='<u8')[:FEISTEL_ROUNDS]]
+
+    def _permute(self, x):
+        left, right = x >> self._half, x & self._mask
+        for round_key in self._round_keys:
+            left, right = right, left ^ (_mix(right ^ round_key) & self._mask)
+        return (left << self._half) | right
+
+    def units(self, indices):
+        """Maps an array of unit indices in [0, n_units) to distinct units in the same range."""
+        x = self._permute(np.asarray(indices, dtype=np.uint64))
+        # The network permutes a power-of-four range; indices that land outside the carrier are
+        # permuted again until they are inside, which keeps the mapping a bijection
+        outside = np.flatnonzero(x >= self.n_units)
+        while outside.size:
+            x[outside] = self._permute(x[outside])
+            outside = outside[x[outside] >= self.n_units]
+        return x
+
+    def positions(self, start, count):
+        """Returns the flat carrier positions of payload values start to start + count - 1."""
+        first = start // self.channels
+        last = -(-(start + count) // self.channels)
+        units = self.units(np.arange(first, last, dtype=np.uint64)).astype(np.int64)
+        flat = (units[:, None] * self.channels + self._columns).reshape(-1)
+        offset = start - first * self.channels
+        return flat[offset:offset + count]
+
+    @property
+    def capacity(self):
+        """Number of payload values the carrier holds in scatter mode."""
+        return self.n_units * self.channels
+
+def embed(carrier, values, scatter, start=0, bits_per_sample=1):
+    """Writes values[j] into the low bits of carrier[scatter position of start + j], in place.
+
+    carrier is a flat array, strided view or memory map; only the positions that are written are touched.
+    """
+    for offset in range(0, values.size, BLOCK_VALUES):
+        block = values[offset:offset + BLOCK_VALUES]
+        positions = scatter.positions(start + offset, block.size)
+        target = carrier[positions]
+        utils.embed_lsb(target, block, bits_per_sample=bits_per_sample)
+        carrier[positions] = target
+
+class ScatteredValues:
+    """Read-only flat view of a carrier in scattered payload order, for utils.lsb_reader."""
+    def __init__(self, carrier, scatter):
+        self._carrier = carrier
+        self._scatter = scatter
+        self.size = scatter.capacity
+
+    def __getitem__(self, index):
+        start, stop, _ = index.indices(self.size)
+        values = np.empty(max(stop - start, 0), dtype=np.uint8)
+        for offset in range(0, values.size, BLOCK_VALUES):
+            count = min(BLOCK_VALUES, values.size - offset)
+            values[offset:offset + count] = self._carrier[self._scatter.positions(start + offset, count)]
+        return values
+
+def iter_scattered(carriers, key, channels=1):
+    """Yields the values of each flat carrier in scattered order, in growing blocks, for utils.chunked_lsb_reader.
+
+    Carriers are taken from the iterator only when the previous one is used up.
+    """
+    scatter = None
+    for carrier in carriers:
+        if scatter is None or scatter.size != carrier.size:
+            scatter = Scatter(carrier.size, key, channels)
+        start, block = 0, FIRST_BLOCK_VALUES
+        while start < scatter.capacity:
+            count = min(block, scatter.capacity - start)
+            yield carrier[scatter.positions(start, count)]
+            start += count
+            block = min(block * 4, BLOCK_VALUES)
@@ -1,38 +1,60 @@
 # stenography_tool/text_steg.py
+import os
+import numpy as np
+from . import payload, utils
 
 # A dictionary mapping binary pairs to zero-width characters
 ZWC = {"00": u'\u200C', "01": u'\u202C', "11": u'\u202D', "10": u'\u200E'}
 # The reverse dictionary for decoding
 ZWC_REVERSE = {u'\u200C': "00", u'\u202C': "01", u'\u202D': "11", u'\u200E': "10"}
 
+# Payloads with a header are stored as 4 zero-width characters per byte, 2 bytes per cover word
+_BYTE_TO_ZWC = [''.join(ZWC[format(b, "08b")[i:i+2]] for i in range(0, 8, 2)) for b in range(256)]
+ZWC_PER_WORD = 8
+
+# Scheme 2 uses 16 invisible characters, 4 bits each, and spreads them evenly over all words of
+# the cover, up to ZWC16_PER_WORD per word. None of them is in the scheme 1 alphabet or commonly
+# found in ordinary text (zero-width joiners, BOMs and emoji variation selectors are avoided).
+ZWC16 = ('\u2061', '\u2062', '\u2063', '\u2064', '\u206A', '\u206B', '\u206C', '\u206D',
+         '\u206E', '\u206F', '\u034F', '\uFE00', '\uFE01', '\uFE02', '\uFE03', '\uFE04')
+ZWC16_PER_WORD = 16
+
+# Scheme 1: 4 characters per byte, 8 per word. Scheme 2: 2 characters per byte, up to 16 per word.
+SCHEME_ZWC4 = 1
+SCHEME_ZWC16 = 2
+DEFAULT_SCHEME = SCHEME_ZWC16
+
+# Lookup tables, so whole payloads and texts are converted in single C-level passes.
+# Encoding: byte value (as a latin-1 character) -> its 4 zero-width characters, for str.translate.
+_BYTE_TRANSLATION = dict(enumerate(_BYTE_TO_ZWC))
+_BYTE_TRANSLATION16 = {b: ZWC16[b >> 4] + ZWC16[b & 0xF] for b in range(256)}
+# Scheme 2 characters already in a cover are removed so they cannot be mistaken for payload
+_STRIP_ZWC16 = dict.fromkeys(map(ord, ZWC16))
+# Decoding: UTF-16 code unit -> the 2-bit value of a scheme 1 character, 16 + the 4-bit value
+# of a scheme 2 character, or _NOT_ZWC
+_NOT_ZWC = 0xFF
+_ZWC16_OFFSET = 16
+_ZWC_VALUES = np.full(1 << 16, _NOT_ZWC, dtype=np.uint8)
+for _bits, _zwc in ZWC.items():
+    _ZWC_VALUES[ord(_zwc)] = int(_bits, 2)
+for _value, _zwc in enumerate(ZWC16):
+    _ZWC_VALUES[ord(_zwc)] = _ZWC16_OFFSET + _value
+# The legacy format writes 6 characters (12 bits) per word and ends with a word of six "11" characters
+_LEGACY_ZWC_PER_WORD = 6
+_LEGACY_DELIMITER_VALUE = 0b11
+
+# Characters of cover text the streaming functions process at a time
+STREAM_BLOCK_CHARS = 1 << 20
+# Code point -> whether str.split() treats it as whitespace; none lies above U+3000
+_IS_SPACE = np.array([chr(code).isspace() for code in range(0x3002)])
+
 def _binary_to_decimal(binary):
     """Converts a binary string to an integer."""
     return int(binary, 2)
 
-def _secret_to_binary(text):
-    """Converts the secret message into a custom binary string."""
-    add = ''
-    for char in text:
-        t = ord(char)
-        if 32 <= t <= 64:
-            t1 = t + 48
-            t2 = t1 ^ 170  # 170: 10101010
-            res = bin(t2)[2:].zfill(8)
-            add += "0011" + res
-        else:
-            t1 = t - 48
-            t2 = t1 ^ 170
-            res = bin(t2)[2:].zfill(8)
-            add += "0110" + res
-    
-    # Add delimiter
-    res1 = add + "111111111111"
-    print(f"Binary after conversion: {res1}")
-    return res1
-
 def _binary_to_secret(binary_string):
     """Decodes the custom binary string back into the secret message."""
-    final = ''
+    final = []
     i = 0
     while i < len(binary_string):
         t3 = binary_string[i:i+4]
@@ -42,83 +64,298 @@ def _binary_to_secret(binary_string):
 
         if t3 == '0110':
             decimal_data = _binary_to_decimal(t4)
-            final += chr((decimal_data ^ 170) + 48)
+            final.append(chr((decimal_data ^ 170) + 48))
         elif t3 == '0011':
             decimal_data = _binary_to_decimal(t4)
-            final += chr((decimal_data ^ 170) - 48)
+            final.append(chr((decimal_data ^ 170) - 48))
         i += 12
-    return final
+    return ''.join(final)
+
+def _hidden_values(stego_text):
+    """Returns the table values of all hidden characters in a text, in order, in one vectorized pass."""
+    # None of the hidden characters is outside the BMP, so UTF-16 code units can be looked up directly
+    values = _ZWC_VALUES[np.frombuffer(stego_text.encode('utf-16-le', 'surrogatepass'), dtype='<u2')]
+    return values[values != _NOT_ZWC]
+
+def _scheme_values(values, scheme):
+    """Keeps the values of one scheme's characters, as 2-bit (scheme 1) or 4-bit (scheme 2) values."""
+    if scheme == SCHEME_ZWC16:
+        return values[values >= _ZWC16_OFFSET] - _ZWC16_OFFSET
+    return values[values < _ZWC16_OFFSET]
+
+def _bits_per_char(scheme):
+    return 4 if scheme == SCHEME_ZWC16 else 2
+
+class _HiddenStream:
+    """The hidden characters of an iterable of text chunks, pulled one chunk at a time on demand.
+
+    Both schemes are buffered separately until the decoder knows which one the text uses.
+    """
+    def __init__(self, chunks):
+        # Short chunks such as lines are regrouped, so every vectorized pass covers a whole block
+        self._values = map(_hidden_values, _iter_word_blocks(chunks))
+        self._buffers = {SCHEME_ZWC16: [], SCHEME_ZWC4: []}
+        self.sizes = {SCHEME_ZWC16: 0, SCHEME_ZWC4: 0}
+
+    def pull(self):
+        """Reads the next chunk into the buffers; returns False at the end of the text."""
+        values = next(self._values, None)
+        if values is None:
+            return False
+        for scheme, buffer in self._buffers.items():
+            scheme_values = _scheme_values(values, scheme)
+            if scheme_values.size:
+                buffer.append(scheme_values)
+                self.sizes[scheme] += scheme_values.size
+        return True
+
+    def peek(self, scheme, n_values):
+        """Returns the first n_values buffered values of a scheme, or fewer if there are not as many."""
+        buffer = self._buffers[scheme]
+        return np.concatenate(buffer)[:n_values] if buffer else np.empty(0, dtype=np.uint8)
+
+    def iter_values(self, scheme, keep_other=False):
+        """Yields a scheme's values from the buffer and then from the rest of the text.
+
+        Unless keep_other is set, the other scheme is no longer buffered.
+        """
+        if not keep_other:
+            other = SCHEME_ZWC4 if scheme == SCHEME_ZWC16 else SCHEME_ZWC16
+            del self._buffers[other]
+        buffer = self._buffers[scheme]
+        while True:
+            while buffer:
+                yield buffer.pop(0)
+            if not self.pull():
+                return
+
+    def reader(self, scheme):
+        """Returns a read(n) function over a scheme's payload bytes."""
+        read_values = utils.chunked_lsb_reader(self.iter_values(scheme))
+        # Text payloads carry no bits-per-sample field; the alphabet fixes the bits per character
+        return lambda n_bytes, bits_per_sample=1: read_values(n_bytes, _bits_per_char(scheme))
+
+def _legacy_bits(values):
+    """Turns 2-bit values into the '0'/'1' string the legacy decoder works on."""
+    bits = np.stack([values >> 1, values & 1], axis=-1).reshape(-1) + ord('0')
+    return bits.astype(np.uint8).tobytes().decode('ascii')
+
+def _decode_legacy_values(blocks):
+    """Extracts a legacy message from scheme 1 values, reading only until its delimiter word."""
+    rows = []
+    pending = np.empty(0, dtype=np.uint8)
+    for values in blocks:
+        pending = np.concatenate([pending, values])
+        words = pending[:pending.size - pending.size % _LEGACY_ZWC_PER_WORD].reshape(-1, _LEGACY_ZWC_PER_WORD)
+        pending = pending[words.size:]
+        delimiters = np.flatnonzero((words == _LEGACY_DELIMITER_VALUE).all(axis=1))
+        if delimiters.size:
+            rows.append(words[:delimiters[0]])
+            return _binary_to_secret(_legacy_bits(np.concatenate(rows).reshape(-1)))
+        rows.append(words)
+    return None # No delimiter found
+
+def _iter_word_blocks(chunks, block_chars=STREAM_BLOCK_CHARS):
+    """Regroups an iterable of text chunks into blocks of about block_chars characters that never split a word."""
+    pending = []
+    size = 0
+    for chunk in chunks:
+        pending.append(chunk)
+        size += len(chunk)
+        if size < block_chars:
+            continue
+        block = ''.join(pending)
+        # Hold back the last word if it may continue in the next chunk
+        cut = len(block) if block[-1].isspace() else len(block) - len(block.rsplit(None, 1)[-1])
+        if cut:
+            yield block[:cut]
+            block = block[cut:]
+        pending = [block]
+        size = len(block)
+    block = ''.join(pending)
+    if block:
+        yield block
+
+def _symbol_bounds(start, count, n_symbols, per_word, word_count=None):
+    """Returns offsets such that word start + i carries symbols[bounds[i]:bounds[i + 1]].
+
+    With word_count the symbols are spread evenly over that many words, rounding up so the
+    payload starts in the first word; otherwise every word takes per_word symbols in turn.
+    """
+    positions = np.arange(start, start + count + 1, dtype=np.int64)
+    if word_count:
+        # Split into whole and fractional symbols per word, so the products stay in int64 for huge covers
+        per_word, remainder = divmod(n_symbols, word_count)
+        bounds = positions * per_word - (-positions * remainder // word_count)
+    else:
+        bounds = positions * per_word
+    return np.minimum(bounds, n_symbols)
+
+def _code_points(text):
+    return np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype='<u4')
+
+def _word_ends(block):
+    """Returns the index just after every word of a block, found in one vectorized pass."""
+    codes = _code_points(block)
+    space = _IS_SPACE[np.minimum(codes, _IS_SPACE.size - 1)]
+    ends = np.flatnonzero(~space[:-1] & space[1:]) + 1
+    if codes.size and not space[-1]:
+        ends = np.append(ends, codes.size)
+    return ends
+
+def _iter_file_blocks(f, block_chars=STREAM_BLOCK_CHARS):
+    """Reads an open text file in blocks rather than lines."""
+    return iter(lambda: f.read(block_chars), '')
+
+def _count_words(chunks):
+    """Counts the words of an iterable of text chunks, one block at a time."""
+    return sum(len(block.split()) for block in _iter_word_blocks(chunks))
 
 # --- Core Logic for GUI ---
 
-def encode_message_in_text(cover_text, secret_message):
-    """Hides a secret message in a cover text using zero-width characters."""
-    binary_secret = _secret_to_binary(secret_message)
-    words = cover_text.split()
-    
-    if len(binary_secret) // 12 > len(words):
+def capacity(cover_text, overhead=None, scheme=DEFAULT_SCHEME):
+    """Returns how many message bytes a cover text can hold. overhead defaults to the unencrypted payload header.
+
+    cover_text is a string or an iterable of text chunks, such as an open text file.
+    """
+    if overhead is None:
+        overhead = payload.overhead()
+    if isinstance(cover_text, str):
+        cover_text = [cover_text]
+    # Scheme 1 fits 2 bytes in every word, scheme 2 up to 8
+    bytes_per_word = ZWC16_PER_WORD // 2 if scheme == SCHEME_ZWC16 else ZWC_PER_WORD // 4
+    return max(0, _count_words(cover_text) * bytes_per_word - overhead)
+
+def iter_encode_text(chunks, secret_message, key=None, compression=None, scheme=DEFAULT_SCHEME, word_count=None):
+    """Hides a secret message in a cover given as an iterable of text chunks and yields the stego text in blocks.
+
+    chunks may be lines, blocks of any size or an open text file; the cover is their concatenation,
+    and all of its whitespace is kept. With word_count (the number of words in the cover) scheme 2
+    spreads the message evenly over the whole cover; without it, the message fills the first words
+    at full density. If the cover turns out too short, ValueError is raised after the last block.
+    """
+    data = payload.build_message(secret_message, key=key, compression=compression)
+    spread_over = word_count
+    if scheme == SCHEME_ZWC16:
+        symbols = data.decode('latin-1').translate(_BYTE_TRANSLATION16)
+        per_word = ZWC16_PER_WORD
+    elif scheme == SCHEME_ZWC4:
+        symbols = data.decode('latin-1').translate(_BYTE_TRANSLATION)
+        # Scheme 1 always fills the first words, as older versions expect
+        per_word, spread_over = ZWC_PER_WORD, None
+    else:
+        raise ValueError(f"Error: Unknown text scheme {scheme}.")
+    if word_count is not None and len(symbols) > word_count * per_word:
         raise ValueError("Error: The cover text is too short for this secret message.")
+    # Checked here rather than inside the generator, so nothing is written for a cover known to be too short
+    return _iter_stego_blocks(chunks, symbols, scheme, per_word, spread_over)
 
-    stego_words = []
-    i = 0
-    while i < len(binary_secret):
-        if (i // 12) >= len(words):
-            # This should not be hit if the check above is correct, but as a safeguard
-            raise ValueError("Error: Ran out of words in cover text during encoding.")
-            
-        s = words[int(i/12)]
-        j = 0
-        zwc_chars = ""
-        while j < 12:
-            x = binary_secret[j+i] + binary_secret[i+j+1]
-            zwc_chars += ZWC[x]
-            j += 2
-        
-        stego_words.append(s + zwc_chars)
-        i += 12
-    
-    # Add the rest of the words from the cover text
-    stego_words.extend(words[int(len(binary_secret)/12):])
-    
-    return " ".join(stego_words)
+def _iter_stego_blocks(chunks, symbols, scheme, per_word, spread_over):
+    position = 0 # Words seen so far
+    placed = 0 # Symbols written so far
+    for block in _iter_word_blocks(chunks):
+        if scheme == SCHEME_ZWC16:
+            block = block.translate(_STRIP_ZWC16)
+        if placed == len(symbols):
+            yield block
+            continue
+        ends = _word_ends(block)
+        bounds = _symbol_bounds(position, ends.size, len(symbols), per_word, spread_over)
+        # Every symbol goes in after the word it belongs to; np.insert places them all at once
+        codes = np.insert(_code_points(block), np.repeat(ends, np.diff(bounds)),
+                          _code_points(symbols[bounds[0]:bounds[-1]]))
+        position += ends.size
+        placed = int(bounds[-1])
+        yield codes.tobytes().decode('utf-32-le', 'surrogatepass')
+
+    if placed < len(symbols):
+        raise ValueError("Error: The cover text is too short for this secret message.")
+
+def _has_header(stream, scheme):
+    """Checks whether the values buffered for a scheme start with a payload header."""
+    bits = _bits_per_char(scheme)
+    values = stream.peek(scheme, payload.HEADER_SIZE * 8 // bits)
+    return payload.parse_header(utils.values_to_bytes(values, payload.HEADER_SIZE, bits)) is not None
+
+def decode_text_stream(chunks, key=None):
+    """Extracts a secret message from an iterable of text chunks (lines, blocks or an open text file).
+
+    Chunks are only read until the payload (or the legacy delimiter) is complete.
+    """
+    stream = _HiddenStream(chunks)
+    header_values = {scheme: payload.HEADER_SIZE * 8 // _bits_per_char(scheme) for scheme in (SCHEME_ZWC16, SCHEME_ZWC4)}
+    # Scheme 1 and legacy texts hold no scheme 2 characters, so their header can be checked early
+    while stream.sizes[SCHEME_ZWC16] < header_values[SCHEME_ZWC16]:
+        if not stream.sizes[SCHEME_ZWC16] and stream.sizes[SCHEME_ZWC4] >= header_values[SCHEME_ZWC4]:
+            break
+        if not stream.pull():
+            break
 
-def decode_message_from_text(stego_text):
+    scheme = SCHEME_ZWC16
+    if stream.sizes[SCHEME_ZWC4] and not _has_header(stream, SCHEME_ZWC16):
+        while stream.sizes[SCHEME_ZWC4] < header_values[SCHEME_ZWC4] and stream.pull():
+            pass
+        if _has_header(stream, SCHEME_ZWC4):
+            scheme = SCHEME_ZWC4
+        else:
+            message = _decode_legacy_values(stream.iter_values(SCHEME_ZWC4, keep_other=True))
+            if message is not None:
+                return message
+
+    result = payload.read_payload(stream.reader(scheme))
+    if result is None:
+        return None
+    return payload.decode_message(*result, key)
+
+def encode_message_in_text(cover_text, secret_message, key=None, compression=None, scheme=DEFAULT_SCHEME):
+    """Hides a secret message (encrypted if a key is given) in a cover text using zero-width characters.
+
+    scheme selects the character alphabet: SCHEME_ZWC16 (default) needs half as many characters and
+    a quarter as many words as SCHEME_ZWC4, which older versions of this tool write and read.
+    The whitespace of the cover text is kept as it is.
+    """
+    return ''.join(iter_encode_text([cover_text], secret_message, key, compression, scheme,
+                                    len(cover_text.split())))
+
+def decode_message_from_text(stego_text, key=None):
     """Extracts a secret message from a stego text file."""
-    temp = ''
-    for line in stego_text.splitlines():
-        for word in line.split():
-            binary_extract = ""
-            for letter in word:
-                if letter in ZWC_REVERSE:
-                    binary_extract += ZWC_REVERSE[letter]
-            
-            if binary_extract == "111111111111": # Check for delimiter
-                return _binary_to_secret(temp)
-            else:
-                temp += binary_extract
-    
-    return None # No delimiter found
+    return decode_text_stream([stego_text], key)
+
+def encode_text_file(source, destination, secret_message, key=None, compression=None, scheme=DEFAULT_SCHEME):
+    """Hides a secret message while streaming a UTF-8 text file from source to destination (paths).
+
+    The cover is read twice: once to count its words, so the message can be spread over all of
+    them, and once to write the stego text. Memory use does not depend on the file size.
+    The stego text replaces destination only once it is complete, so destination may be the
+    cover itself and a failed encode leaves no partial file.
+    """
+    # newline='' keeps the line endings of the cover exactly as they are
+    with open(source, 'r', encoding='utf-8', newline='') as f:
+        word_count = _count_words(_iter_file_blocks(f))
+    with open(source, 'r', encoding='utf-8', newline='') as f:
+        blocks = iter_encode_text(_iter_file_blocks(f), secret_message, key, compression, scheme, word_count)
+        payload.write_blocks((block.encode('utf-8') for block in blocks), destination)
+
+def decode_text_file(source, key=None):
+    """Extracts a secret message from a UTF-8 text file (path), reading only as far as the payload goes."""
+    with open(source, 'r', encoding='utf-8', newline='') as f:
+        return decode_text_stream(_iter_file_blocks(f), key)
 
 # --- Functions for Command-Line Interface ---
 
 def _txt_encode_cli():
     """Handles encoding via CLI."""
-    try:
-        # Note: This still uses a hardcoded path for the CLI.
-        with open("Sample_cover_files/cover_text.txt", "r+") as file1:
-            cover_text = file1.read()
-    except FileNotFoundError:
-        print("Error: 'Sample_cover_files/cover_text.txt' not found.")
+    # Note: This still uses a hardcoded path for the CLI.
+    cover_path = "Sample_cover_files/cover_text.txt"
+    if not os.path.exists(cover_path):
+        print(f"Error: '{cover_path}' not found.")
         return
 
     text1 = input("\nEnter data to be encoded: ")
     
     try:
-        stego_text = encode_message_in_text(cover_text, text1)
-        
         nameoffile = input("\nEnter the name of the Stego file after Encoding (with .txt): ")
-        with open(nameoffile, "w+", encoding="utf-8") as file3:
-            file3.write(stego_text)
+        encode_text_file(cover_path, nameoffile, text1)
         
         print(f"\nStego file '{nameoffile}' has been successfully generated.")
     except ValueError as e:
@@ -128,10 +365,7 @@ def _decode_txt_data_cli():
     """Handles decoding via CLI."""
     stego_file = input("\nPlease enter the stego file name (with extension) to decode: ")
     try:
-        with open(stego_file, "r", encoding="utf-8") as file4:
-            stego_text = file4.read()
-            
-        final_message = decode_message_from_text(stego_text)
+        final_message = decode_text_file(stego_file)
         
         if final_message:
             print(f"\nMessage after decoding from the stego file: {final_message}")
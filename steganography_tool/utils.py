@@ -0,0 +1,129 @@
+# steganography_tool/utils.py
+import contextlib
+import io
+import os
+import numpy as np
+
+# Marks the end of a message in the legacy (pre-header) format
+DELIMITER = b'*^*^*'
+
+def open_binary(source, mode='rb'):
+    """Opens a path, wraps bytes in a file object or passes an open binary file through unchanged."""
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, mode)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    return contextlib.nullcontext(source)
+
+def bytes_to_bits(data):
+    """Unpacks a bytes-like object into a uint8 array of bits, most significant bit first."""
+    return np.unpackbits(np.frombuffer(data, dtype=np.uint8))
+
+# Largest number of low bits that may be replaced in one carrier value
+MAX_BITS_PER_SAMPLE = 4
+
+def capacity_bytes(n_samples, bits_per_sample=1, overhead=0):
+    """Number of message bytes that fit in n_samples carrier values after `overhead` bytes of header.
+
+    The header is written at one bit per value, so this is a lower bound when bits_per_sample > 1.
+    """
+    return max(0, (n_samples - overhead * 8) * bits_per_sample // 8)
+
+def bytes_to_values(data, bits_per_sample=1):
+    """Splits bytes into per-sample values of bits_per_sample bits each, most significant first.
+
+    The last value is zero-padded. With bits_per_sample=1 this is the same as bytes_to_bits.
+    """
+    return bits_to_values(bytes_to_bits(data), bits_per_sample)
+
+def bits_to_values(bits, bits_per_sample=1):
+    """Groups a uint8 bit array into values of bits_per_sample bits each, zero-padding the last one."""
+    if bits_per_sample == 1:
+        return bits
+    groups = np.concatenate([bits, np.zeros(-bits.size % bits_per_sample, dtype=np.uint8)]).reshape(-1, bits_per_sample)
+    # One shift per bit position is much faster than packbits over such short rows
+    values = groups[:, 0].copy()
+    for position in range(1, bits_per_sample):
+        values <<= 1
+        values |= groups[:, position]
+    return values
+
+def values_to_bytes(values, n_bytes, bits_per_sample=1):
+    """Reassembles n_bytes from the low bits_per_sample bits of each value."""
+    values = values & ((1 << bits_per_sample) - 1)
+    if bits_per_sample == 1:
+        return np.packbits(values[:n_bytes * 8]).tobytes()
+    bits = np.empty((values.size, bits_per_sample), dtype=np.uint8)
+    for position in range(bits_per_sample):
+        np.bitwise_and(values >> (bits_per_sample - 1 - position), 1, out=bits[:, position])
+    return np.packbits(bits.reshape(-1)[:n_bytes * 8]).tobytes()
+
+def embed_lsb(carrier, values, start=0, bits_per_sample=1):
+    """Writes values into the low bits of a flat uint8 array in place, starting at element `start`.
+
+    Each value holds bits_per_sample bits (see bytes_to_values); with 1 they are plain bits.
+    """
+    end = start + values.size
+    if end > carrier.size:
+        raise ValueError("Error: Message is too long for this carrier.")
+    target = carrier[start:end]
+    target &= 0xFF ^ ((1 << bits_per_sample) - 1)
+    target |= values
+
+def extract_lsb_bytes(carrier, n_bytes, start=0, bits_per_sample=1):
+    """Reads n_bytes from the low bits of a flat uint8 array, starting at element `start`."""
+    end = start + -(-n_bytes * 8 // bits_per_sample)
+    if end > carrier.size:
+        return None
+    return values_to_bytes(carrier[start:end], n_bytes, bits_per_sample)
+
+def lsb_reader(carrier, start=0):
+    """Returns a read(n, bits_per_sample=1) function that reads consecutive bytes from the low bits of a flat uint8 array."""
+    position = [start]
+
+    def read(n_bytes, bits_per_sample=1):
+        n_bytes = min(n_bytes, (carrier.size - position[0]) * bits_per_sample // 8)
+        data = extract_lsb_bytes(carrier, n_bytes, position[0], bits_per_sample)
+        position[0] += -(-n_bytes * 8 // bits_per_sample)
+        return data
+
+    return read
+
+def chunked_lsb_reader(chunks):
+    """Returns a read(n, bits_per_sample=1) function over an iterator of flat uint8 arrays, pulling chunks only as needed."""
+    pending = [np.empty(0, dtype=np.uint8)]
+
+    def read(n_bytes, bits_per_sample=1):
+        needed = -(-n_bytes * 8 // bits_per_sample)
+        parts = [pending[0]]
+        available = pending[0].size
+        while available < needed:
+            chunk = next(chunks, None)
+            if chunk is None:
+                break
+            parts.append(chunk)
+            available += chunk.size
+        values = np.concatenate(parts)
+        n_bytes = min(n_bytes, values.size * bits_per_sample // 8)
+        used = -(-n_bytes * 8 // bits_per_sample)
+        pending[0] = values[used:]
+        return values_to_bytes(values[:used], n_bytes, bits_per_sample)
+
+    return read
+
+def find_delimited(read, decoded=b'', delimiter=DELIMITER, chunk_bytes=1 << 16):
+    """Reads blocks through read(n) until the delimiter appears and returns the bytes before it, or None.
+
+    `decoded` holds bytes that were already read from the start of the carrier.
+    """
+    decoded = bytearray(decoded)
+    search_from = 0
+    while True:
+        found = decoded.find(delimiter, search_from)
+        if found != -1:
+            return bytes(decoded[:found])
+        search_from = max(0, len(decoded) - len(delimiter) + 1)
+        block = read(chunk_bytes)
+        if not block:
+            return None
+        decoded += block
@@ -0,0 +1,186 @@
+# steganography_tool/video_index.py
+"""Frame index for videos: exact frame count, presentation timestamps and keyframe positions.
+
+The index is built once per file from the container packets, without decoding, and is cached
+by a sampled content hash (see content_hash) in memory and, optionally, as JSON files in a cache directory. With PyAV
+installed, frames are then read by seeking to the nearest keyframe before the target and
+decoding forward, instead of relying on OpenCV's CAP_PROP_POS_FRAMES.
+"""
+import bisect
+import collections
+import hashlib
+import json
+import os
+import warnings
+from dataclasses import asdict, dataclass, field
+
+import cv2
+
+try:
+    import av
+except ImportError:
+    av = None
+
+# Bumped whenever the cached JSON layout changes
+INDEX_VERSION = 2
+# Directory for the on-disk index cache; None keeps the cache in memory only
+INDEX_CACHE_DIR = os.environ.get("DATAVEIL_INDEX_CACHE")
+# Number of indexes kept in memory
+INDEX_CACHE_SIZE = 32
+
+# The content hash reads the file size, its modification time and this many evenly spaced blocks
+_HASH_SAMPLES = 16
+_HASH_BLOCK_SIZE = 1 << 16
+
+_memory_cache = collections.OrderedDict()
+
+@dataclass
+class FrameIndex:
+    """Frame count and size, per-frame timestamps (display order) and keyframe display indices of a video."""
+    frame_count: int
+    keyframes: list = field(default_factory=list)
+    # Presentation timestamps in stream time base, or None if the index was built without PyAV
+    pts: list = None
+    width: int = 0
+    height: int = 0
+
+    def can_seek(self):
+        """Returns True if frames can be located by timestamp with PyAV."""
+        return av is not None and self.pts is not None
+
+    def keyframe_before(self, frame_number):
+        """Returns the last keyframe at or before frame_number."""
+        position = bisect.bisect_right(self.keyframes, frame_number)
+        return self.keyframes[position - 1] if position else 0
+
+def content_hash(path):
+    """Hashes the file size, modification time and evenly spaced blocks of the file; cheap even for very large videos.
+
+    Files larger than the sampled blocks are not read in full, so two of them that differ only
+    between the samples get the same blocks; the size and mtime_ns tell them apart, unless one
+    was edited in place with its modification time restored.
+    """
+    stat = os.stat(path)
+    size = stat.st_size
+    digest = hashlib.blake2b(f"{size}:{stat.st_mtime_ns}".encode('ascii'), digest_size=16)
+    with open(path, 'rb') as f:
+        if size <= _HASH_SAMPLES * _HASH_BLOCK_SIZE:
+            digest.update(f.read())
+        else:
+            step = (size - _HASH_BLOCK_SIZE) // (_HASH_SAMPLES - 1)
+            for sample in range(_HASH_SAMPLES):
+                f.seek(sample * step)
+                digest.update(f.read(_HASH_BLOCK_SIZE))
+    return digest.hexdigest()
+
+def _build_with_av(path):
+    with av.open(path) as container:
+        stream = container.streams.video[0]
+        width, height = stream.codec_context.width, stream.codec_context.height
+        packets = [(packet.pts, packet.is_keyframe) for packet in container.demux(stream)
+                   if packet.size and packet.pts is not None]
+    packets.sort()
+    return FrameIndex(len(packets), [n for n, (_, keyframe) in enumerate(packets) if keyframe],
+                      [pts for pts, _ in packets], width, height)
+
+def _build_with_cv2(path):
+    vidcap = cv2.VideoCapture(path)
+    if not vidcap.isOpened():
+        raise IOError("Could not open video file for indexing.")
+    try:
+        width = int(vidcap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(vidcap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        # CAP_PROP_FRAME_COUNT is an estimate for many containers, so count the frames
+        frame_count = 0
+        while vidcap.grab():
+            frame_count += 1
+    finally:
+        vidcap.release()
+    return FrameIndex(frame_count, [0], None, width, height)
+
+def build_index(path):
+    """Reads the packets of the first video stream and returns its FrameIndex."""
+    if av is not None:
+        try:
+            return _build_with_av(path)
+        except (av.FFmpegError, IndexError):
+            pass # Fall back to OpenCV for files PyAV cannot demux
+    return _build_with_cv2(path)
+
+def _cache_path(cache_dir, digest):
+    return os.path.join(cache_dir, f"{digest}.json")
+
+def _read_cached(cache_dir, digest):
+    try:
+        with open(_cache_path(cache_dir, digest), 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cached.pop('version', None) != INDEX_VERSION:
+        return None
+    return FrameIndex(**cached)
+
+def _write_cached(cache_dir, digest, index):
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write to a temporary name first so readers never see a partial file
+        temp_path = _cache_path(cache_dir, digest) + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(dict(asdict(index), version=INDEX_VERSION), f)
+        os.replace(temp_path, _cache_path(cache_dir, digest))
+    except OSError as e:
+        warnings.warn(f"Could not write the frame index cache: {e}")
+
+def load_index(path, cache_dir=None):
+    """Returns the FrameIndex of a video, building it only if no cached copy matches its content.
+
+    cache_dir defaults to INDEX_CACHE_DIR; the in-memory cache is always used.
+    """
+    cache_dir = cache_dir or INDEX_CACHE_DIR
+    digest = content_hash(path)
+    index = _memory_cache.get(digest)
+    if index is None and cache_dir:
+        index = _read_cached(cache_dir, digest)
+    if index is None:
+        index = build_index(path)
+        if cache_dir:
+            _write_cached(cache_dir, digest, index)
+
+    _memory_cache[digest] = index
+    _memory_cache.move_to_end(digest)
+    while len(_memory_cache) > INDEX_CACHE_SIZE:
+        _memory_cache.popitem(last=False)
+    return index
+
+def clear_cache():
+    """Empties the in-memory index cache."""
+    _memory_cache.clear()
+
+def iter_frames(path, frames, index, pix_fmt='bgr24'):
+    """Yields the flattened frames listed in `frames`, in that order, seeking to the nearest keyframe.
+
+    Frames are converted to pix_fmt; 'bgr24' matches the frames OpenCV returns. Needs index.can_seek().
+    """
+    with av.open(path) as container:
+        stream = container.streams.video[0]
+        decoded = None
+        position = None # Display index of the next frame the decoder returns
+        for frame_number in frames:
+            keyframe = index.keyframe_before(frame_number)
+            if position is None or frame_number < position or keyframe > position:
+                # Seek when going backwards or when a keyframe lies between here and the target
+                container.seek(index.pts[keyframe], stream=stream, backward=True)
+                decoded = container.decode(stream)
+                position = keyframe
+
+            target_pts = index.pts[frame_number]
+            for frame in decoded:
+                if frame.pts is None or frame.pts < target_pts:
+                    continue
+                if frame.pts > target_pts:
+                    break
+                position = frame_number + 1
+                yield frame.to_ndarray(format=pix_fmt).reshape(-1)
+                break
+            if position != frame_number + 1:
+                raise IOError(f"Could not read frame {frame_number}.")
@@ -0,0 +1,301 @@
+# steganography_tool/video_remux.py
+"""Packet-level passthrough for H.264 videos (requires PyAV).
+
+Only the GOPs that contain payload frames are decoded and re-encoded, losslessly, as
+H.264 High 4:4:4 Predictive; every other packet, and every other stream, is copied as is.
+The 4:4:4 chroma format forces decoders to re-initialise at the re-encoded GOP, and the
+original parameter sets are repeated in-band where the original GOPs resume.
+
+Payload bits are stored in the LSBs of the decoded Y, U and V planes, so they must be
+read back through PyAV in the native pixel format, not through OpenCV's BGR conversion.
+"""
+import struct
+from fractions import Fraction
+
+import numpy as np
+from . import scatter_utils, utils
+
+try:
+    import av
+except ImportError:
+    av = None
+
+# NAL unit type of an H.264 IDR slice; GOPs are split there, so no packet references across a split
+_NAL_IDR = 5
+_LOSSLESS_PIX_FMT = 'yuv444p'
+
+def is_available():
+    """Returns True if PyAV is installed."""
+    return av is not None
+
+def _require_av():
+    if av is None:
+        raise ImportError("Passthrough mode needs PyAV. Install it with 'pip install av'.")
+
+def is_h264(path):
+    """Returns True if PyAV is installed and the first video stream of the file is H.264."""
+    if av is None:
+        return False
+    try:
+        with av.open(path) as container:
+            return bool(container.streams.video) and container.streams.video[0].codec_context.name == 'h264'
+    except av.FFmpegError:
+        return False
+
+def _nal_length_size(extradata):
+    """Returns the NAL length prefix size from an avcC record."""
+    return (extradata[4] & 0x03) + 1
+
+def _split_nals(data, length_size):
+    """Splits a length-prefixed packet into NAL units."""
+    nals = []
+    position = 0
+    while position + length_size <= len(data):
+        length = int.from_bytes(data[position:position + length_size], 'big')
+        position += length_size
+        nals.append(data[position:position + length])
+        position += length
+    return nals
+
+def _join_nals(nals, length_size):
+    """Builds a length-prefixed packet from NAL units."""
+    return b''.join(len(nal).to_bytes(length_size, 'big') + nal for nal in nals)
+
+def _annexb_nals(data):
+    """Splits an Annex B byte stream (start-code delimited) into NAL units."""
+    nals = []
+    for part in data.split(b'\x00\x00\x01'):
+        part = part.rstrip(b'\x00')  # Drops the leading zero of 4-byte start codes
+        if part:
+            nals.append(part)
+    return nals
+
+def _parameter_sets(extradata):
+    """Returns the SPS and PPS NAL units stored in an avcC record."""
+    nals = []
+    position = 5
+    for count_mask in (0x1F, 0xFF):
+        count = extradata[position] & count_mask
+        position += 1
+        for _ in range(count):
+            length = struct.unpack_from('>H', extradata, position)[0]
+            nals.append(bytes(extradata[position + 2:position + 2 + length]))
+            position += 2 + length
+    return nals
+
+def _is_idr(data, length_size):
+    return any(nal and nal[0] & 0x1F == _NAL_IDR for nal in _split_nals(data, length_size))
+
+def probe(path):
+    """Reads the video packet layout without decoding anything.
+
+    Returns a dict with the frame count, frame size and the GOPs as lists of packet
+    indices, plus the display index of every packet.
+    """
+    _require_av()
+    with av.open(path) as container:
+        stream = container.streams.video[0]
+        codec = stream.codec_context
+        if codec.name != 'h264' or not codec.extradata:
+            raise ValueError("Error: Passthrough mode supports H.264 videos in MP4/MKV/MOV containers only.")
+        length_size = _nal_length_size(codec.extradata)
+
+        pts = []
+        gops = []
+        for packet in container.demux(stream):
+            if packet.size == 0 or packet.pts is None:
+                continue
+            if not gops or _is_idr(bytes(packet), length_size):
+                gops.append([])
+            gops[-1].append(len(pts))
+            pts.append(packet.pts)
+
+        order = sorted(range(len(pts)), key=pts.__getitem__)
+        display_index = [0] * len(pts)
+        for index, packet_number in enumerate(order):
+            display_index[packet_number] = index
+
+        return {
+            'frame_count': len(pts),
+            'width': codec.width,
+            'height': codec.height,
+            'gops': gops,
+            'display_index': display_index,
+        }
+
+def frame_capacity_values(info):
+    """Number of carrier values one frame has in the lossless 4:4:4 planes."""
+    return info['width'] * info['height'] * 3
+
+def _lossless_encoder(stream):
+    encoder = av.CodecContext.create('libx264', 'w')
+    encoder.width = stream.codec_context.width
+    encoder.height = stream.codec_context.height
+    encoder.pix_fmt = _LOSSLESS_PIX_FMT
+    encoder.time_base = stream.time_base or Fraction(1, 90000)
+    # qp 0 is lossless; no B-frames keeps decode order equal to display order
+    encoder.options = {'qp': '0', 'x264-params': 'bframes=0:keyint=infinite'}
+    return encoder
+
+def _reencode_gop(stream, packets, first_index, chunks, length_size, bits_per_sample=1, scattering=None):
+    """Decodes one GOP, embeds chunks[n] into display frame n and re-encodes it losslessly."""
+    decoder = av.CodecContext.create(stream.codec_context.name, 'r')
+    decoder.extradata = stream.codec_context.extradata
+    frames = []
+    for packet in packets:
+        frames.extend(decoder.decode(packet))
+    frames.extend(decoder.decode(None))
+    frames.sort(key=lambda frame: frame.pts)
+
+    encoder = _lossless_encoder(stream)
+    encoded = []
+    for offset, frame in enumerate(frames):
+        planes = np.ascontiguousarray(frame.to_ndarray(format=_LOSSLESS_PIX_FMT))
+        values = chunks.get(first_index + offset)
+        if values is not None:
+            if scattering is None:
+                utils.embed_lsb(planes.reshape(-1), values, bits_per_sample=bits_per_sample)
+            else:
+                scatter_utils.embed(planes.reshape(-1), values, scattering, bits_per_sample=bits_per_sample)
+        new_frame = av.VideoFrame.from_ndarray(planes, format=_LOSSLESS_PIX_FMT)
+        new_frame.pts = frame.pts
+        new_frame.time_base = encoder.time_base
+        encoded.extend(encoder.encode(new_frame))
+    encoded.extend(encoder.encode(None))
+
+    # Reuse the original decode timestamps so the stream stays monotonic
+    dts_values = sorted(packet.dts for packet in packets)
+    result = []
+    for encoded_packet, dts in zip(encoded, dts_values):
+        packet = av.Packet(_join_nals(_annexb_nals(bytes(encoded_packet)), length_size))
+        packet.pts = encoded_packet.pts
+        packet.dts = dts
+        packet.time_base = encoder.time_base
+        packet.is_keyframe = encoded_packet.is_keyframe
+        result.append(packet)
+    return result
+
+def _with_parameter_sets(packet, parameter_sets, length_size):
+    """Returns a copy of a packet with the original SPS/PPS repeated in front of it."""
+    new_packet = av.Packet(_join_nals(parameter_sets, length_size) + bytes(packet))
+    new_packet.pts = packet.pts
+    new_packet.dts = packet.dts
+    new_packet.time_base = packet.time_base
+    new_packet.is_keyframe = packet.is_keyframe
+    return new_packet
+
+def _gop_layout(info):
+    """Maps every packet to its GOP and every GOP to its first display index."""
+    gop_of_packet = [0] * info['frame_count']
+    first_index = []
+    for gop_number, gop in enumerate(info['gops']):
+        for packet_number in gop:
+            gop_of_packet[packet_number] = gop_number
+        first_index.append(min(info['display_index'][number] for number in gop))
+    return gop_of_packet, first_index
+
+def remux(in_path, out_path, chunks, info=None, bits_per_sample=1, scattering=None):
+    """Writes a Matroska copy of the video with the values chunks[n] embedded in display frame n.
+
+    Only the GOPs holding payload frames are re-encoded; all other video packets and the
+    audio streams are copied without decoding. scattering, a scatter_utils.Scatter, places each
+    frame's values at its positions instead of in order.
+    """
+    _require_av()
+    info = info or probe(in_path)
+    gop_of_packet, first_index = _gop_layout(info)
+    target_gops = {gop_number for gop_number, gop in enumerate(info['gops'])
+                   if any(info['display_index'][number] in chunks for number in gop)}
+
+    with av.open(in_path) as container, av.open(out_path, 'w', format='matroska') as out:
+        video = container.streams.video[0]
+        length_size = _nal_length_size(video.codec_context.extradata)
+        parameter_sets = _parameter_sets(video.codec_context.extradata)
+        audio = list(container.streams.audio)
+        out_streams = {stream.index: out.add_stream_from_template(stream) for stream in [video] + audio}
+
+        packet_number = 0
+        pending = []
+        resume_with_parameter_sets = False
+        for packet in container.demux([video] + audio):
+            if packet.dts is None and packet.size == 0:
+                continue # Flush packets
+            if packet.stream.index != video.index:
+                packet.stream = out_streams[packet.stream.index]
+                out.mux(packet)
+                continue
+            if packet.size == 0 or packet.pts is None:
+                continue
+
+            gop_number = gop_of_packet[packet_number]
+            packet_number += 1
+            if gop_number in target_gops:
+                pending.append(packet)
+                if len(pending) == len(info['gops'][gop_number]):
+                    for new_packet in _reencode_gop(video, pending, first_index[gop_number], chunks, length_size,
+                                                   bits_per_sample, scattering):
+                        new_packet.stream = out_streams[video.index]
+                        out.mux(new_packet)
+                    pending = []
+                    resume_with_parameter_sets = True
+                continue
+
+            if resume_with_parameter_sets:
+                # The re-encoded GOP replaced the decoder's parameter sets
+                packet = _with_parameter_sets(packet, parameter_sets, length_size)
+                resume_with_parameter_sets = False
+            packet.stream = out_streams[video.index]
+            out.mux(packet)
+
+def iter_native_frames(path, frames, info=None):
+    """Yields the flattened 4:4:4 planes of the display frames listed in `frames`, in that order.
+
+    Only the GOPs that contain requested frames are decoded.
+    """
+    _require_av()
+    info = info or probe(path)
+    gop_of_packet, first_index = _gop_layout(info)
+    wanted = set(frames)
+    wanted_gops = {gop_number for gop_number, gop in enumerate(info['gops'])
+                   if any(info['display_index'][number] in wanted for number in gop)}
+
+    decoded = {}
+    next_position = 0
+    with av.open(path) as container:
+        video = container.streams.video[0]
+        packet_number = 0
+        pending = []
+        for packet in container.demux(video):
+            if packet.size == 0 or packet.pts is None:
+                continue
+            gop_number = gop_of_packet[packet_number]
+            packet_number += 1
+            if gop_number not in wanted_gops:
+                continue
+            pending.append(packet)
+            if len(pending) < len(info['gops'][gop_number]):
+                continue
+
+            decoder = av.CodecContext.create(video.codec_context.name, 'r')
+            decoder.extradata = video.codec_context.extradata
+            gop_frames = []
+            for gop_packet in pending:
+                gop_frames.extend(decoder.decode(gop_packet))
+            gop_frames.extend(decoder.decode(None))
+            gop_frames.sort(key=lambda frame: frame.pts)
+            pending = []
+
+            for offset, frame in enumerate(gop_frames):
+                if first_index[gop_number] + offset in wanted:
+                    planes = np.ascontiguousarray(frame.to_ndarray(format=_LOSSLESS_PIX_FMT))
+                    decoded[first_index[gop_number] + offset] = planes.reshape(-1)
+
+            # Hand out frames in the requested order as soon as they are available
+            while next_position < len(frames) and frames[next_position] in decoded:
+                yield decoded.pop(frames[next_position])
+                next_position += 1
+            if next_position == len(frames):
+                return
+
+    if next_position < len(frames):
+        raise IOError(f"Could not read frame {frames[next_position]}.")
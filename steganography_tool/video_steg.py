@@ -1,102 +1,279 @@
 # steganography_tool/video_steg.py
+import contextlib
 import cv2
+import hashlib
+import io
+import itertools
 import numpy as np
-import tempfile
 import os
+import queue
+import random
+import shutil
+import tempfile
+import threading
+from collections.abc import Mapping
+from concurrent.futures import Future, ProcessPoolExecutor
 # Use a relative import to get the updated crypto functions
-from . import crypto_utils
-
-def msgtobinary(msg):
-    """Converts a message to its binary representation."""
-    if type(msg) == str:
-        return ''.join([format(ord(i), "08b") for i in msg])
-    elif type(msg) == bytes or type(msg) == np.ndarray:
-        return [format(i, "08b") for i in msg]
-    elif type(msg) == int or type(msg) == np.uint8:
-        return format(msg, "08b")
-    else:
-        raise TypeError("Input type not supported")
+from . import crypto_utils, payload, scatter_utils, utils, video_index, video_remux
+
+# --- Frame selection ---
+
+def parse_frame_spec(spec, total_frames=None, key=None):
+    """Turns a frame spec into the ordered list of frame numbers that carry the payload.
+
+    A spec is a frame number or a comma-separated list of:
+      "12"          a single frame
+      "10-50"       an inclusive range
+      "0:300:10"    a start:stop[:step] slice (stop is exclusive and may be omitted)
+      "random:20"   20 frames picked pseudo-randomly from the whole video, seeded by the key
+    """
+    if isinstance(spec, (int, np.integer)):
+        return [int(spec)]
+
+    frames = []
+    for part in str(spec).replace(' ', '').split(','):
+        if not part:
+            continue
+        try:
+            if part.startswith('random:'):
+                if key is None:
+                    raise ValueError("Error: A key is required to pick random frames.")
+                if not total_frames:
+                    raise ValueError("Error: Could not determine the video frame count for random frames.")
+                count = int(part[len('random:'):])
+                seed = hashlib.sha256(b'frames' + crypto_utils._prepare_key(key)).digest()
+                frames.extend(sorted(random.Random(seed).sample(range(total_frames), min(count, total_frames))))
+            elif ':' in part:
+                start, stop, *step = part.split(':')
+                if not stop and not total_frames:
+                    raise ValueError("Error: Could not determine the video frame count for an open-ended range.")
+                stop = int(stop) if stop else total_frames
+                frames.extend(range(int(start or 0), stop, int(step[0]) if step and step[0] else 1))
+            elif '-' in part:
+                start, stop = part.split('-')
+                frames.extend(range(int(start), int(stop) + 1))
+            else:
+                frames.append(int(part))
+        except (TypeError, ValueError) as e:
+            if str(e).startswith("Error:"):
+                raise
+            raise ValueError(f"Error: Invalid frame spec '{part}'.")
+
+    if not frames:
+        raise ValueError("Error: The frame spec does not select any frames.")
+    if len(set(frames)) != len(frames) or any(frame < 0 for frame in frames):
+        raise ValueError("Error: The frame spec must select distinct, non-negative frame numbers.")
+    return frames
 
 # --- Core Logic for GUI ---
 
-def _embed_data_in_frame(frame, secret_message, key):
-    """Embeds encrypted data into a single video frame."""
-    data = crypto_utils.encryption(secret_message, key)
-    print(f"The encrypted data is: {data}")
+# Frames buffered between the reader, the embedding workers and the writer
+PIPELINE_QUEUE_SIZE = 16
+# Block size used when copying video files in and out
+STREAM_CHUNK_BYTES = 1 << 20
 
-    if len(data) == 0:
-        raise ValueError('Data is empty')
+def _embed_bits_in_frame(frame, values, bits_per_sample=1, scattering=None):
+    """Writes payload values into the low bits of a copy of one frame. Runs in a worker process.
 
-    data += '*^*^*'
-    binary_data = msgtobinary(data)
+    With a scatter_utils.Scatter the values go to its pixels instead of the leading ones.
+    """
+    frame_copy = frame.copy()
+    if scattering is None:
+        utils.embed_lsb(frame_copy.reshape(-1), values, bits_per_sample=bits_per_sample)
+    else:
+        scatter_utils.embed(frame_copy.reshape(-1), values, scattering, bits_per_sample=bits_per_sample)
+    return frame_copy
 
-    # Check for space
-    max_bytes = (frame.shape[0] * frame.shape[1] * 3) // 8
-    if len(data) > max_bytes:
-        raise ValueError("Error: Message is too large for a single video frame.")
+def _transcode_frames(vidcap, out, chunks, workers, bits_per_sample=1, scattering=None):
+    """Copies every frame from vidcap to out, embedding chunks[n] into frame n. Returns the frame count.
 
-    data_index = 0
-    frame_copy = frame.copy()
+    A reader and a writer thread keep the capture and the writer busy while the frames that
+    carry data are embedded in a process pool; the writer resolves them in their original order.
+    """
+    read_queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    write_queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    errors = []
 
-    for row in frame_copy:
-        for pixel in row:
-            r, g, b = msgtobinary(pixel)
-            if data_index < len(binary_data):
-                pixel[0] = int(r[:-1] + binary_data[data_index], 2)
-                data_index += 1
-            if data_index < len(binary_data):
-                pixel[1] = int(g[:-1] + binary_data[data_index], 2)
-                data_index += 1
-            if data_index < len(binary_data):
-                pixel[2] = int(b[:-1] + binary_data[data_index], 2)
-                data_index += 1
-            if data_index >= len(binary_data):
+    def reader():
+        while True:
+            ret, frame = vidcap.read()
+            read_queue.put(frame if ret else None)
+            if not ret:
+                return
+
+    def writer():
+        while True:
+            item = write_queue.get()
+            if item is None:
+                return
+            try:
+                if not errors:
+                    out.write(item.result() if isinstance(item, Future) else item)
+            except Exception as e:
+                errors.append(e) # Keep draining so the producer never blocks
+
+    # A single frame is embedded inline; starting a pool for it would only add latency
+    executor = None
+    if len(chunks) > 1 and workers != 1:
+        executor = ProcessPoolExecutor(max_workers=workers)
+
+    threads = [threading.Thread(target=reader, daemon=True), threading.Thread(target=writer, daemon=True)]
+    for thread in threads:
+        thread.start()
+
+    current_frame = 0
+    frame = True
+    try:
+        while True:
+            frame = read_queue.get()
+            if frame is None:
                 break
-        if data_index >= len(binary_data):
-            break
-    return frame_copy
-
-def _extract_data_from_frame(frame, key):
-    """Extracts and decrypts data from a single video frame."""
-    data_binary = ""
-    decoded_data = ""
-    delimiter = "*^*^*"
-
-    for row in frame:
-        for pixel in row:
-            r, g, b = msgtobinary(pixel)
-            for bit in [r[-1], g[-1], b[-1]]:
-                data_binary += bit
-                if len(data_binary) == 8:
-                    try:
-                        decoded_char = chr(int(data_binary, 2))
-                        decoded_data += decoded_char
-                    except ValueError:
-                        pass # Ignore non-ASCII bytes
-                    data_binary = ""
-
-                    if decoded_data.endswith(delimiter):
-                        final_msg = crypto_utils.decryption(decoded_data[:-len(delimiter)], key)
-                        return final_msg
-    return None
-
-def encode_message_in_video(video_bytes, secret_message, frame_number, key):
-    """Hides data in a specific frame of a video using a lossless codec. Returns new video as bytes."""
-
-    # Create a temporary file for the input video
-    # Use .tmp extension to avoid potential conflicts if input is also .avi
+            if current_frame in chunks:
+                print(f"Embedding data in frame {current_frame}")
+                if executor is not None:
+                    frame = executor.submit(_embed_bits_in_frame, frame, chunks[current_frame], bits_per_sample, scattering)
+                else:
+                    frame = _embed_bits_in_frame(frame, chunks[current_frame], bits_per_sample, scattering)
+            write_queue.put(frame)
+            current_frame += 1
+    finally:
+        # Let the reader finish even if we stopped early, then flush the writer
+        while frame is not None:
+            frame = read_queue.get()
+        write_queue.put(None)
+        for thread in threads:
+            thread.join()
+        if executor is not None:
+            executor.shutdown()
+
+    if errors:
+        raise errors[0]
+    return current_frame
+
+def _iter_selected_frames(vidcap, frames):
+    """Yields the flattened frames listed in `frames`, in that order, decoding as little as possible."""
+    position = None
+    for frame_number in frames:
+        if position is None or frame_number < position:
+            # Seek for the first frame and whenever the spec goes backwards
+            vidcap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+            position = frame_number
+        while position < frame_number:
+            if not vidcap.grab():
+                raise IOError(f"Could not read frame {frame_number}.")
+            position += 1
+        ret, frame = vidcap.read()
+        if not ret:
+            raise IOError(f"Could not read frame {frame_number}.")
+        position += 1
+        yield np.ascontiguousarray(frame).reshape(-1)
+
+def _decode_video_payload(header, data, key):
+    """Turns the payload read from the frames into the message string."""
+    if header is None:
+        # Legacy frames always hold RC4 output
+        if key is None:
+            raise ValueError("Error: The hidden message is encrypted. Please provide the key.")
+        return crypto_utils.decrypt_bytes(data, key).decode('latin-1')
+    return payload.decode_message(header, data, key)
+
+def _frames_needed(value_count, frames, frame_values):
+    """Returns the leading frames of the spec that a payload of value_count carrier values fills."""
+    frames_needed = -(-value_count // frame_values)
+    if frames_needed > len(frames):
+        if len(frames) == 1:
+            raise ValueError("Error: Message is too large for a single video frame.")
+        raise ValueError(f"Error: Message needs {frames_needed} frames but the spec selects only {len(frames)}.")
+    return frames[:frames_needed]
+
+def _split_payload(secret_message, frames, frame_values, key, bits_per_sample=1, compression=None):
+    """Builds the payload and splits its carrier values across the selected frames; returns {frame: values}."""
+    data = payload.build_message(secret_message, key=key, bits_per_sample=bits_per_sample,
+                                 compression=compression)
+    values = payload.sample_values(data, bits_per_sample)
+    return {frame: values[i * frame_values:(i + 1) * frame_values]
+            for i, frame in enumerate(_frames_needed(values.size, frames, frame_values))}
+
+class _StagedChunks(Mapping):
+    """{frame: values} view of a payload.StagedPayload; each frame's values are read only when it is embedded."""
+    def __init__(self, staged, frames, frame_values):
+        self._staged = staged
+        self._frame_values = frame_values
+        self._positions = {frame: i for i, frame in enumerate(_frames_needed(staged.value_count, frames, frame_values))}
+
+    def __getitem__(self, frame):
+        return self._staged.values(self._positions[frame] * self._frame_values, self._frame_values)
+
+    def __contains__(self, frame):
+        # Mapping would look the frame up with __getitem__, reading its share of the payload
+        return frame in self._positions
+
+    def __iter__(self):
+        return iter(self._positions)
+
+    def __len__(self):
+        return len(self._positions)
+
+@contextlib.contextmanager
+def _as_path(source):
+    """Yields a filesystem path for a path or a readable file object.
+
+    OpenCV and PyAV open files by name, so file objects are copied to a temporary file once.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        yield os.fspath(source)
+        return
     with tempfile.NamedTemporaryFile(delete=False, suffix='.tmp') as temp_in:
-        temp_in.write(video_bytes)
+        shutil.copyfileobj(source, temp_in, STREAM_CHUNK_BYTES)
         temp_in_path = temp_in.name
-
-    # Create a temporary file for the output video (always .avi for FFV1)
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.avi') as temp_out:
-        temp_out_path = temp_out.name
+    try:
+        yield temp_in_path
+    finally:
+        os.unlink(temp_in_path)
+
+def capacity(source, frame_number=None, bits_per_sample=1, overhead=None, key=None):
+    """Returns how many message bytes a video can hold, reading only the container (no frames are decoded).
+
+    source is a path, a file object or the file bytes. frame_number limits the count to the frames
+    a frame spec selects (all frames if None). overhead defaults to the unencrypted payload header.
+    Both the FFV1 and the passthrough mode store 3 values per pixel.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    with _as_path(source) as source_path:
+        index = video_index.load_index(source_path)
+    n_frames = index.frame_count
+    if frame_number is not None:
+        n_frames = sum(frame < index.frame_count for frame in parse_frame_spec(frame_number, index.frame_count, key))
+    if overhead is None:
+        overhead = payload.overhead(bits_per_sample=bits_per_sample)
+    return utils.capacity_bytes(n_frames * index.width * index.height * 3, bits_per_sample, overhead)
+
+def _encode_passthrough(source_path, destination, make_chunks, frame_number, key, bits_per_sample=1, scatter=False):
+    """Embeds the payload by re-encoding only the GOPs that hold it, writing an MKV video to destination."""
+    info = video_remux.probe(source_path)
+    # The native planes are stored one after another, so every value is a unit of its own
+    scattering = scatter_utils.Scatter(video_remux.frame_capacity_values(info), key) if scatter else None
+    frames = parse_frame_spec(frame_number, info['frame_count'], key)
+    if max(frames) >= info['frame_count']:
+        raise ValueError(f"Error: Frame number {max(frames)} is out of range. Video only has {info['frame_count']} frames (0-{info['frame_count']-1}).")
+    chunks = make_chunks(frames, video_remux.frame_capacity_values(info))
+    video_remux.remux(source_path, destination, chunks, info, bits_per_sample, scattering)
+
+def _encode_video(source_path, destination, make_chunks, frame_number, key, workers=None, passthrough=False,
+                  bits_per_sample=1, scatter=False):
+    """Embeds make_chunks(frames, values per frame) -> {frame: values} into a video file on disk.
+
+    With scatter=True every frame's values are spread over its pixels in the same key-seeded order.
+    """
+    if passthrough:
+        _encode_passthrough(source_path, destination, make_chunks, frame_number, key, bits_per_sample, scatter)
+        return
 
     vidcap = None
     out = None
     try:
-        vidcap = cv2.VideoCapture(temp_in_path)
+        vidcap = cv2.VideoCapture(source_path)
         if not vidcap.isOpened():
             raise IOError("Could not open input video file for reading.")
 
@@ -113,43 +290,22 @@ def encode_message_in_video(video_bytes, secret_message, frame_number, key):
 
         if frame_width == 0 or frame_height == 0:
              raise ValueError("Could not read video dimensions.")
+        scattering = scatter_utils.Scatter(frame_width * frame_height * 3, key, 3) if scatter else None
+
+        frames = parse_frame_spec(frame_number, video_index.load_index(source_path).frame_count, key)
 
-        out = cv2.VideoWriter(temp_out_path, fourcc, fps, size)
+        # Split the payload bits across the selected frames
+        chunks = make_chunks(frames, frame_width * frame_height * 3)
+
+        out = cv2.VideoWriter(os.fspath(destination), fourcc, fps, size)
         if not out.isOpened():
             raise IOError("Could not open video writer for the output file.")
 
-        current_frame = 0
-        while True: # Use True loop and break on ret false
-            ret, frame = vidcap.read()
-            if not ret:
-                break # End of video
-
-            if current_frame == frame_number:
-                print(f"Embedding data in frame {frame_number}")
-                try:
-                    frame = _embed_data_in_frame(frame, secret_message, key)
-                except ValueError as e: # Catch potential size error early
-                     raise e
-
-            out.write(frame)
-            current_frame += 1
+        current_frame = _transcode_frames(vidcap, out, chunks, workers, bits_per_sample, scattering)
 
         # Check frame number validity *after* processing
-        if frame_number >= current_frame:
-            raise ValueError(f"Error: Frame number {frame_number} is out of range. Video only has {current_frame} frames (0-{current_frame-1}).")
-
-        # Release resources *before* reading output file
-        vidcap.release()
-        out.release()
-        vidcap = None
-        out = None
-
-
-        # Read the bytes from the output temp file
-        with open(temp_out_path, 'rb') as f:
-            output_video_bytes = f.read()
-
-        return output_video_bytes
+        if max(chunks) >= current_frame:
+            raise ValueError(f"Error: Frame number {max(chunks)} is out of range. Video only has {current_frame} frames (0-{current_frame-1}).")
 
     finally:
         # Ensure resources are released even if errors occurred
@@ -157,60 +313,148 @@ def encode_message_in_video(video_bytes, secret_message, frame_number, key):
             vidcap.release()
         if out is not None and out.isOpened():
             out.release()
-        # Clean up temporary files
-        if 'temp_in_path' in locals() and os.path.exists(temp_in_path):
-            os.unlink(temp_in_path)
-        if 'temp_out_path' in locals() and os.path.exists(temp_out_path):
-            os.unlink(temp_out_path)
 
+def encode_video_file(source, destination, secret_message, frame_number, key=None, workers=None, passthrough=False,
+                      bits_per_sample=1, compression=None, scatter=False):
+    """Hides data in one or more frames of a video file and writes the stego video to destination.
+
+    source is a path or a readable file object; destination is a path (.avi for the default FFV1
+    output, .mkv for passthrough). frame_number is a single frame or a frame spec (see
+    parse_frame_spec); the encrypted payload is split across the selected frames in order.
+    workers sets the size of the embedding process pool; bits_per_sample (1-4) sets how many
+    low bits of each channel value carry the message; compression names a codec from
+    compress_utils to shrink the message first; scatter=True (needs a key) spreads each frame's
+    share over its pixels in a key-seeded order instead of filling the leading ones.
+    With passthrough=True (H.264 input, needs PyAV) only the GOPs holding the payload are re-encoded
+    and the rest of the video is copied packet by packet into an MKV file.
+    """
+    if len(secret_message) == 0:
+        raise ValueError('Data is empty')
 
-def decode_message_from_video(video_bytes, frame_number, key):
-    """Extracts data from a specific frame of a video."""
+    with _as_path(source) as source_path:
+        _encode_video(source_path, destination,
+                      lambda frames, frame_values: _split_payload(secret_message, frames, frame_values, key,
+                                                                  bits_per_sample, compression),
+                      frame_number, key, workers, passthrough, bits_per_sample, scatter)
 
-    # Create a temporary file for the input video (can be .avi or original format)
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.tmp') as temp_in:
-        temp_in.write(video_bytes)
-        temp_in_path = temp_in.name
+def iter_encoded_video(source, secret_message, frame_number, key=None, workers=None, passthrough=False,
+                       chunk_size=STREAM_CHUNK_BYTES, bits_per_sample=1, compression=None, scatter=False):
+    """Encodes like encode_video_file and yields the stego video in chunks of chunk_size bytes.
 
-    vidcap = None
+    The video writers need a seekable file, so the output is staged in one temporary file that
+    is deleted once the last chunk has been yielded.
+    """
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.mkv' if passthrough else '.avi') as temp_out:
+        temp_out_path = temp_out.name
     try:
-        vidcap = cv2.VideoCapture(temp_in_path)
-        if not vidcap.isOpened():
-            raise IOError("Could not open video file for decoding.")
-
-        total_frames = int(vidcap.get(cv2.CAP_PROP_FRAME_COUNT))
-        if total_frames <= 0 :
-             # Try getting it again if the first read failed
-             vidcap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-             total_frames = int(vidcap.get(cv2.CAP_PROP_FRAME_COUNT))
-             if total_frames <= 0:
-                  raise ValueError("Could not determine video frame count.")
-
-
-        if frame_number >= total_frames:
-            raise ValueError(f"Error: Frame number {frame_number} is out of range. Video only has {total_frames} frames (0-{total_frames-1}).")
-
-        # Set the video to the specific frame
-        vidcap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
-        ret, frame = vidcap.read()
-
-        if not ret:
-            raise IOError(f"Could not read frame {frame_number}.")
-
-        # Release before returning
-        vidcap.release()
-        vidcap = None
-
-        # Extract data
-        return _extract_data_from_frame(frame, key)
+        encode_video_file(source, temp_out_path, secret_message, frame_number, key, workers, passthrough,
+                          bits_per_sample, compression, scatter)
+        with open(temp_out_path, 'rb') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+    finally:
+        os.unlink(temp_out_path)
+
+def _payload_layout(frames, key, channels):
+    """Returns the flat frames in the order their payload was written: as they are, or scattered.
+
+    Without a key only the sequential layout is possible. With one, a header is looked for in
+    both layouts; the frames the probes share are decoded once and kept until the choice is made.
+    """
+    if key is None:
+        return frames
+    probe, frames = itertools.tee(frames)
+    if payload.parse_header(utils.chunked_lsb_reader(probe)(payload.HEADER_SIZE)) is not None:
+        return frames
+    probe, frames = itertools.tee(frames)
+    scattered = utils.chunked_lsb_reader(scatter_utils.iter_scattered(probe, key, channels))
+    if payload.parse_header(scattered(payload.HEADER_SIZE)) is not None:
+        return scatter_utils.iter_scattered(frames, key, channels)
+    return frames # Legacy frames, or nothing
+
+@contextlib.contextmanager
+def _payload_reader(source_path, frame_number, key):
+    """Yields a read(n, bits_per_sample=1) function over the low bits of the selected frames, decoded lazily,
+    and the list of those frames."""
+    if video_remux.is_h264(source_path):
+        # Written in passthrough mode; the payload is in the native 4:4:4 planes
+        info = video_remux.probe(source_path)
+        frames = parse_frame_spec(frame_number, info['frame_count'], key)
+        if max(frames) >= info['frame_count']:
+            raise ValueError(f"Error: Frame number {max(frames)} is out of range. Video only has {info['frame_count']} frames (0-{info['frame_count']-1}).")
+        yield utils.chunked_lsb_reader(_payload_layout(video_remux.iter_native_frames(source_path, frames, info), key, 1)), frames
+        return
+
+    # The index gives the exact frame count and lets frames be found from the nearest keyframe
+    index = video_index.load_index(source_path)
+    frames = parse_frame_spec(frame_number, index.frame_count, key)
+    if max(frames) >= index.frame_count:
+        raise ValueError(f"Error: Frame number {max(frames)} is out of range. Video only has {index.frame_count} frames (0-{index.frame_count-1}).")
 
+    vidcap = None
+    try:
+        if index.can_seek():
+            selected = video_index.iter_frames(source_path, frames, index)
+        else:
+            vidcap = cv2.VideoCapture(source_path)
+            if not vidcap.isOpened():
+                raise IOError("Could not open video file for decoding.")
+            selected = _iter_selected_frames(vidcap, frames)
+        yield utils.chunked_lsb_reader(_payload_layout(selected, key, 3)), frames
     finally:
-        # Ensure release and cleanup
         if vidcap is not None and vidcap.isOpened():
             vidcap.release()
-        # Clean up temp file
-        if os.path.exists(temp_in_path):
-            os.unlink(temp_in_path)
+
+def decode_video_file(source, frame_number, key=None):
+    """Extracts data from the frame(s) of a video file (path or file object) selected by a frame number or frame spec."""
+    with _as_path(source) as source_path, _payload_reader(source_path, frame_number, key) as (read, frames):
+        # Frames are decoded lazily, only until the payload is complete
+        if len(frames) == 1:
+            # The original release wrote a single frame. Its RC4 output before the delimiter is not
+            # text, so the text probe cannot be used; the scan stops at the end of that frame
+            header, data = payload.read_any_payload(read, check_legacy=False)
+        else:
+            header, data = payload.read_payload(read) or (None, None)
+
+    if data is None:
+        return None
+    return _decode_video_payload(header, data, key)
+
+def encode_message_in_video(video_bytes, secret_message, frame_number, key=None, workers=None, passthrough=False,
+                            bits_per_sample=1, compression=None, scatter=False):
+    """Hides data in one or more frames of a video given as bytes. Returns new video as bytes.
+
+    See encode_video_file for the arguments; use it or iter_encoded_video for large videos.
+    """
+    return b''.join(iter_encoded_video(io.BytesIO(video_bytes), secret_message, frame_number, key, workers, passthrough,
+                                       bits_per_sample=bits_per_sample, compression=compression, scatter=scatter))
+
+def decode_message_from_video(video_bytes, frame_number, key=None):
+    """Extracts data from the frame(s) of a video given as bytes, selected by a frame number or frame spec."""
+    return decode_video_file(io.BytesIO(video_bytes), frame_number, key)
+
+def embed_file(cover_path, secret_path, out_path, frame_number, key=None, workers=None, passthrough=False,
+               bits_per_sample=1, compression=None, scatter=False):
+    """Hides a whole file in the selected frames of a video without loading the file into memory.
+
+    The secret is compressed and encrypted block by block into a temporary file, and each frame
+    reads only its own share of it while the video is transcoded (or remuxed with passthrough).
+    The other arguments match encode_video_file; encryption uses aes-256-gcm.
+    """
+    with payload.stage_payload(secret_path, key=key, bits_per_sample=bits_per_sample, compression=compression) as staged:
+        _encode_video(os.fspath(cover_path), out_path, lambda frames, frame_values: _StagedChunks(staged, frames, frame_values),
+                      frame_number, key, workers, passthrough, bits_per_sample, scatter)
+
+def extract_file(source, out_path, frame_number, key=None):
+    """Writes the payload hidden in the selected frames of a video to out_path incrementally.
+
+    Returns the number of bytes written, or None if the frames hold no payload.
+    """
+    with _as_path(source) as source_path, _payload_reader(source_path, frame_number, key) as (read, _):
+        return payload.extract_to_file(read, out_path, key)
 
 # --- Functions for Command-Line Interface (CLI) ---
 
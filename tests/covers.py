@@ -0,0 +1,94 @@
+# tests/covers.py
+"""Small generated carriers for the tests, and writers for the formats of the original release."""
+import io
+import wave
+
+import cv2
+import numpy as np
+
+from steganography_tool import crypto_utils, text_steg, utils
+
+LEGACY_DELIMITER = '*^*^*'
+
+# --- Covers ---
+
+def make_image(height=64, width=64, channels=3, seed=0):
+    """A noisy uint8 image of the given shape."""
+    return np.random.default_rng(seed).integers(0, 256, size=(height, width, channels), dtype=np.uint8)
+
+def make_wav(n_frames=20000, channels=2, sample_width=2, seed=0, frames=None):
+    """The bytes of a PCM WAV with random samples, or with the given raw frame bytes."""
+    if frames is None:
+        frames = np.random.default_rng(seed).integers(0, 256, n_frames * channels * sample_width, dtype=np.uint8).tobytes()
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as song:
+        song.setnchannels(channels)
+        song.setsampwidth(sample_width)
+        song.setframerate(44100)
+        song.writeframes(frames)
+    return buffer.getvalue()
+
+def wav_frames(audio_bytes):
+    with wave.open(io.BytesIO(audio_bytes), 'rb') as song:
+        return song.readframes(song.getnframes())
+
+def make_text(n_words=2000, seed=0):
+    """Lines of random lower-case words."""
+    rng = np.random.default_rng(seed)
+    words = [''.join(rng.choice(list("abcdefghij"), size=rng.integers(2, 8))) for _ in range(n_words)]
+    return '\n'.join(' '.join(words[i:i + 10]) for i in range(0, n_words, 10))
+
+def make_video(path, n_frames=6, width=64, height=48, seed=0, edit=None):
+    """Writes a lossless FFV1 video of noise frames; edit(n, frame) may return a replacement frame."""
+    rng = np.random.default_rng(seed)
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'FFV1'), 10, (width, height))
+    try:
+        for number in range(n_frames):
+            frame = rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+            writer.write(edit(number, frame) if edit else frame)
+    finally:
+        writer.release()
+    return path
+
+# --- Original release formats: the message, then '*^*^*', one bit per value ---
+
+def legacy_bits(message):
+    return utils.bytes_to_bits((message + LEGACY_DELIMITER).encode('latin-1'))
+
+def legacy_image(message, image=None):
+    """An image as the original encoder left it: the bits in the channel values, in BGR order."""
+    image = make_image() if image is None else image.copy()
+    utils.embed_lsb(image.reshape(-1), legacy_bits(message))
+    return image
+
+def legacy_wav(message, channels=2, sample_width=2):
+    """A WAV as the original encoder left it: the bits in every byte of the frames, whatever the sample width."""
+    frames = np.frombuffer(wav_frames(make_wav(channels=channels, sample_width=sample_width)), dtype=np.uint8).copy()
+    utils.embed_lsb(frames, legacy_bits(message))
+    return make_wav(channels=channels, sample_width=sample_width, frames=frames.tobytes())
+
+def legacy_video(path, message, key, frame_number=0):
+    """A video whose frame holds the RC4-encrypted message and the delimiter, as the original encoder wrote it."""
+    encrypted = crypto_utils.encryption(message, key)
+
+    def edit(number, frame):
+        if number == frame_number:
+            utils.embed_lsb(frame.reshape(-1), legacy_bits(encrypted))
+        return frame
+
+    return make_video(path, edit=edit)
+
+def legacy_text(cover_text, message):
+    """A cover with 12 bits per character, 6 zero-width characters per word and a word of "11" pairs at the end."""
+    bits = []
+    for char in message:
+        code = ord(char)
+        if 32 <= code <= 64:
+            bits.append("0011" + format((code + 48) ^ 170, "08b"))
+        else:
+            bits.append("0110" + format((code - 48) ^ 170, "08b"))
+    bits = ''.join(bits) + "111111111111"
+    words = cover_text.split()
+    stego_words = [words[n] + ''.join(text_steg.ZWC[bits[i:i + 2]] for i in range(12 * n, 12 * n + 12, 2))
+                   for n in range(len(bits) // 12)]
+    return ' '.join(stego_words + words[len(bits) // 12:])
@@ -0,0 +1,58 @@
+# tests/test_bits_per_sample.py
+import pytest
+
+from steganography_tool import audio_steg, image_steg, payload, utils, video_steg
+from tests.covers import make_image, make_video, make_wav
+
+MESSAGE = "k low bits " * 40
+BITS = [1, 2, 3, 4]
+
+@pytest.mark.parametrize("bits_per_sample", BITS)
+def test_field_is_recorded(bits_per_sample):
+    data = payload.build_message("x", bits_per_sample=bits_per_sample)
+    header = payload.parse_header(data)
+    if bits_per_sample == 1:
+        assert header.extension_length == 0
+    else:
+        assert payload._parse_extensions(data[payload.HEADER_SIZE:])[payload.EXT_BITS_PER_SAMPLE] == bytes([bits_per_sample])
+    assert len(data) == 1 + payload.overhead(bits_per_sample=bits_per_sample)
+
+@pytest.mark.parametrize("bits_per_sample", [0, 5])
+def test_out_of_range(bits_per_sample):
+    with pytest.raises(ValueError):
+        payload.build_message("x", bits_per_sample=bits_per_sample)
+
+@pytest.mark.parametrize("bits_per_sample", BITS)
+def test_values_round_trip(bits_per_sample):
+    data = bytes(range(256))
+    values = utils.bytes_to_values(data, bits_per_sample)
+    assert values.max() < 1 << bits_per_sample
+    assert utils.values_to_bytes(values, len(data), bits_per_sample) == data
+
+@pytest.mark.parametrize("bits_per_sample", BITS)
+@pytest.mark.parametrize("key", [None, "secret"])
+def test_image(bits_per_sample, key):
+    cover = make_image()
+    stego = image_steg.encode_message_in_image(cover, MESSAGE, key, bits_per_sample)
+    assert image_steg.decode_message_from_image(stego, key) == MESSAGE
+    # Only the low bits change
+    assert ((cover ^ stego) >> bits_per_sample).max() == 0
+
+@pytest.mark.parametrize("bits_per_sample", BITS)
+def test_audio(bits_per_sample):
+    stego = audio_steg.encode_message_in_audio(make_wav(), MESSAGE, bits_per_sample=bits_per_sample)
+    assert audio_steg.decode_message_from_audio(stego) == MESSAGE
+
+@pytest.mark.parametrize("bits_per_sample", [1, 4])
+def test_video(tmp_path, bits_per_sample):
+    cover, stego = make_video(tmp_path / "cover.avi"), tmp_path / "stego.avi"
+    video_steg.encode_video_file(str(cover), str(stego), MESSAGE, "0", "secret", workers=1, bits_per_sample=bits_per_sample)
+    assert video_steg.decode_video_file(str(stego), "0", "secret") == MESSAGE
+
+@pytest.mark.parametrize("bits_per_sample", BITS)
+def test_capacity_is_exact(bits_per_sample):
+    image = make_image(16, 16)
+    fits = image_steg.capacity(image, bits_per_sample)
+    image_steg.encode_message_in_image(image, b"x" * fits, bits_per_sample=bits_per_sample)
+    with pytest.raises(ValueError):
+        image_steg.encode_message_in_image(image, b"x" * (fits + 1), bits_per_sample=bits_per_sample)
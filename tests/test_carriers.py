@@ -0,0 +1,149 @@
+# tests/test_carriers.py
+"""Round trips through every carrier, with and without a key."""
+import numpy as np
+import pytest
+
+from steganography_tool import audio_steg, image_steg, payload, text_steg, video_index, video_steg
+from tests.covers import make_image, make_text, make_video, make_wav
+
+MESSAGE = "The quick brown fox ✓"
+KEYS = [None, "secret"]
+
+@pytest.mark.parametrize("key", KEYS)
+def test_image(key):
+    stego = image_steg.encode_message_in_image(make_image(), MESSAGE, key)
+    assert image_steg.decode_message_from_image(stego, key) == MESSAGE
+
+@pytest.mark.parametrize("key", KEYS)
+@pytest.mark.parametrize("extension", [".png", ".tiff", ".webp"])
+def test_image_file(tmp_path, key, extension):
+    path = tmp_path / ("stego" + extension)
+    image_steg.save_image(image_steg.encode_message_in_image(make_image(), MESSAGE, key), str(path))
+    assert image_steg.decode_image_file(str(path), key) == MESSAGE
+
+def test_image_too_small():
+    with pytest.raises(ValueError):
+        image_steg.encode_message_in_image(make_image(4, 4), MESSAGE)
+
+def test_image_without_payload():
+    assert image_steg.decode_message_from_image(make_image()) is None
+
+@pytest.mark.parametrize("key", KEYS)
+@pytest.mark.parametrize("sample_width", [1, 2, 3, 4])
+def test_audio(key, sample_width):
+    stego = audio_steg.encode_message_in_audio(make_wav(sample_width=sample_width), MESSAGE, key)
+    assert audio_steg.decode_message_from_audio(stego, key) == MESSAGE
+
+@pytest.mark.parametrize("key", KEYS)
+def test_audio_file(tmp_path, key):
+    cover = tmp_path / "cover.wav"
+    cover.write_bytes(make_wav())
+    streamed, mapped = tmp_path / "streamed.wav", tmp_path / "mapped.wav"
+    audio_steg.encode_audio_file(str(cover), str(streamed), MESSAGE, key=key)
+    audio_steg.encode_audio_mapped(str(cover), str(mapped), MESSAGE, key=key)
+    for path in (streamed, mapped):
+        assert audio_steg.decode_audio_file(str(path), key=key) == MESSAGE
+        assert audio_steg.decode_audio_mapped(str(path), key=key) == MESSAGE
+
+def _changed_bytes(before, after, data_offset):
+    """Offsets into the sample data of the bytes that differ; the bytes before it must not change."""
+    assert len(after) == len(before) and after[:data_offset] == before[:data_offset]
+    before, after = (np.frombuffer(data[data_offset:], dtype=np.uint8) for data in (before, after))
+    changed = np.flatnonzero(before != after)
+    return changed, before[changed] ^ after[changed]
+
+@pytest.mark.parametrize("in_place", [True, False])
+@pytest.mark.parametrize("sample_width, bits_per_sample", [(1, 1), (2, 1), (2, 3), (3, 2)])
+def test_audio_mapped_changes_only_low_bits(tmp_path, in_place, sample_width, bits_per_sample):
+    cover = tmp_path / "cover.wav"
+    cover.write_bytes(make_wav(sample_width=sample_width))
+    original = cover.read_bytes()
+    stego = cover if in_place else tmp_path / "stego.wav"
+    data = payload.build_message(MESSAGE * 20, key="k", bits_per_sample=bits_per_sample)
+    values = payload.sample_values(data, bits_per_sample)
+    # A small chunk size makes the payload span many chunks
+    audio_steg._embed_mapped(str(cover), None if in_place else str(stego), values.size,
+                             lambda start, count: values[start:start + count], bits_per_sample, chunk_values=100)
+    assert audio_steg.decode_audio_mapped(str(stego), "k") == MESSAGE * 20
+    if not in_place:
+        assert cover.read_bytes() == original
+    changed, flipped = _changed_bytes(original, stego.read_bytes(), audio_steg.read_wav_info(original).data_offset)
+    assert changed.size and np.all(changed % sample_width == 0) # The low byte of each little-endian sample
+    assert np.all(flipped < 1 << bits_per_sample)
+    assert changed.max() < values.size * sample_width
+
+@pytest.mark.parametrize("key", KEYS)
+def test_audio_embed_file(tmp_path, key):
+    cover, secret, stego, out = (tmp_path / name for name in ("cover.wav", "secret.bin", "stego.wav", "out.bin"))
+    cover.write_bytes(make_wav())
+    secret.write_bytes(bytes(range(256)) * 10)
+    audio_steg.embed_file(str(cover), str(secret), str(stego), key)
+    assert audio_steg.extract_file(str(stego), str(out), key) == 2560
+    assert out.read_bytes() == secret.read_bytes()
+
+@pytest.mark.parametrize("key", KEYS)
+@pytest.mark.parametrize("scheme", [text_steg.SCHEME_ZWC4, text_steg.SCHEME_ZWC16])
+def test_text(key, scheme):
+    cover = make_text()
+    stego = text_steg.encode_message_in_text(cover, MESSAGE, key, scheme=scheme)
+    assert text_steg.decode_message_from_text(stego, key) == MESSAGE
+    assert stego.split() != cover.split()
+
+@pytest.mark.parametrize("key", KEYS)
+def test_text_file(tmp_path, key):
+    cover = tmp_path / "cover.txt"
+    cover.write_bytes(make_text().replace("\n", "\r\n").encode("utf-8"))
+    stego = tmp_path / "stego.txt"
+    text_steg.encode_text_file(str(cover), str(stego), MESSAGE, key)
+    assert text_steg.decode_text_file(str(stego), key) == MESSAGE
+    # Whitespace, including the line endings, is kept
+    assert stego.read_bytes().count(b"\r\n") == cover.read_bytes().count(b"\r\n")
+
+def test_text_file_in_place(tmp_path):
+    path = tmp_path / "cover.txt"
+    path.write_text(make_text(), encoding="utf-8")
+    text_steg.encode_text_file(str(path), str(path), MESSAGE)
+    assert text_steg.decode_text_file(str(path)) == MESSAGE
+
+def test_text_too_short_leaves_no_output(tmp_path):
+    cover, stego = tmp_path / "cover.txt", tmp_path / "stego.txt"
+    cover.write_text("only a few words", encoding="utf-8")
+    with pytest.raises(ValueError):
+        text_steg.encode_text_file(str(cover), str(stego), MESSAGE * 10)
+    assert list(tmp_path.iterdir()) == [cover]
+
+@pytest.mark.parametrize("key", KEYS)
+@pytest.mark.parametrize("frames", ["2", "1-4"])
+def test_video(tmp_path, key, frames):
+    cover, stego = make_video(tmp_path / "cover.avi"), tmp_path / "stego.avi"
+    message = MESSAGE * (60 if frames == "1-4" else 1) # Spills over into the next frames
+    video_steg.encode_video_file(str(cover), str(stego), message, frames, key, workers=1)
+    assert video_steg.decode_video_file(str(stego), frames, key) == message
+
+def test_video_embed_file(tmp_path):
+    cover, secret, stego, out = (tmp_path / name for name in ("cover.avi", "secret.bin", "stego.avi", "out.bin"))
+    make_video(cover)
+    secret.write_bytes(bytes(range(256)) * 4)
+    video_steg.embed_file(str(cover), str(secret), str(stego), "0-1", "secret", workers=1)
+    assert video_steg.extract_file(str(stego), str(out), "0-1", "secret") == 1024
+    assert out.read_bytes() == secret.read_bytes()
+
+def test_staged_chunks_membership_reads_nothing():
+    class Staged:
+        value_count, reads = 10, 0
+
+        def values(self, start, count):
+            Staged.reads += 1
+            return start
+
+    chunks = video_steg._StagedChunks(Staged(), [3, 5, 7], 4)
+    assert 5 in chunks and 7 in chunks and 4 not in chunks
+    assert Staged.reads == 0
+    assert chunks[7] == 8 and Staged.reads == 1
+
+def test_video_index_cache_failure_warns(tmp_path):
+    blocked = tmp_path / "not-a-directory"
+    blocked.write_bytes(b"")
+    with pytest.warns(UserWarning, match="frame index cache"):
+        index = video_index.load_index(str(make_video(tmp_path / "cover.avi")), str(blocked))
+    assert index.frame_count == 6
@@ -0,0 +1,100 @@
+# tests/test_cli.py
+"""The batch command line: output paths, conflicting outputs and resuming from the log."""
+import json
+import os
+
+import cv2
+
+from steganography_tool import cli, image_steg
+from tests.covers import make_image
+
+MESSAGE = "batch message"
+
+def _options(output_dir, **changes):
+    options = {"key": None, "frames": "0", "message": MESSAGE, "payload_file": None, "output_dir": str(output_dir),
+               "passthrough": False, "scatter": False, "bits_per_sample": 1, "compression": None}
+    options.update(changes)
+    return options
+
+def _write_image(path, seed=0):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    cv2.imwrite(str(path), make_image(seed=seed))
+    return str(path)
+
+# --- Output paths ---
+
+def test_output_path_formats():
+    assert cli.output_path(os.path.join("in", "photo.JPG"), "out") == os.path.join("out", "photo.png")
+    assert cli.output_path("cover.webp", "out") == os.path.join("out", "cover.webp")
+    assert cli.output_path("cover.tif", "out") == os.path.join("out", "cover.tif")
+    assert cli.output_path("clip.mp4", "out") == os.path.join("out", "clip.avi")
+    assert cli.output_path("clip.mp4", "out", passthrough=True) == os.path.join("out", "clip.mkv")
+    assert cli.output_path("song.wav", "out") == os.path.join("out", "song.wav")
+
+def test_output_path_mirrors_input_tree(tmp_path):
+    files = [str(tmp_path / "a" / "x.png"), str(tmp_path / "b" / "c" / "x.png")]
+    root = cli.input_root(files)
+    assert root == str(tmp_path)
+    assert cli.output_path(files[0], "out", root=root) == os.path.join("out", "a", "x.png")
+    assert cli.output_path(files[1], "out", root=root) == os.path.join("out", "b", "c", "x.png")
+    assert cli.payload_path(files[1], "out", root=root) == os.path.join("out", "b", "c", "x.png.payload")
+
+def test_expand_inputs(tmp_path):
+    first = _write_image(tmp_path / "a" / "one.png")
+    second = _write_image(tmp_path / "a" / "b" / "two.png")
+    manifest = tmp_path / "list.txt"
+    manifest.write_text(f"# covers\n{first}\n\n{tmp_path / 'missing.png'}\n", encoding="utf-8")
+    found = cli.expand_inputs([str(tmp_path / "**" / "*.png"), "@" + str(manifest), first])
+    assert found == sorted([os.path.normpath(first), os.path.normpath(second)])
+
+def test_encode_mirrors_directories(tmp_path, capsys):
+    inputs = [_write_image(tmp_path / "in" / "a" / "x.png", 1), _write_image(tmp_path / "in" / "b" / "x.png", 2)]
+    out = tmp_path / "out"
+    assert cli.main(["encode", *inputs, "-m", MESSAGE, "-o", str(out), "-j", "1", "-q"]) == 0
+    stego = [str(out / "a" / "x.png"), str(out / "b" / "x.png")]
+    assert all(image_steg.decode_image_file(path) == MESSAGE for path in stego)
+    assert cli.main(["decode", *stego, "-j", "1", "-q"]) == 0
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert sorted(line["path"] for line in lines) == sorted(os.path.normpath(path) for path in stego)
+    assert all(line["message"] == MESSAGE for line in lines)
+
+# --- Conflicting outputs ---
+
+def test_conflicting_outputs_fail_before_writing(tmp_path):
+    inputs = [_write_image(tmp_path / "in" / "x.png"), _write_image(tmp_path / "in" / "x.bmp")]
+    other = _write_image(tmp_path / "in" / "y.png")
+    out = tmp_path / "out"
+    results = cli.run_batch("encode", inputs + [other], _options(out, input_root=str(tmp_path / "in")),
+                            jobs=1, progress=False)
+    errors = {record["path"]: record["error"] for record in results if record["status"] == "error"}
+    assert set(errors) == set(inputs)
+    assert "same output file" in errors[inputs[0]] and inputs[1] in errors[inputs[0]]
+    assert sorted(os.listdir(out)) == ["y.png"]
+
+def test_output_cannot_replace_input(tmp_path):
+    path = _write_image(tmp_path / "x.png")
+    [record] = cli.run_batch("encode", [path], _options(tmp_path, input_root=str(tmp_path)), progress=False)
+    assert record["status"] == "error" and "is the input file" in record["error"]
+    assert image_steg.decode_image_file(path) is None
+
+# --- Resume ---
+
+def test_resume_skips_logged_files(tmp_path):
+    inputs = [_write_image(tmp_path / "in" / f"{n}.png", n) for n in range(3)]
+    log, out = str(tmp_path / "run.jsonl"), tmp_path / "out"
+    options = _options(out, input_root=str(tmp_path / "in"))
+    results = cli.run_batch("encode", inputs[:2], options, jobs=1, log_path=log, progress=False)
+    assert [record["status"] for record in results] == ["ok", "ok"]
+
+    # A failed record and a line cut off by a killed run do not count as done
+    with open(log, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"command": "encode", "path": inputs[2], "status": "error", "error": "x"}) + "\n")
+        f.write('{"command": "encode", "path": ')
+    os.remove(out / "0.png")
+    results = cli.run_batch("encode", inputs, options, jobs=1, log_path=log, resume=True, progress=False)
+    assert [record["path"] for record in results] == [inputs[2]]
+    assert not (out / "0.png").exists()
+    assert cli.run_batch("encode", inputs, options, jobs=1, log_path=log, resume=True, progress=False) == []
+    # Other commands keep their own progress
+    results = cli.run_batch("decode", inputs[:1], _options(None), jobs=1, log_path=log, resume=True, progress=False)
+    assert [record["path"] for record in results] == inputs[:1]
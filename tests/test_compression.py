@@ -0,0 +1,77 @@
+# tests/test_compression.py
+import os
+
+import pytest
+
+from steganography_tool import audio_steg, compress_utils, image_steg, payload, text_steg, utils
+from tests.covers import make_image, make_text, make_wav
+
+TEXT = "a very compressible message " * 50
+CODECS = compress_utils.available_codecs()
+
+def _read(data):
+    return payload.read_payload(utils.lsb_reader(payload.sample_values(data)))
+
+@pytest.mark.parametrize("codec", CODECS)
+@pytest.mark.parametrize("key", [None, "secret"])
+def test_round_trip(codec, key):
+    data = payload.build_message(TEXT, key=key, compression=codec)
+    header, body = _read(data)
+    assert header.flags & payload.FLAG_COMPRESSED
+    assert header.extensions[payload.EXT_COMPRESSION] == bytes([compress_utils.codec_id(codec)])
+    assert len(data) < len(payload.build_message(TEXT, key=key))
+    assert payload.decode_message(header, body, key) == TEXT
+
+def test_skipped_when_it_does_not_help():
+    message = os.urandom(200)
+    data = payload.build_message(message, compression="zlib")
+    header, body = _read(data)
+    assert not header.flags & payload.FLAG_COMPRESSED
+    assert payload.decode_message(header, body) == message
+
+def test_unknown_codec():
+    with pytest.raises(ValueError):
+        payload.build_message(TEXT, compression="nope")
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_streams(codec):
+    blocks = [os.urandom(1000) + b"a" * 5000 for _ in range(4)]
+    compressed = list(compress_utils.compress_stream(blocks, codec))
+    assert b"".join(compress_utils.decompress_stream(compressed, codec)) == b"".join(blocks)
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_decompression_is_bounded(codec):
+    data = bytes(1 << 20)
+    compressed = compress_utils.compress(data, codec)
+    assert compress_utils.decompress(compressed, codec, len(data)) == data
+    with pytest.raises(ValueError, match="more than"):
+        compress_utils.decompress(compressed, codec, len(data) - 1)
+    blocks = compress_utils.decompress_stream([compressed[:7], compressed[7:]], codec, 1000)
+    with pytest.raises(ValueError, match="more than 1000 bytes"):
+        list(blocks)
+
+def test_payload_expansion_limit(monkeypatch):
+    # A payload that expands past MAX_EXPANSION times its stored length is refused
+    header, body = _read(payload.build_message(TEXT, compression="zlib"))
+    monkeypatch.setattr(compress_utils, "MAX_EXPANSION", len(TEXT) // header.length - 1)
+    with pytest.raises(ValueError, match="more than"):
+        payload.decode_message(header, body)
+    with pytest.raises(ValueError, match="more than"):
+        list(payload.open_payload_stream(header, [body]))
+
+def test_carriers():
+    image = image_steg.encode_message_in_image(make_image(32, 32), TEXT, compression="zlib")
+    assert image_steg.decode_message_from_image(image) == TEXT
+    audio = audio_steg.encode_message_in_audio(make_wav(4000), TEXT, "k", compression="lzma")
+    assert audio_steg.decode_message_from_audio(audio, "k") == TEXT
+    text = text_steg.encode_message_in_text(make_text(500), TEXT, compression="zlib")
+    assert text_steg.decode_message_from_text(text) == TEXT
+
+@pytest.mark.parametrize("key", [None, "secret"])
+def test_embed_file(tmp_path, key):
+    cover, secret, stego, out = (tmp_path / name for name in ("cover.wav", "secret.bin", "stego.wav", "out.bin"))
+    cover.write_bytes(make_wav(4000))
+    secret.write_bytes(b"line of a log file\n" * 5000) # Too big for the cover uncompressed
+    audio_steg.embed_file(str(cover), str(secret), str(stego), key, compression="zlib")
+    assert audio_steg.extract_file(str(stego), str(out), key) == secret.stat().st_size
+    assert out.read_bytes() == secret.read_bytes()
@@ -0,0 +1,89 @@
+# tests/test_image_output.py
+"""Channel orders, the lossless output formats and the capacity of image files."""
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from steganography_tool import image_steg
+from tests.covers import make_image
+
+MESSAGE = "kept in every channel"
+
+def _cover(channels):
+    image = make_image(channels=channels)
+    return image[..., 0] if channels == 1 else image
+
+# --- Channel orders ---
+
+@pytest.mark.parametrize("order", list(image_steg.CHANNEL_ORDERS))
+def test_channel_orders(order):
+    cover = make_image(channels=len(order))
+    stego = image_steg.encode_message_in_image(cover, MESSAGE, "k", channel_order=order)
+    assert image_steg.decode_message_from_image(stego, "k", channel_order=order) == MESSAGE
+    # The same pixels in BGR(A) order hold the same values
+    bgr = stego[..., list(image_steg.CHANNEL_ORDERS[order])]
+    assert image_steg.decode_message_from_image(bgr, "k") == MESSAGE
+
+@pytest.mark.parametrize("order", ["RGB", "RGBA"])
+def test_channel_order_matches_bgr(order):
+    cover = make_image(channels=len(order))
+    positions = list(image_steg.CHANNEL_ORDERS[order])
+    stego = image_steg.encode_message_in_image(cover, MESSAGE, channel_order=order)
+    expected = image_steg.encode_message_in_image(cover[..., positions], MESSAGE)
+    assert np.array_equal(stego[..., positions], expected)
+
+def test_channel_order_errors():
+    with pytest.raises(ValueError, match="Unknown channel order"):
+        image_steg.encode_message_in_image(make_image(), MESSAGE, channel_order="GRB")
+    with pytest.raises(ValueError, match="needs 4 channels"):
+        image_steg.encode_message_in_image(make_image(), MESSAGE, channel_order="RGBA")
+
+# --- Output formats ---
+
+@pytest.mark.parametrize("format", list(image_steg.IMAGE_OUTPUT_FORMATS))
+@pytest.mark.parametrize("level", [None, 0, 9])
+@pytest.mark.parametrize("channels, order", [(3, "BGR"), (3, "RGB"), (4, "BGRA"), (4, "RGBA"), (1, "BGR")])
+def test_output_formats(format, level, channels, order):
+    if (format, channels) == ("webp", 1):
+        pytest.skip("WebP has no gray mode")
+    stego = image_steg.encode_message_in_image(_cover(channels), MESSAGE, "k", channel_order=order)
+    data = image_steg.encode_image(stego, format, level, channel_order=order)
+    assert image_steg.decode_image_file(data, "k") == MESSAGE
+    # Files load in BGR(A) order
+    loaded = image_steg.load_image(data)
+    assert np.array_equal(loaded, stego if channels == 1 else stego[..., list(image_steg.CHANNEL_ORDERS[order])])
+
+def test_save_image_format_from_extension(tmp_path):
+    stego = image_steg.encode_message_in_image(make_image(), MESSAGE)
+    path = str(tmp_path / "stego.TIF")
+    image_steg.save_image(stego, path)
+    with Image.open(path) as image:
+        assert image.format == "TIFF"
+    assert image_steg.decode_image_file(path) == MESSAGE
+    image_steg.save_image(stego, str(tmp_path / "stego.bin"), format=".webp")
+    with Image.open(str(tmp_path / "stego.bin")) as image:
+        assert image.format == "WEBP"
+
+def test_output_format_errors():
+    with pytest.raises(ValueError, match="losslessly"):
+        image_steg.encode_image(make_image(), "jpg")
+    with pytest.raises(ValueError, match="cannot be saved as webp"):
+        image_steg.encode_image(_cover(1), "webp")
+
+# --- Capacity ---
+
+@pytest.mark.parametrize("mode, channels, format", [("L", 1, "PNG"), ("LA", 2, "PNG"), ("RGB", 3, "PNG"),
+                                                    ("RGBA", 4, "PNG"), ("RGBA", 4, "WEBP"), ("L", 1, "JPEG")])
+def test_capacity_counts_file_channels(mode, channels, format):
+    buffer = io.BytesIO()
+    Image.fromarray(_cover(channels) if channels != 2 else make_image(channels=2), mode).save(buffer, format=format)
+    values = image_steg.load_image(buffer.getvalue()).size
+    assert image_steg.capacity(buffer, overhead=0) == values // 8
+
+def test_capacity_of_transparent_palette():
+    buffer = io.BytesIO()
+    Image.fromarray(_cover(3)).convert("P").save(buffer, format="PNG", transparency=0)
+    assert image_steg.load_image(buffer.getvalue()).shape[2] == 4
+    assert image_steg.capacity(buffer, overhead=0) == 64 * 64 * 4 // 8
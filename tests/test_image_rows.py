@@ -0,0 +1,171 @@
+# tests/test_image_rows.py
+import io
+import struct
+import zlib
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+from steganography_tool import image_rows, image_steg
+from tests.covers import make_image
+
+MESSAGE = "found in the first rows"
+
+# --- A PNG writer that uses the given filter for each row, so every filter is exercised ---
+
+def _chunk(kind, data):
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+def _filter_row(row, prior, bpp, filter_type):
+    left = np.concatenate([np.zeros(bpp, dtype=int), row[:-bpp]])
+    upper_left = np.concatenate([np.zeros(bpp, dtype=int), prior[:-bpp]])
+    if filter_type == 0:
+        predicted = 0
+    elif filter_type == 1:
+        predicted = left
+    elif filter_type == 2:
+        predicted = prior
+    elif filter_type == 3:
+        predicted = (left + prior) // 2
+    else:
+        estimate = left + prior - upper_left
+        pa, pb, pc = abs(estimate - left), abs(estimate - prior), abs(estimate - upper_left)
+        predicted = np.where((pa <= pb) & (pa <= pc), left, np.where(pb <= pc, prior, upper_left))
+    return ((row - predicted) % 256).astype(np.uint8).tobytes()
+
+def write_png(pixels, color_type, filters=(0, 1, 2, 3, 4), palette=None, interlace=0, extra_chunks=()):
+    """PNG bytes for a (height, width, channels) array; the IDAT data is split over two chunks.
+
+    The rows are always written in order; interlace only sets the header field.
+    """
+    height, width, channels = pixels.shape
+    raw = bytearray()
+    prior = np.zeros(width * channels, dtype=int)
+    for y, row in enumerate(pixels.reshape(height, -1).astype(int)):
+        filter_type = filters[y % len(filters)]
+        raw += bytes([filter_type]) + _filter_row(row, prior, channels, filter_type)
+        prior = row
+    compressed = zlib.compress(bytes(raw))
+    half = len(compressed) // 2
+    chunks = [_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, color_type, 0, 0, interlace))]
+    chunks += [_chunk(kind, data) for kind, data in extra_chunks]
+    if palette is not None:
+        chunks.append(_chunk(b'PLTE', palette.tobytes()))
+    chunks += [_chunk(b'IDAT', compressed[:half]), _chunk(b'IDAT', compressed[half:]), _chunk(b'IEND', b'')]
+    return b'\x89PNG\r\n\x1a\n' + b''.join(chunks)
+
+def _rows(data):
+    image = image_rows.open_rows(io.BytesIO(data))
+    return image, np.stack(list(image.rows))
+
+# --- PNG ---
+
+@pytest.mark.parametrize("color_type, channels", [(0, 1), (2, 3), (4, 2), (6, 4)])
+@pytest.mark.parametrize("filter_type", [0, 1, 2, 3, 4])
+def test_png_filters(color_type, channels, filter_type):
+    pixels = make_image(9, 11, channels)
+    data = write_png(pixels, color_type, (filter_type,))
+    image, rows = _rows(data)
+    assert (image.width, image.height, image.channels) == (11, 9, channels)
+    assert np.array_equal(rows, pixels)
+    if channels == 3:
+        # The writer itself agrees with OpenCV
+        assert np.array_equal(cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR), pixels[..., ::-1])
+
+def test_png_palette():
+    palette = make_image(1, 200, 3).reshape(-1, 3) # Indices above 199 decode as black
+    indices = make_image(8, 8, 1)
+    _, rows = _rows(write_png(indices, 3, palette=palette))
+    full = np.zeros((256, 3), dtype=np.uint8)
+    full[:200] = palette
+    assert np.array_equal(rows, full[indices[..., 0]])
+
+def test_png_rows_are_lazy():
+    # Only the first row can be inflated; reading it must not touch the rest
+    data = write_png(make_image(64, 64), 2)
+    image = image_rows.open_rows(io.BytesIO(data[:len(data) // 2]))
+    assert next(image.rows).shape == (64, 3)
+
+def test_unsupported_png_layouts():
+    buffer = io.BytesIO()
+    Image.new("I;16", (8, 8)).save(buffer, format="PNG")
+    pixels = make_image(8, 8)
+    for data in (buffer.getvalue(), write_png(pixels, 2, interlace=1),
+                 write_png(pixels, 2, extra_chunks=[(b'eXIf', b'MM\x00*\x00\x00\x00\x08\x00\x00')])):
+        assert image_rows.open_rows(io.BytesIO(data)) is None
+
+# --- TIFF ---
+
+@pytest.mark.parametrize("compression", [None, "tiff_deflate", "tiff_adobe_deflate"])
+@pytest.mark.parametrize("mode, channels", [("L", 1), ("RGB", 3)])
+def test_tiff(compression, mode, channels):
+    pixels = make_image(10, 13, channels)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels[..., 0] if channels == 1 else pixels, mode).save(buffer, format="TIFF", compression=compression)
+    _, rows = _rows(buffer.getvalue())
+    assert np.array_equal(rows, pixels)
+
+def test_tiff_predictor():
+    # OpenCV writes deflate with the horizontal predictor
+    pixels = make_image(10, 13)
+    _, rows = _rows(image_steg.encode_image(pixels, "tiff", 6))
+    assert np.array_equal(rows, pixels[..., ::-1])
+
+def test_tiff_lzw_is_unsupported():
+    buffer = io.BytesIO()
+    Image.fromarray(make_image(8, 8)).save(buffer, format="TIFF", compression="tiff_lzw")
+    buffer.seek(0)
+    assert image_rows.open_rows(buffer) is None
+
+# --- decode_image_file ---
+
+@pytest.mark.parametrize("filter_type", [0, 1, 2, 3, 4])
+def test_decode_png_rows(tmp_path, filter_type):
+    stego = image_steg.encode_message_in_image(make_image(), MESSAGE, "k")
+    path = tmp_path / "stego.png"
+    path.write_bytes(write_png(stego[..., ::-1], 2, (filter_type,)))
+    assert image_steg.decode_image_file(str(path), "k") == MESSAGE
+
+def test_decode_stops_after_payload(tmp_path):
+    stego = image_steg.encode_message_in_image(make_image(256, 256), MESSAGE)
+    data = image_steg.encode_image(stego, "png")
+    path = tmp_path / "cut.png"
+    path.write_bytes(data[:len(data) // 2]) # A full decoder cannot read this file
+    assert image_steg.decode_image_file(str(path)) == MESSAGE
+
+@pytest.mark.parametrize("format", ["png", "tiff", "webp"])
+def test_decode_large_payload(tmp_path, format):
+    # Beyond the row-reading limit the image is decoded in full
+    message = "x" * 1000
+    path = str(tmp_path / ("stego." + format))
+    image_steg.save_image(image_steg.encode_message_in_image(make_image(), message, "k"), path)
+    assert image_steg.decode_image_file(path, "k") == message
+
+def test_decode_file_object():
+    data = image_steg.encode_image(image_steg.encode_message_in_image(make_image(), MESSAGE), "png")
+    assert image_steg.decode_image_file(io.BytesIO(data)) == MESSAGE
+
+@pytest.mark.parametrize("message", [MESSAGE, "x" * 1000])
+@pytest.mark.parametrize("channels, channel_order", [(4, "BGRA"), (4, "RGBA"), (1, "BGR")])
+def test_decode_png_keeps_channels(tmp_path, message, channels, channel_order):
+    # Short messages are read from the rows, long ones from the full decode
+    cover = make_image(128, 128, channels)
+    cover = cover[..., 0] if channels == 1 else cover
+    path = str(tmp_path / "stego.png")
+    stego = image_steg.encode_message_in_image(cover, message, "k", channel_order=channel_order)
+    image_steg.save_image(stego, path, channel_order=channel_order)
+    assert image_steg.decode_image_file(path, "k") == message
+
+@pytest.mark.parametrize("color_type, channels", [(0, 1), (2, 3), (4, 2), (6, 4)])
+def test_row_values_match_full_decode(color_type, channels):
+    f = io.BytesIO(write_png(make_image(9, 11, channels), color_type))
+    image = image_rows.open_rows(f)
+    rows = np.concatenate(list(image_steg._file_values(image.rows)))
+    assert np.array_equal(rows, image_steg._decode_file(f).reshape(-1))
+
+def test_png_transparency_is_unsupported():
+    # OpenCV expands tRNS into an alpha channel, which the rows do not have
+    data = write_png(make_image(8, 8), 2, extra_chunks=[(b'tRNS', b'\x00\x01\x00\x02\x00\x03')])
+    assert image_rows.open_rows(io.BytesIO(data)) is None
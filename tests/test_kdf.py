@@ -0,0 +1,62 @@
+# tests/test_kdf.py
+import pytest
+
+from steganography_tool import crypto_utils, image_steg, payload, utils
+from tests.covers import make_image
+
+# Cheap costs, so the tests do not spend their time deriving keys
+FAST = {"pbkdf2-sha256": (1000, 0, 0), "scrypt": (1 << 10, 8, 1)}
+
+def _read(data):
+    return payload.read_payload(utils.lsb_reader(payload.sample_values(data)))
+
+@pytest.mark.parametrize("kdf", sorted(FAST))
+def test_kdf_is_recorded_and_used(kdf):
+    data = payload.build_message("hello", key="k", kdf=kdf, kdf_params=FAST[kdf])
+    header, body = _read(data)
+    kdf_id, params, salt = payload._unpack_kdf(header.extensions[payload.EXT_KDF])
+    assert (kdf_id, params, len(salt)) == (crypto_utils.kdf_id(kdf), FAST[kdf], crypto_utils.SALT_SIZE)
+    assert payload.decode_message(header, body, "k") == "hello"
+
+def test_fresh_salt_per_payload():
+    first, second = (payload.build_message("hello", key="k", kdf="scrypt", kdf_params=FAST["scrypt"]) for _ in range(2))
+    assert first != second
+
+def test_derived_keys_are_cached():
+    crypto_utils.kdf_cache_clear()
+    for _ in range(3):
+        crypto_utils.derive_key("k", b"s" * 16, "pbkdf2-sha256", FAST["pbkdf2-sha256"])
+    info = crypto_utils.kdf_cache_info()
+    assert (info.misses, info.hits) == (1, 2)
+
+@pytest.mark.parametrize("kdf, params", [
+    ("scrypt", (1 << 21, 8, 1)),
+    ("scrypt", (1 << 14, 33, 1)),
+    ("scrypt", (1 << 14, 8, 17)),
+    ("scrypt", (1 << 20, 32, 1)), # 4 GiB
+    ("pbkdf2-sha256", (10_000_001, 0, 0)),
+    ("pbkdf2-sha256", (0, 0, 0)),
+])
+def test_costs_out_of_bounds(kdf, params):
+    kdf_id = crypto_utils.kdf_id(kdf)
+    assert not crypto_utils.kdf_params_allowed(kdf_id, params)
+    with pytest.raises(ValueError, match="outside the supported range"):
+        crypto_utils.derive_key("k", b"s" * 16, kdf_id, params)
+
+def _crafted(kdf_field):
+    data = b"x" * 32
+    extensions = {payload.EXT_CIPHER: bytes([crypto_utils.CIPHER_AES_256_GCM]), payload.EXT_KDF: kdf_field}
+    return payload.pack_header(data, payload.FLAG_ENCRYPTED, extensions) + data
+
+@pytest.mark.parametrize("kdf_field", [
+    payload._pack_kdf(crypto_utils.KDF_SCRYPT, (1 << 30, 8, 1), bytes(16)),
+    payload._pack_kdf(crypto_utils.KDF_PBKDF2_SHA256, (4_000_000_000, 0, 0), bytes(16)),
+    b"\x03", # Truncated
+])
+def test_crafted_header_is_no_payload(kdf_field):
+    data = _crafted(kdf_field)
+    assert _read(data) is None
+    assert payload.read_any_payload(utils.lsb_reader(payload.sample_values(data))) == (None, None)
+    image = make_image()
+    utils.embed_lsb(image.reshape(-1), payload.sample_values(data))
+    assert image_steg.decode_message_from_image(image, "k") is None
@@ -0,0 +1,49 @@
+# tests/test_legacy.py
+"""Carriers written by the original release, with the '*^*^*' delimiter instead of a header, still decode."""
+import pytest
+
+from steganography_tool import audio_steg, image_steg, text_steg, utils, video_steg
+from tests.covers import legacy_image, legacy_text, legacy_video, legacy_wav, make_text, make_video
+
+MESSAGES = ["legacy message", "café ÿ"]
+
+@pytest.mark.parametrize("message", MESSAGES)
+def test_image(message):
+    assert image_steg.decode_message_from_image(legacy_image(message)) == message
+
+@pytest.mark.parametrize("message", MESSAGES)
+def test_image_file(tmp_path, message):
+    path = str(tmp_path / "legacy.png")
+    image_steg.save_image(legacy_image(message), path)
+    assert image_steg.decode_image_file(path) == message
+
+@pytest.mark.parametrize("message", MESSAGES)
+@pytest.mark.parametrize("sample_width", [1, 2])
+def test_audio(tmp_path, message, sample_width):
+    audio = legacy_wav(message, sample_width=sample_width)
+    assert audio_steg.decode_message_from_audio(audio) == message
+    path = tmp_path / "legacy.wav"
+    path.write_bytes(audio)
+    assert audio_steg.decode_audio_file(str(path)) == message
+    assert audio_steg.decode_audio_mapped(str(path)) == message
+
+def test_text(tmp_path):
+    message = "Legacy text, 42!"
+    stego = legacy_text(make_text(), message)
+    assert text_steg.decode_message_from_text(stego) == message
+    path = tmp_path / "legacy.txt"
+    path.write_text(stego, encoding="utf-8")
+    assert text_steg.decode_text_file(str(path)) == message
+
+def test_video(tmp_path):
+    path = legacy_video(tmp_path / "legacy.avi", "legacy video", "key", frame_number=1)
+    assert video_steg.decode_video_file(str(path), "1", "key") == "legacy video"
+    with pytest.raises(ValueError, match="provide the key"):
+        video_steg.decode_video_file(str(path), "1")
+
+def test_video_scan_only_for_single_frames(tmp_path, monkeypatch):
+    # The original release wrote one frame, so a multi-frame spec never scans its frames for the delimiter
+    path = make_video(tmp_path / "plain.avi")
+    assert video_steg.decode_video_file(str(path), "1") is None
+    monkeypatch.setattr(utils, "find_delimited", lambda *args: pytest.fail("scanned for the delimiter"))
+    assert video_steg.decode_video_file(str(path), "0-5") is None
@@ -0,0 +1,81 @@
+# tests/test_payload.py
+import struct
+
+import numpy as np
+import pytest
+
+from steganography_tool import payload, utils
+
+def _reader(data, bits_per_sample=1):
+    """A read(n) over a carrier whose low bits hold data, laid out as the carriers store it."""
+    return utils.lsb_reader(payload.sample_values(data, bits_per_sample))
+
+def test_header_layout():
+    data = payload.build_message("hello")
+    assert data[:4] == payload.MAGIC
+    header = payload.parse_header(data)
+    assert (header.length, header.flags, header.extension_length) == (5, 0, 0)
+    assert data[payload.HEADER_SIZE:] == b"hello"
+
+def test_parse_header_rejects_other_bytes():
+    assert payload.parse_header(b"x" * payload.HEADER_SIZE) is None
+    assert payload.parse_header(payload.MAGIC) is None
+
+def test_newer_version_is_an_error():
+    raw = struct.pack(payload.HEADER_FORMAT, payload.MAGIC, payload.VERSION + 1, 0, 0, 0, 0)
+    with pytest.raises(ValueError):
+        payload.parse_header(raw)
+
+@pytest.mark.parametrize("message", ["hello", "unicode ✓ ÿ", b"\x00\xff binary", ""])
+@pytest.mark.parametrize("key", [None, "secret"])
+def test_round_trip(message, key):
+    data = payload.build_message(message, key=key)
+    header, body = payload.read_payload(_reader(data))
+    assert payload.decode_message(header, body, key) == message
+
+def test_binary_flag():
+    header, body = payload.read_payload(_reader(payload.build_message(memoryview(b"abc"))))
+    assert header.flags & payload.FLAG_BINARY
+    assert payload.decode_message(header, body) == b"abc"
+
+def test_checksum_detects_damage():
+    values = payload.sample_values(payload.build_message("hello world"))
+    values[-1] ^= 1
+    with pytest.raises(ValueError, match="checksum"):
+        payload.read_payload(utils.lsb_reader(values))
+
+def test_truncated_body():
+    data = payload.build_message("hello world")
+    with pytest.raises(ValueError, match="truncated"):
+        payload.read_payload(_reader(data[:-3]))
+
+def test_no_header():
+    assert payload.read_payload(_reader(b"\x00" * 64)) is None
+    assert payload.read_any_payload(_reader(b"\x00" * 64)) == (None, None)
+
+def test_key_required_for_encrypted_payload():
+    header, body = payload.read_payload(_reader(payload.build_message("hello", key="k")))
+    with pytest.raises(ValueError, match="provide the key"):
+        payload.decode_message(header, body)
+
+def test_wrong_key_is_reported():
+    header, body = payload.read_payload(_reader(payload.build_message("hello", key="k")))
+    with pytest.raises(ValueError):
+        payload.decode_message(header, body, "wrong")
+
+def test_overhead_matches_built_payload():
+    assert len(payload.build_message("abc")) == 3 + payload.overhead()
+    assert len(payload.build_message("abc", key="k")) == 3 + payload.overhead(encrypted=True)
+
+# --- Legacy delimiter format ---
+
+@pytest.mark.parametrize("message", ["plain text", "café ÿ", "tab\tand\nnewline"])
+def test_legacy_payload(message):
+    data = (message + "*^*^*").encode("latin-1") + bytes(64)
+    header, body = payload.read_any_payload(_reader(data))
+    assert header is None
+    assert payload.decode_message(header, body) == message
+
+def test_legacy_probe_rejects_binary_noise():
+    noise = np.random.default_rng(0).integers(0, 256, 256, dtype=np.uint8).tobytes()
+    assert payload.read_any_payload(_reader(noise)) == (None, None)
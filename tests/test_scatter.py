@@ -0,0 +1,83 @@
+# tests/test_scatter.py
+import numpy as np
+import pytest
+
+from steganography_tool import audio_steg, image_steg, scatter_utils, video_steg
+from tests.covers import make_image, make_video, make_wav
+
+MESSAGE = "scattered over the carrier"
+
+@pytest.mark.parametrize("n_units", [1, 2, 3, 5, 17, 1000, 65537])
+def test_permutation_is_a_bijection(n_units):
+    scatter = scatter_utils.Scatter(n_units, "k")
+    units = scatter.units(np.arange(n_units, dtype=np.uint64))
+    assert np.array_equal(np.sort(units), np.arange(n_units))
+
+def test_order_depends_on_key_and_size():
+    first = scatter_utils.Scatter(10000, "k").positions(0, 100)
+    assert np.array_equal(first, scatter_utils.Scatter(10000, "k").positions(0, 100))
+    assert not np.array_equal(first, scatter_utils.Scatter(10000, "other").positions(0, 100))
+    assert not np.array_equal(first, scatter_utils.Scatter(10001, "k").positions(0, 100))
+
+def test_random_access_matches_full_order():
+    scatter = scatter_utils.Scatter(3000, "k", channels=3)
+    full = scatter.positions(0, 3000)
+    assert np.array_equal(scatter.positions(1234, 77), full[1234:1311])
+    # The values of a unit stay together, in channel order
+    assert np.array_equal(full[:6] % 3, [0, 1, 2, 0, 1, 2])
+
+def test_key_required():
+    with pytest.raises(ValueError, match="key is required"):
+        scatter_utils.Scatter(100, None)
+    with pytest.raises(ValueError, match="key is required"):
+        image_steg.encode_message_in_image(make_image(), MESSAGE, scatter=True)
+
+@pytest.mark.parametrize("channels", [1, 3, 4])
+def test_image(channels):
+    cover = make_image(channels=channels)
+    stego = image_steg.encode_message_in_image(cover, MESSAGE, "k", scatter=True)
+    assert image_steg.decode_message_from_image(stego, "k") == MESSAGE
+    assert image_steg.decode_message_from_image(stego) is None
+    # The changes are spread over the image, not packed into its first rows
+    changed_rows = np.flatnonzero((cover != stego).any(axis=(1, 2)))
+    assert changed_rows.max() > cover.shape[0] // 2
+
+def test_image_file(tmp_path):
+    path = str(tmp_path / "stego.png")
+    image_steg.save_image(image_steg.encode_message_in_image(make_image(), MESSAGE, "k", 2, scatter=True), path)
+    assert image_steg.decode_image_file(path, "k") == MESSAGE
+
+def test_audio(tmp_path):
+    stego = audio_steg.encode_message_in_audio(make_wav(), MESSAGE, "k", scatter=True)
+    assert audio_steg.decode_message_from_audio(stego, "k") == MESSAGE
+    path = tmp_path / "stego.wav"
+    path.write_bytes(stego)
+    assert audio_steg.decode_audio_file(str(path), key="k") == MESSAGE
+    assert audio_steg.decode_audio_mapped(str(path), "k") == MESSAGE
+
+def test_audio_embed_file_mapped(tmp_path):
+    cover, secret, stego, out = (tmp_path / name for name in ("cover.wav", "secret.bin", "stego.wav", "out.bin"))
+    cover.write_bytes(make_wav())
+    secret.write_bytes(bytes(range(256)) * 8)
+    audio_steg.embed_file_mapped(str(cover), str(secret), str(stego), "k", scatter=True)
+    assert audio_steg.extract_file(str(stego), str(out), "k") == 2048
+    assert out.read_bytes() == secret.read_bytes()
+
+def test_video(tmp_path):
+    cover, stego = make_video(tmp_path / "cover.avi"), tmp_path / "stego.avi"
+    message = MESSAGE * 60 # Spread over two frames
+    video_steg.encode_video_file(str(cover), str(stego), message, "1-3", "k", workers=1, scatter=True)
+    assert video_steg.decode_video_file(str(stego), "1-3", "k") == message
+    assert video_steg.decode_video_file(str(stego), "1-3") is None
+
+def test_video_passthrough(tmp_path):
+    av = pytest.importorskip("av")
+    cover, stego = tmp_path / "cover.mp4", tmp_path / "stego.mkv"
+    with av.open(str(cover), 'w') as container:
+        stream = container.add_stream('libx264', rate=10)
+        stream.width, stream.height, stream.pix_fmt = 64, 48, 'yuv420p'
+        for frame in range(6):
+            container.mux(stream.encode(av.VideoFrame.from_ndarray(make_image(48, 64, seed=frame), format='rgb24')))
+        container.mux(stream.encode())
+    video_steg.encode_video_file(str(cover), str(stego), MESSAGE, "2", "k", passthrough=True, scatter=True)
+    assert video_steg.decode_video_file(str(stego), "2", "k") == MESSAGE